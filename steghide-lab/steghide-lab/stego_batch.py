@@ -0,0 +1,153 @@
+"""
+Giấu tin hàng loạt theo danh sách (manifest) bằng nhiều tiến trình
+
+Chức năng:
+    - Đọc manifest CSV hoặc JSONL gồm các cột cover, payload, output (và bits_per_channel, key, codec,
+      matrix tùy chọn; thiếu cột thì dùng tùy chọn dòng lệnh)
+    - Chạy embed → lưu ảnh → đọc lại ảnh đã lưu → extract → so sánh cho từng mục trên ProcessPoolExecutor
+    - Ghi kết quả từng mục ra file JSONL ngay khi hoàn thành và tổng hợp tốc độ xử lý
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from stego_codec import CODEC_AUTO
+from stego_engine import BITS_PER_CHANNEL
+from stego_pipeline import checkOutputFormat, embed, extract, writeImage
+from stego_pixels import PixelBuffer
+
+# Giá trị của cột matrix được hiểu là bật mã hóa ma trận (CSV chỉ có chuỗi)
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+def readManifest(manifest_path, bits_per_channel=BITS_PER_CHANNEL, codec=CODEC_AUTO, matrix=False):
+    """
+    Đọc manifest CSV (có dòng tiêu đề) hoặc JSONL
+    
+    Đường dẫn tương đối được tính từ thư mục chứa manifest. Nếu thiếu cột
+    output, ảnh kết quả là encrypted_<tên ảnh>.png cạnh ảnh gốc.
+    
+    Args:
+        manifest_path (str): Đường dẫn file manifest (.csv, .jsonl)
+        bits_per_channel (int): Số bit LSB mặc định khi mục không có cột bits_per_channel
+        codec (str): Codec nén mặc định khi mục không có cột codec
+        matrix (bool): Mã hóa ma trận mặc định khi mục không có cột matrix
+        
+    Yields:
+        dict: Mục cần xử lý với các khóa cover, payload, output, bits_per_channel, key, codec, matrix
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+        if manifest_path.endswith(('.jsonl', '.json')):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            cover = os.path.join(base, row['cover'])
+            output = row.get('output') or os.path.join(
+                os.path.dirname(cover),
+                "encrypted_" + os.path.splitext(os.path.basename(cover))[0] + ".png")
+            yield {
+                "cover": cover,
+                "payload": os.path.join(base, row['payload']),
+                "output": os.path.join(base, output),
+                "bits_per_channel": int(row.get('bits_per_channel') or bits_per_channel),
+                "key": row.get('key') or None,
+                "codec": row.get('codec') or codec,
+                "matrix": (str(row['matrix']).strip().lower() in TRUE_VALUES
+                           if row.get('matrix') not in (None, "") else matrix),
+            }
+
+def processItem(item):
+    """
+    Giấu và trích xuất một mục trong manifest
+    
+    Thông điệp được trích xuất từ file ảnh đã lưu (không phải mảng trong bộ
+    nhớ), nên mục chỉ có trạng thái ok khi ảnh đầu ra thực sự chứa thông điệp.
+    
+    Args:
+        item (dict): Mục với các khóa cover, payload, output, bits_per_channel, key, codec, matrix
+        
+    Returns:
+        dict: Kết quả gồm trạng thái, kích thước và thời gian xử lý
+    """
+    result = dict(item)
+    start = time.perf_counter()
+    try:
+        with open(item['payload'], 'rb') as f:
+            payload = f.read()
+        checkOutputFormat(item['output'])
+        pixels = PixelBuffer.fromFile(item['cover'])
+        stego = embed(pixels, payload, item['bits_per_channel'], key=item['key'], codec=item['codec'],
+                      matrix=item['matrix'])
+        writeImage(item['output'], stego)
+        match = extract(item['output'], key=item['key']) == payload
+        result.update({
+            "status": "ok" if match else "mismatch",
+            "payload_bytes": len(payload),
+            "image_bytes": stego.nbytes,
+            "width": pixels.width,
+            "height": pixels.height,
+        })
+    except Exception as e:
+        result.update({"status": "error", "error": str(e)})
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def runBatch(manifest_path, report_path, workers=None, bits_per_channel=BITS_PER_CHANNEL, codec=CODEC_AUTO,
+             matrix=False):
+    """
+    Xử lý toàn bộ manifest trên nhiều tiến trình
+    
+    Args:
+        manifest_path (str): Đường dẫn manifest
+        report_path (str): Đường dẫn file JSONL ghi kết quả từng mục
+        workers (int, optional): Số tiến trình (mặc định bằng số lõi CPU)
+        bits_per_channel (int): Số bit LSB mặc định trên mỗi kênh
+        codec (str): Codec nén mặc định (none, zlib, lzma hoặc auto)
+        matrix (bool): Mã hóa ma trận mặc định
+        
+    Returns:
+        dict: Tổng hợp số mục, số lỗi, ảnh/giây và MB/giây
+    """
+    workers = workers or os.cpu_count() or 1
+    summary = {"items": 0, "ok": 0, "failed": 0, "payload_bytes": 0, "image_bytes": 0}
+    start = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            open(report_path, 'w', encoding='utf-8') as report:
+        for result in executor.map(processItem, readManifest(manifest_path, bits_per_channel, codec, matrix),
+                                   chunksize=4):
+            report.write(json.dumps(result, ensure_ascii=False) + "\n")
+            report.flush()
+            summary["items"] += 1
+            if result["status"] == "ok":
+                summary["ok"] += 1
+                summary["payload_bytes"] += result["payload_bytes"]
+                summary["image_bytes"] += result["image_bytes"]
+            else:
+                summary["failed"] += 1
+    
+    elapsed = time.perf_counter() - start
+    summary.update({
+        "workers": workers,
+        "seconds": elapsed,
+        "images_per_sec": summary["items"] / elapsed if elapsed else 0.0,
+        "image_mb_per_sec": summary["image_bytes"] / 1e6 / elapsed if elapsed else 0.0,
+        "payload_mb_per_sec": summary["payload_bytes"] / 1e6 / elapsed if elapsed else 0.0,
+    })
+    return summary
+
+def cmdBatch(args):
+    """Lệnh 'batch' của stego_pipeline: xử lý manifest và in tổng hợp"""
+    summary = runBatch(args.manifest, args.report, args.jobs, args.bits_per_channel, args.codec, args.matrix)
+    print(f"- Số mục: {summary['items']} (thành công {summary['ok']}, lỗi {summary['failed']})")
+    print(f"- Số tiến trình: {summary['workers']}")
+    print(f"- Thời gian: {summary['seconds']:.2f} giây")
+    print(f"- Tốc độ: {summary['images_per_sec']:.2f} ảnh/giây, "
+          f"{summary['image_mb_per_sec']:.2f} MB ảnh/giây, "
+          f"{summary['payload_mb_per_sec']:.3f} MB thông điệp/giây")
+    print(f"- Kết quả từng mục: {args.report}")
+    return 0 if summary["failed"] == 0 else 1
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Đo khả năng mở rộng của 5 bước giấu tin với ảnh và thông điệp tổng hợp
+
+Chức năng:
+    - Sinh ảnh gốc tất định (VGA đến 50 MP, RGB và RGBA) và thông điệp tất định
+      (1 KB đến 10 MB, ASCII và UTF-8 nhiều byte) từ một seed cố định
+    - Đo riêng getPicture, textToBinary, embed_message, extract_message và
+      verify_steganography: thời gian thực, thời gian CPU, bộ nhớ đỉnh
+    - Mỗi trường hợp chạy trong một tiến trình mới để bộ nhớ đỉnh không lẫn giữa các trường hợp
+    - Ghi kết quả ra JSON và so sánh với một kết quả gốc để phát hiện hồi quy
+
+Ví dụ:
+    python3 stego_bench.py run -o stego_bench.json
+    python3 stego_bench.py run --covers vga,hd --payloads 1k,64k --baseline stego_bench.json
+    python3 stego_bench.py compare baseline.json stego_bench.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+from stego_capacity import capacityBytes
+from stego_codec import CODECS
+from stego_engine import BITS_PER_CHANNEL, CHANNELS, EXTENDED_PIXELS, HEADER_PIXELS, checkBitsPerChannel
+from stego_pixels import savePixels
+from stego_step1_prepare import getPicture, prepare_data
+from stego_step2_convert import convert_message, textToBinary
+from stego_step3_embed import embed_message
+from stego_step4_extract import extract_message
+from stego_step5_verify import verify_steganography
+from stego_timing import StageTimer
+
+# Phiên bản định dạng file kết quả
+BENCH_VERSION = 1
+
+# Kích thước ảnh gốc (rộng, cao)
+COVER_SIZES = {
+    "vga": (640, 480),
+    "hd": (1280, 720),
+    "fhd": (1920, 1080),
+    "12mp": (4000, 3000),
+    "50mp": (8192, 6144),
+}
+
+# Kích thước thông điệp (byte)
+PAYLOAD_SIZES = {
+    "1k": 1 << 10,
+    "64k": 64 << 10,
+    "1m": 1 << 20,
+    "10m": 10 << 20,
+}
+
+# Số kênh của ảnh gốc: RGB, RGBA hoặc xám (mọi kênh đều chứa tin)
+COVER_CHANNELS = {"rgb": 3, "rgba": 4, "gray": 1}
+
+# Loại thông điệp: chỉ ký tự ASCII hoặc tiếng Việt có dấu (2-3 byte UTF-8 mỗi ký tự)
+PAYLOAD_WORDS = {
+    "ascii": ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "hidden", "message",
+              "pixel", "image", "least", "significant", "bit", "cover", "stego", "lab", "2024", "data"),
+    "utf8": ("giấu", "tin", "trong", "ảnh", "thông", "điệp", "bí", "mật", "điểm", "màu", "kênh",
+             "độ", "dài", "được", "trích", "xuất", "kiểm", "tra", "tiếng", "Việt"),
+}
+
+# Bộ thử nhanh cho máy yếu hoặc khi chỉ cần kiểm tra hồi quy
+QUICK_COVERS = ("vga", "hd")
+QUICK_PAYLOADS = ("1k", "64k")
+
+# Các hàm được đo, theo thứ tự chạy
+BENCH_FUNCTIONS = ("getPicture", "textToBinary", "embed_message", "extract_message", "verify_steganography")
+
+# Ngưỡng hồi quy mặc định: chậm hơn 10% và ít nhất 5 ms (bỏ qua dao động của các hàm rất nhanh)
+DEFAULT_THRESHOLD = 0.10
+MIN_REGRESSION_SECONDS = 0.005
+MIN_REGRESSION_BYTES = 1 << 20
+
+DEFAULT_SEED = 2024
+
+def syntheticCover(width, height, channels=CHANNELS, seed=DEFAULT_SEED):
+    """
+    Sinh ảnh gốc tất định: dải màu chuyển dần cộng nhiễu ở các bit thấp
+    
+    Nhiễu giúp PNG không nén quá tốt, gần với ảnh chụp hơn một dải màu trơn.
+    
+    Args:
+        width (int): Chiều rộng ảnh
+        height (int): Chiều cao ảnh
+        channels (int): 1 (xám), 3 (BGR) hoặc 4 (BGRA, kênh alpha là dải trong suốt dần)
+        seed (int): Seed của bộ sinh số ngẫu nhiên
+        
+    Returns:
+        numpy.ndarray: Ảnh H×W×channels uint8 theo thứ tự kênh của cv2 (H×W với ảnh xám)
+    """
+    rng = np.random.default_rng(seed)
+    rows = (np.arange(height, dtype=np.uint32) * 127 // max(height - 1, 1)).astype(np.uint8)
+    cols = (np.arange(width, dtype=np.uint32) * 127 // max(width - 1, 1)).astype(np.uint8)
+    image = np.empty((height, width, channels), dtype=np.uint8)
+    for channel in range(min(channels, CHANNELS)):
+        # Mỗi kênh có hướng chuyển màu khác nhau
+        image[..., channel] = rows[:, None] + (cols[None, :] if channel != 1 else cols[None, ::-1])
+        image[..., channel] ^= rng.integers(0, 16, (height, width), dtype=np.uint8)
+    if channels > CHANNELS:
+        image[..., CHANNELS] = 255 - rows[:, None] // 2
+    return image[..., 0] if channels == 1 else image
+
+def syntheticText(size, kind="ascii", seed=DEFAULT_SEED):
+    """
+    Sinh thông điệp tất định có độ dài gần đúng size byte UTF-8
+    
+    Args:
+        size (int): Số byte UTF-8 mong muốn (thông điệp UTF-8 có thể ngắn hơn tối đa 3 byte
+            để không cắt giữa một ký tự)
+        kind (str): Loại thông điệp trong PAYLOAD_WORDS
+        seed (int): Seed của bộ sinh số ngẫu nhiên
+        
+    Returns:
+        str: Thông điệp gồm các từ cách nhau bởi dấu cách, xuống dòng sau mỗi 12 từ
+    """
+    words = PAYLOAD_WORDS[kind]
+    rng = np.random.default_rng(seed)
+    shortest = min(len(word.encode('utf-8')) for word in words) + 1
+    picks = rng.integers(0, len(words), size // shortest + 1)
+    text = " ".join(words[i] + ("\n" if k % 12 == 11 else "") for k, i in enumerate(picks))
+    return text.encode('utf-8')[:size].decode('utf-8', errors='ignore')
+
+def benchCases(covers, payloads, channels, kinds, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Liệt kê các trường hợp đo (tích của các kích thước ảnh, số kênh, kích thước và loại thông điệp)
+    
+    Args:
+        covers (list): Tên kích thước ảnh trong COVER_SIZES
+        payloads (list): Tên kích thước thông điệp trong PAYLOAD_SIZES
+        channels (list): Tên số kênh trong COVER_CHANNELS
+        kinds (list): Loại thông điệp trong PAYLOAD_WORDS
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Yields:
+        dict: Trường hợp đo với id, cover, payload và fits (thông điệp vừa với ảnh)
+    """
+    for cover in covers:
+        width, height = COVER_SIZES[cover]
+        for mode in channels:
+            # Dung lượng tính với header mở rộng (luôn được dùng vì có checksum)
+            capacity = capacityBytes(width, height, bits_per_channel, COVER_CHANNELS[mode],
+                                     HEADER_PIXELS + EXTENDED_PIXELS)
+            for payload in payloads:
+                for kind in kinds:
+                    yield {
+                        "id": f"{cover}-{mode}-{payload}-{kind}",
+                        "cover": {"name": cover, "width": width, "height": height, "mode": mode,
+                                  "channels": COVER_CHANNELS[mode]},
+                        "payload": {"name": payload, "size": PAYLOAD_SIZES[payload], "kind": kind},
+                        "bits_per_channel": bits_per_channel,
+                        "fits": PAYLOAD_SIZES[payload] <= capacity,
+                        "capacity_bytes": capacity,
+                    }
+
+def measure(timer, name, function, *args, **kwargs):
+    """
+    Chạy một hàm và ghi thời gian, bộ nhớ đỉnh (RSS của tiến trình và phần cấp phát được tracemalloc theo dõi)
+    
+    tracemalloc làm chậm mọi phép cấp phát nên lần chạy đo thời gian không bật nó;
+    peak_traced_bytes lấy từ một lần chạy riêng ngay sau đó với cùng tham số.
+    
+    Args:
+        timer (StageTimer): Bộ đo của trường hợp hiện tại
+        name (str): Tên hàm trong kết quả
+        function (callable): Hàm cần đo
+        *args: Tham số của hàm
+        **kwargs: Tham số có tên của hàm
+        
+    Returns:
+        object: Giá trị trả về của hàm
+    """
+    with timer.stage(name), contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args, **kwargs)
+        timer.stages[-1]["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result
+
+def runCase(case, cover_path, message_path, repeat=1, codec="none"):
+    """
+    Chạy 5 bước cho một trường hợp trong thư mục tạm và đo các hàm chính
+    
+    Được gọi trong một tiến trình riêng (RSS đỉnh chỉ tính trường hợp này).
+    Các bước dùng đường dẫn tương đối nên tiến trình chuyển vào thư mục tạm.
+    
+    Args:
+        case (dict): Trường hợp từ benchCases
+        cover_path (str): Đường dẫn tuyệt đối của ảnh gốc đã sinh
+        message_path (str): Đường dẫn tuyệt đối của thông điệp đã sinh
+        repeat (int): Số lần đo mỗi hàm (giữ lần nhanh nhất)
+        codec (str): Codec nén ở bước 2 (mặc định none để độ dài thông điệp đúng bằng kích thước đo)
+        
+    Returns:
+        dict: Trường hợp kèm status, functions (số liệu từng hàm) và stages (các giai đoạn từ bước 5)
+    """
+    result = dict(case)
+    runs = {name: [] for name in BENCH_FUNCTIONS}
+    with tempfile.TemporaryDirectory(prefix="stego_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            for _ in range(repeat):
+                timer = StageTimer("bench")
+                pixels = measure(timer, "getPicture", getPicture, cover_path)
+                with open(message_path, 'r', encoding='utf-8') as f:
+                    message = f.read()
+                measure(timer, "textToBinary", textToBinary, message)
+                
+                # Các file trung gian của bước 1 và 2 không thuộc phần được đo
+                with contextlib.redirect_stdout(io.StringIO()):
+                    data = prepare_data(cover_path, message_path, "stego_data.json")[2]
+                    savePixels(pixels, "stego_pixels.bin", data['image_info']['sha256'])
+                    convert_message("stego_data.json", "stego_binary.json",
+                                    bits_per_channel=case['bits_per_channel'], codec=codec)
+                del pixels
+                
+                if not measure(timer, "embed_message", embed_message, "stego_binary.json", "stego_output.json"):
+                    raise ValueError("embed_message thất bại")
+                with open("stego_output.json", 'r', encoding='utf-8') as f:
+                    stego_image = json.load(f)['stego']['output_image']
+                if measure(timer, "extract_message", extract_message, stego_image, "extracted.txt",
+                           "stego_extract.json") is None:
+                    raise ValueError("extract_message thất bại")
+                report = measure(timer, "verify_steganography", verify_steganography, "stego_output.json",
+                                 "stego_extract.json", "stego_verification.json")
+                if report["status"] != "Success":
+                    raise ValueError(f"verify_steganography: {report['status']}")
+                for stage in timer.stages:
+                    runs[stage['stage']].append(stage)
+            result["status"] = "ok"
+            result["stages"] = report.get("performance", {}).get("timings", [])
+        except Exception as e:
+            result.update({"status": "error", "error": str(e)})
+        finally:
+            os.chdir(os.path.dirname(workdir))
+    
+    result["functions"] = {}
+    for name, samples in runs.items():
+        if samples:
+            best = min(samples, key=lambda stage: stage['wall_seconds'])
+            result["functions"][name] = {
+                "wall_seconds": best['wall_seconds'],
+                "cpu_seconds": best['cpu_seconds'],
+                "peak_rss_bytes": max(stage['peak_rss_bytes'] or 0 for stage in samples) or None,
+                "peak_traced_bytes": max(stage['peak_traced_bytes'] for stage in samples),
+                "repeat": len(samples),
+            }
+    return result
+
+def writeCover(path, case, seed=DEFAULT_SEED):
+    """Sinh và lưu ảnh gốc PNG của một trường hợp (nén nhanh, chỉ sinh một lần cho mỗi kích thước)"""
+    cover = case['cover']
+    if not os.path.exists(path):
+        image = syntheticCover(cover['width'], cover['height'], cover['channels'], seed)
+        if not cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, 1]):
+            raise IOError(f"Không thể lưu ảnh {path}")
+    return path
+
+def writeMessage(path, case, seed=DEFAULT_SEED):
+    """Sinh và lưu thông điệp của một trường hợp (chỉ sinh một lần cho mỗi kích thước và loại)"""
+    payload = case['payload']
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(syntheticText(payload['size'], payload['kind'], seed).encode('utf-8'))
+    return path
+
+def runSuite(cases, output_path=None, repeat=1, codec="none", seed=DEFAULT_SEED, workdir=None):
+    """
+    Chạy toàn bộ các trường hợp, mỗi trường hợp trong một tiến trình mới
+    
+    Args:
+        cases (list): Các trường hợp từ benchCases
+        output_path (str, optional): Đường dẫn file JSON kết quả
+        repeat (int): Số lần đo mỗi hàm
+        codec (str): Codec nén ở bước 2
+        seed (int): Seed sinh ảnh và thông điệp
+        workdir (str, optional): Thư mục lưu ảnh và thông điệp đã sinh (mặc định thư mục tạm)
+        
+    Returns:
+        dict: Kết quả gồm thông tin môi trường và danh sách trường hợp
+    """
+    results = {
+        "version": BENCH_VERSION,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {"repeat": repeat, "codec": codec, "seed": seed},
+        "cases": [],
+    }
+    spawn = get_context("spawn")
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="stego_bench_inputs_"))
+        os.makedirs(workdir, exist_ok=True)
+        for case in cases:
+            if not case['fits']:
+                print(f"- {case['id']:<28} bỏ qua (thông điệp lớn hơn dung lượng {case['capacity_bytes']} byte)")
+                results["cases"].append(dict(case, status="skipped"))
+                continue
+            cover = case['cover']
+            payload = case['payload']
+            cover_path = writeCover(os.path.join(os.path.abspath(workdir), f"{cover['name']}-{cover['mode']}.png"),
+                                    case, seed)
+            message_path = writeMessage(os.path.join(os.path.abspath(workdir),
+                                                     f"{payload['name']}-{payload['kind']}.txt"), case, seed)
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                result = executor.submit(runCase, case, cover_path, message_path, repeat, codec).result()
+            results["cases"].append(result)
+            if result["status"] == "ok":
+                times = "  ".join(f"{name} {values['wall_seconds']:.3f}s"
+                                  for name, values in result["functions"].items())
+                print(f"- {case['id']:<28} {times}")
+            else:
+                print(f"- {case['id']:<28} lỗi: {result['error']}")
+    
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+def compareResults(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    So sánh kết quả hiện tại với kết quả gốc theo từng trường hợp và từng hàm
+    
+    Thời gian bị coi là hồi quy khi chậm hơn threshold và ít nhất MIN_REGRESSION_SECONDS;
+    bộ nhớ được tracemalloc theo dõi khi tăng hơn threshold và ít nhất MIN_REGRESSION_BYTES.
+    
+    Args:
+        baseline (dict): Kết quả gốc từ runSuite
+        current (dict): Kết quả hiện tại từ runSuite
+        threshold (float): Tỷ lệ thay đổi cho phép (0.1 = 10%)
+        
+    Returns:
+        list: Mỗi phần tử gồm case, function, metric, baseline, current, change (tỷ lệ)
+    """
+    limits = {"wall_seconds": MIN_REGRESSION_SECONDS, "peak_traced_bytes": MIN_REGRESSION_BYTES}
+    previous = {case['id']: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in current.get("cases", []):
+        old = previous.get(case['id'])
+        if old is None or old.get("status") != "ok":
+            continue
+        if case.get("status") != "ok":
+            regressions.append({"case": case['id'], "function": None, "metric": "status",
+                                "baseline": old["status"], "current": case["status"], "change": None})
+            continue
+        for name, values in case["functions"].items():
+            old_values = old.get("functions", {}).get(name)
+            if not old_values:
+                continue
+            for metric, minimum in limits.items():
+                before, after = old_values.get(metric), values.get(metric)
+                if not before or after is None:
+                    continue
+                if after > before * (1 + threshold) and after - before >= minimum:
+                    regressions.append({"case": case['id'], "function": name, "metric": metric,
+                                        "baseline": before, "current": after, "change": after / before - 1})
+    return regressions
+
+def printRegressions(regressions, threshold):
+    """Hiển thị danh sách hồi quy"""
+    if not regressions:
+        print(f"Không có hồi quy (ngưỡng {threshold * 100:.0f}%) ✓")
+        return
+    print(f"Phát hiện {len(regressions)} hồi quy (ngưỡng {threshold * 100:.0f}%) ✗")
+    for item in regressions:
+        if item["metric"] == "status":
+            print(f"- {item['case']}: {item['baseline']} → {item['current']}")
+        else:
+            print(f"- {item['case']} {item['function']} {item['metric']}: "
+                  f"{item['baseline']:.4g} → {item['current']:.4g} (+{item['change'] * 100:.1f}%)")
+
+def _names(value, choices):
+    """Tách danh sách tên cách nhau bởi dấu phẩy và kiểm tra từng tên"""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in choices]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Không hỗ trợ {', '.join(unknown)} (chọn trong {', '.join(choices)})")
+    return names
+
+def _cmdRun(args):
+    """Lệnh 'run': chạy bộ đo và so sánh với kết quả gốc nếu có"""
+    covers = args.covers or (list(QUICK_COVERS) if args.quick else list(COVER_SIZES))
+    payloads = args.payloads or (list(QUICK_PAYLOADS) if args.quick else list(PAYLOAD_SIZES))
+    cases = list(benchCases(covers, payloads, args.channels, args.kinds, checkBitsPerChannel(args.bits_per_channel)))
+    print(f"Chạy {len(cases)} trường hợp, kết quả ghi vào: {args.output}")
+    results = runSuite(cases, args.output, args.repeat, args.codec, args.seed, args.workdir)
+    failed = sum(case["status"] == "error" for case in results["cases"])
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compareResults(baseline, results, args.threshold)
+        printRegressions(regressions, args.threshold)
+        failed += len(regressions)
+    return 0 if failed == 0 else 1
+
+def _cmdCompare(args):
+    """Lệnh 'compare': so sánh hai file kết quả đã có"""
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    regressions = compareResults(baseline, current, args.threshold)
+    printRegressions(regressions, args.threshold)
+    return 0 if not regressions else 1
+
+def buildParser():
+    """
+    Tạo bộ phân tích tham số dòng lệnh
+    
+    Returns:
+        argparse.ArgumentParser: Bộ phân tích với các lệnh run, compare
+    """
+    parser = argparse.ArgumentParser(description="Đo khả năng mở rộng của 5 bước giấu tin")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    cmd = commands.add_parser("run", help="Sinh ảnh, thông điệp và đo các bước")
+    cmd.add_argument("-o", "--output", default="stego_bench.json", help="File JSON kết quả")
+    cmd.add_argument("--covers", type=lambda value: _names(value, COVER_SIZES),
+                     help=f"Kích thước ảnh, cách nhau bởi dấu phẩy ({', '.join(COVER_SIZES)}; mặc định tất cả)")
+    cmd.add_argument("--payloads", type=lambda value: _names(value, PAYLOAD_SIZES),
+                     help=f"Kích thước thông điệp ({', '.join(PAYLOAD_SIZES)}; mặc định tất cả)")
+    cmd.add_argument("--channels", type=lambda value: _names(value, COVER_CHANNELS), default=list(COVER_CHANNELS),
+                     help=f"Số kênh của ảnh ({', '.join(COVER_CHANNELS)}; mặc định tất cả)")
+    cmd.add_argument("--kinds", type=lambda value: _names(value, PAYLOAD_WORDS), default=list(PAYLOAD_WORDS),
+                     help=f"Loại thông điệp ({', '.join(PAYLOAD_WORDS)}; mặc định tất cả)")
+    cmd.add_argument("--quick", action="store_true",
+                     help=f"Chỉ đo ảnh {', '.join(QUICK_COVERS)} và thông điệp {', '.join(QUICK_PAYLOADS)}")
+    cmd.add_argument("-b", "--bits-per-channel", type=int, default=BITS_PER_CHANNEL,
+                     help=f"Số bit LSB trên mỗi kênh (mặc định {BITS_PER_CHANNEL})")
+    cmd.add_argument("-c", "--codec", default="none", choices=list(CODECS),
+                     help="Codec nén ở bước 2 (mặc định none để độ dài thông điệp đúng bằng kích thước đo)")
+    cmd.add_argument("--repeat", type=int, default=1, help="Số lần đo mỗi hàm, giữ lần nhanh nhất")
+    cmd.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed sinh ảnh và thông điệp")
+    cmd.add_argument("--workdir", help="Giữ ảnh và thông điệp đã sinh trong thư mục này để dùng lại")
+    cmd.add_argument("--baseline", help="File kết quả gốc để phát hiện hồi quy")
+    cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help=f"Tỷ lệ chậm hơn cho phép (mặc định {DEFAULT_THRESHOLD})")
+    cmd.set_defaults(func=_cmdRun)
+    
+    cmd = commands.add_parser("compare", help="So sánh hai file kết quả")
+    cmd.add_argument("baseline", help="File kết quả gốc")
+    cmd.add_argument("current", help="File kết quả hiện tại")
+    cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help=f"Tỷ lệ chậm hơn cho phép (mặc định {DEFAULT_THRESHOLD})")
+    cmd.set_defaults(func=_cmdCompare)
+    return parser
+
+def main(argv=None):
+    """
+    Hàm chính
+    """
+    args = buildParser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (IOError, ValueError) as e:
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
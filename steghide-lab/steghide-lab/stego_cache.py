@@ -0,0 +1,254 @@
+"""
+Bộ nhớ đệm trên đĩa cho ảnh gốc đã giải mã và ảnh đã giấu tin
+
+Chức năng:
+    - Lưu ảnh gốc đã giải mã dưới dạng file pixel trung gian (memory map được), khóa theo SHA-256 của ảnh
+    - Lưu ảnh đã giấu tin, khóa theo SHA-256 của ảnh gốc, của thông điệp và các thiết lập
+    - Giới hạn tổng dung lượng, xóa các mục dùng lâu nhất trước (LRU theo thời gian sửa file)
+    - Đếm số lần trúng/trượt để ghi vào JSON của từng bước
+
+Biến môi trường:
+    STEGO_CACHE_DIR: Thư mục bộ nhớ đệm (mặc định ~/.cache/stego)
+    STEGO_CACHE_MB: Dung lượng tối đa (MB), 0 để tắt bộ nhớ đệm
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+# Loại mục trong bộ nhớ đệm (mỗi loại một thư mục con)
+CACHE_PIXELS = "pixels"
+CACHE_OUTPUTS = "outputs"
+CACHE_KINDS = (CACHE_PIXELS, CACHE_OUTPUTS)
+
+CACHE_DIR_ENV = "STEGO_CACHE_DIR"
+CACHE_SIZE_ENV = "STEGO_CACHE_MB"
+DEFAULT_CACHE_MB = 1024
+
+# Tiền tố của file đang ghi dở (không được tính là mục)
+TEMP_PREFIX = ".tmp-"
+
+def defaultCacheDir():
+    """
+    Thư mục bộ nhớ đệm mặc định
+    
+    Returns:
+        str: STEGO_CACHE_DIR nếu có, ngược lại $XDG_CACHE_HOME/stego hoặc ~/.cache/stego
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stego")
+
+def cacheKey(*parts):
+    """
+    Tạo khóa của một mục từ các thành phần (chuỗi, số hoặc dict thiết lập)
+    
+    Args:
+        *parts: Các thành phần của khóa, phải chuyển được sang JSON
+        
+    Returns:
+        str: SHA-256 dạng hex
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+def pixelsKey(cover_hash, decode="unchanged"):
+    """
+    Khóa của ảnh gốc đã giải mã
+    
+    Args:
+        cover_hash (str): SHA-256 của file ảnh gốc
+        decode (str): Cách giải mã ảnh (unchanged: giữ nguyên số kênh như PixelBuffer.fromFile)
+        
+    Returns:
+        str: Khóa của mục
+    """
+    return cacheKey(CACHE_PIXELS, cover_hash, decode)
+
+def outputKey(cover_hash, payload_hash, settings):
+    """
+    Khóa của ảnh đã giấu tin
+    
+    Args:
+        cover_hash (str): SHA-256 của file ảnh gốc
+        payload_hash (str): SHA-256 của dữ liệu được giấu (sau khi nén)
+        settings (dict): Các thiết lập ảnh hưởng đến file kết quả (số bit, codec, khóa, chế độ lưu, ...)
+        
+    Returns:
+        str: Khóa của mục
+    """
+    return cacheKey(CACHE_OUTPUTS, cover_hash, payload_hash, settings)
+
+class StegoCache:
+    """
+    Bộ nhớ đệm trên đĩa với giới hạn dung lượng và loại bỏ theo LRU
+    
+    Mỗi mục là một file tên theo khóa trong thư mục con của loại mục. Mục được
+    ghi vào file tạm rồi đổi tên nên các tiến trình chạy song song không đọc
+    phải mục ghi dở. Mục bị trúng được cập nhật thời gian sửa để đánh dấu vừa dùng.
+    """
+    
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Args:
+            directory (str, optional): Thư mục bộ nhớ đệm (mặc định defaultCacheDir())
+            max_bytes (int, optional): Dung lượng tối đa (mặc định STEGO_CACHE_MB hoặc DEFAULT_CACHE_MB), 0 để tắt
+        """
+        self.directory = directory or defaultCacheDir()
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(CACHE_SIZE_ENV, DEFAULT_CACHE_MB)) * (1 << 20))
+        self.max_bytes = max_bytes
+        self.stats = {kind: {"hits": 0, "misses": 0, "stores": 0, "evictions": 0} for kind in CACHE_KINDS}
+    
+    @property
+    def enabled(self):
+        """Bộ nhớ đệm có được dùng không"""
+        return self.max_bytes > 0
+    
+    def path(self, kind, key):
+        """Đường dẫn file của một mục"""
+        return os.path.join(self.directory, kind, key)
+    
+    def lookup(self, kind, key):
+        """
+        Tìm một mục và đếm trúng/trượt
+        
+        Args:
+            kind (str): Loại mục trong CACHE_KINDS
+            key (str): Khóa của mục
+            
+        Returns:
+            str: Đường dẫn file của mục, None nếu không có
+        """
+        if not self.enabled:
+            return None
+        path = self.path(kind, key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.stats[kind]["misses"] += 1
+            return None
+        self.stats[kind]["hits"] += 1
+        return path
+    
+    def copy(self, kind, key, destination):
+        """
+        Chép một mục ra file khác (không đếm trúng/trượt, dùng sau lookup)
+        
+        Args:
+            kind (str): Loại mục
+            key (str): Khóa của mục
+            destination (str): File đích
+            
+        Returns:
+            bool: True nếu đã chép, False nếu mục không còn
+        """
+        if not self.enabled:
+            return False
+        try:
+            shutil.copyfile(self.path(kind, key), destination)
+        except FileNotFoundError:
+            return False
+        return True
+    
+    def store(self, kind, key, source):
+        """
+        Chép một file vào bộ nhớ đệm rồi loại bỏ các mục cũ nếu vượt dung lượng
+        
+        Args:
+            kind (str): Loại mục
+            key (str): Khóa của mục
+            source (str): File cần lưu
+            
+        Returns:
+            str: Đường dẫn file của mục, None nếu bộ nhớ đệm tắt, file lớn hơn dung lượng hoặc không ghi được
+        """
+        if not self.enabled or os.path.getsize(source) > self.max_bytes:
+            return None
+        folder = os.path.join(self.directory, kind)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, temp = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=folder)
+            os.close(fd)
+            try:
+                shutil.copyfile(source, temp)
+                os.replace(temp, self.path(kind, key))
+            except BaseException:
+                os.unlink(temp)
+                raise
+        except OSError as e:
+            print(f"Cảnh báo: Không ghi được bộ nhớ đệm {folder}: {e}")
+            return None
+        self.stats[kind]["stores"] += 1
+        self.evict()
+        return self.path(kind, key)
+    
+    def entries(self):
+        """
+        Liệt kê các mục của mọi loại
+        
+        Returns:
+            list: (thời gian sửa, kích thước, loại, đường dẫn), mục dùng lâu nhất đứng trước
+        """
+        entries = []
+        for kind in CACHE_KINDS:
+            try:
+                with os.scandir(os.path.join(self.directory, kind)) as it:
+                    for entry in it:
+                        if entry.is_file() and not entry.name.startswith(TEMP_PREFIX):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, stat.st_size, kind, entry.path))
+            except FileNotFoundError:
+                continue
+        return sorted(entries)
+    
+    def evict(self):
+        """
+        Xóa các mục dùng lâu nhất cho đến khi tổng dung lượng không vượt giới hạn
+        
+        Returns:
+            int: Số mục đã xóa
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _, _ in entries)
+        removed = 0
+        for _, size, kind, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            self.stats[kind]["evictions"] += 1
+        return removed
+    
+    def report(self):
+        """
+        Số liệu của bộ nhớ đệm để ghi vào JSON của bước
+        
+        Returns:
+            dict: directory, max_bytes và số lần trúng/trượt của các loại mục đã dùng
+        """
+        report = {"directory": self.directory, "max_bytes": self.max_bytes, "enabled": self.enabled}
+        for kind, counts in self.stats.items():
+            if any(counts.values()):
+                report[kind] = dict(counts)
+        return report
+    
+    def attach(self, data, step):
+        """
+        Ghi số liệu vào dữ liệu JSON của bước (data['cache'][tên bước])
+        
+        Args:
+            data (dict): Dữ liệu JSON của bước
+            step (str): Tên bước (prepare, embed, ...)
+            
+        Returns:
+            dict: Dữ liệu đã thêm số liệu
+        """
+        data.setdefault('cache', {})[step] = self.report()
+        return data
@@ -0,0 +1,254 @@
+"""
+Tính khả năng chứa thông điệp của ảnh chỉ từ header của file
+
+Chức năng:
+    - Đọc kích thước ảnh từ header PNG, BMP, JPEG, PPM/PGM và IFD đầu tiên của TIFF mà không giải mã ảnh
+    - Suy ra số kênh mà PixelBuffer.fromFile sẽ dùng (cùng quy tắc loadedChannels)
+    - Đọc kích thước từ header của file pixel trung gian (stego_pixels.bin)
+    - Tính số byte thông điệp tối đa cho một số bit LSB trên mỗi kênh
+"""
+
+import struct
+
+from stego_engine import (BITS_PER_CHANNEL, CHANNELS, HEADER_PIXELS, MAX_EXTENDED_LENGTH, MAX_MESSAGE_LENGTH,
+                          carrierGroups, checkBitsPerChannel)
+from stego_pixels import PIXELS_MAGIC, loadedChannels, readPixelsHeader
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Số kênh cv2 giải mã theo color type của PNG (palette thành 3 kênh, xám có alpha thành 4 kênh)
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 4, 6: 4}
+
+# Color type PNG được cv2 giải mã thêm kênh alpha khi có chunk tRNS (màu và palette)
+PNG_TRNS_ALPHA = (2, 3)
+
+# BMP 32 bit có mặt nạ kênh (BI_BITFIELDS, BI_ALPHABITFIELDS) được cv2 giải mã thành 4 kênh
+BMP_BITFIELDS = (3, 6)
+
+# Các thẻ TIFF về kích thước, độ sâu và cách biểu diễn màu
+TIFF_WIDTH = 256
+TIFF_HEIGHT = 257
+TIFF_BITS_PER_SAMPLE = 258
+TIFF_PHOTOMETRIC = 262
+TIFF_SAMPLES_PER_PIXEL = 277
+
+# Kích thước (byte) theo kiểu dữ liệu TIFF: BYTE, ASCII, SHORT, LONG
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4}
+
+# PhotometricInterpretation: ảnh xám (WhiteIsZero, BlackIsZero) và ảnh bảng màu
+TIFF_GRAY_PHOTOMETRIC = (0, 1)
+TIFF_PALETTE = 3
+
+# Các marker SOF của JPEG chứa kích thước ảnh (trừ DHT, JPG, DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def _readPngSize(f):
+    """Đọc kích thước từ chunk IHDR của PNG, tìm chunk tRNS trong các chunk trước IDAT"""
+    f.seek(len(PNG_SIGNATURE))
+    length, chunk_type = struct.unpack('>I4s', f.read(8))
+    if chunk_type != b'IHDR':
+        raise ValueError("File PNG không có chunk IHDR")
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', f.read(10))
+    channels = PNG_CHANNELS.get(color_type, 3)
+    if color_type in PNG_TRNS_ALPHA:
+        f.seek(len(PNG_SIGNATURE) + 8 + length + 4)
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            length, chunk_type = struct.unpack('>I4s', chunk)
+            if chunk_type in (b'IDAT', b'IEND'):
+                break
+            if chunk_type == b'tRNS':
+                channels = 4
+                break
+            f.seek(length + 4, 1)
+    # Ảnh 1, 2, 4 bit được cv2 mở rộng thành 8 bit
+    return width, height, channels, 16 if bit_depth == 16 else 8
+
+def _readBmpSize(f):
+    """Đọc kích thước từ header DIB của BMP, xét bảng màu để biết ảnh xám hay màu"""
+    f.seek(14)
+    (dib_size,) = struct.unpack('<I', f.read(4))
+    compression = colors_used = 0
+    if dib_size == 12:
+        width, height, _, bit_count = struct.unpack('<HHHH', f.read(8))
+    else:
+        width, height, _, bit_count, compression = struct.unpack('<iiHHI', f.read(16))
+        f.seek(14 + 32)
+        (colors_used,) = struct.unpack('<I', f.read(4))
+    if bit_count == 32:
+        channels = 4 if compression in BMP_BITFIELDS else 3
+    elif bit_count <= 8:
+        # cv2 chỉ giải mã thành ảnh xám khi mọi màu trong bảng màu đều xám
+        entry = 3 if dib_size == 12 else 4
+        count = min(colors_used or 1 << bit_count, 1 << bit_count)
+        f.seek(14 + dib_size)
+        palette = f.read(count * entry)
+        colors = [palette[i:i + 3] for i in range(0, len(palette) - entry + 1, entry)]
+        channels = 1 if all(b == g == r for b, g, r in colors) else 3
+    else:
+        channels = 3
+    return width, abs(height), channels, 8
+
+def _readJpegSize(f):
+    """Duyệt các marker JPEG đến khi gặp SOF (ảnh CMYK được cv2 chuyển thành 3 kênh)"""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("Không tìm thấy marker SOF trong file JPEG")
+        # Bỏ qua các byte đệm 0xFF giữa các marker
+        while marker[1] == 0xFF:
+            marker = marker[1:] + f.read(1)
+        (length,) = struct.unpack('>H', f.read(2))
+        if marker[1] in JPEG_SOF_MARKERS:
+            precision, height, width, components = struct.unpack('>BHHB', f.read(6))
+            return width, height, 1 if components == 1 else 3, 8 if precision <= 8 else 16
+        f.seek(length - 2, 1)
+
+def _readPnmSize(f):
+    """Đọc kích thước và giá trị lớn nhất từ header văn bản của PPM/PGM"""
+    f.seek(0)
+    magic = f.read(2)
+    fields = []
+    token = b''
+    while len(fields) < 3:
+        c = f.read(1)
+        if not c:
+            raise ValueError("Header PPM/PGM không hợp lệ")
+        if c == b'#':
+            f.readline()
+        elif c.isspace():
+            if token:
+                fields.append(int(token))
+                token = b''
+        else:
+            token += c
+    return fields[0], fields[1], 1 if magic == b'P5' else 3, 8 if fields[2] < 256 else 16
+
+def readTiffTags(f):
+    """
+    Đọc các thẻ kiểu BYTE, ASCII, SHORT, LONG trong IFD đầu tiên của TIFF
+    
+    Args:
+        f (file): File TIFF mở ở chế độ nhị phân
+        
+    Returns:
+        dict: Giá trị (tuple) theo mã thẻ, None nếu không phải TIFF
+    """
+    f.seek(0)
+    order = {b'II': '<', b'MM': '>'}.get(f.read(2))
+    if order is None:
+        return None
+    magic, ifd = struct.unpack(order + 'HI', f.read(6))
+    if magic != 42:
+        return None
+    f.seek(ifd)
+    (count,) = struct.unpack(order + 'H', f.read(2))
+    tags = {}
+    for _ in range(count):
+        tag, kind, n, value = struct.unpack(order + 'HHI4s', f.read(12))
+        size = TIFF_TYPE_SIZES.get(kind)
+        if size is None:
+            continue
+        fmt = order + {1: 'B', 2: 'B', 3: 'H', 4: 'I'}[kind] * n
+        if size * n <= 4:
+            tags[tag] = struct.unpack(fmt, value[:size * n])
+        else:
+            here = f.tell()
+            f.seek(struct.unpack(order + 'I', value)[0])
+            tags[tag] = struct.unpack(fmt, f.read(size * n))
+            f.seek(here)
+    return tags
+
+def _readTiffSize(f):
+    """Đọc kích thước từ IFD đầu tiên của TIFF (ảnh xám 1 kênh, bảng màu 3 kênh, còn lại theo SamplesPerPixel)"""
+    tags = readTiffTags(f)
+    if not tags or TIFF_WIDTH not in tags or TIFF_HEIGHT not in tags:
+        raise ValueError("IFD của file TIFF không có kích thước ảnh")
+    samples = tags.get(TIFF_SAMPLES_PER_PIXEL, (1,))[0]
+    bit_depth = tags.get(TIFF_BITS_PER_SAMPLE, (1,))[0]
+    photometric = tags.get(TIFF_PHOTOMETRIC, (1,))[0]
+    if photometric in TIFF_GRAY_PHOTOMETRIC:
+        # cv2 bỏ kênh alpha của ảnh xám
+        channels = 1
+    elif photometric == TIFF_PALETTE:
+        channels = 1 if bit_depth == 1 else 3
+    else:
+        channels = min(samples, 4)
+    # Ảnh 1 bit và bảng màu 4 bit được cv2 mở rộng thành 8 bit
+    return tags[TIFF_WIDTH][0], tags[TIFF_HEIGHT][0], channels, max(bit_depth, 8)
+
+def readImageSize(filename):
+    """
+    Đọc kích thước ảnh chỉ từ header của file
+    
+    Args:
+        filename (str): Đường dẫn ảnh (PNG, BMP, JPEG, PPM/PGM, TIFF) hoặc file pixel trung gian
+        
+    Returns:
+        tuple: (width, height, channels) của ảnh gốc, channels là số kênh sau PixelBuffer.fromFile
+    """
+    with open(filename, 'rb') as f:
+        head = f.read(8)
+        if head == PIXELS_MAGIC:
+            shape = readPixelsHeader(filename)['shape']
+            return shape[1], shape[0], shape[2] if len(shape) > 2 else 1
+        if head == PNG_SIGNATURE:
+            reader = _readPngSize
+        elif head[:2] == b'BM':
+            reader = _readBmpSize
+        elif head[:2] == b'\xff\xd8':
+            reader = _readJpegSize
+        elif head[:2] in (b'P5', b'P6'):
+            reader = _readPnmSize
+        elif head[:4] in (b'II*\x00', b'MM\x00*'):
+            reader = _readTiffSize
+        else:
+            raise ValueError(f"Không nhận dạng được định dạng ảnh của {filename}")
+        width, height, channels, bit_depth = reader(f)
+    return width, height, loadedChannels(channels, bit_depth)
+
+def capacityBytes(width, height, bits_per_channel=BITS_PER_CHANNEL, channels=CHANNELS, header_pixels=HEADER_PIXELS):
+    """
+    Tính số byte thông điệp tối đa có thể giấu vào ảnh
+    
+    Args:
+        width (int): Chiều rộng ảnh
+        height (int): Chiều cao ảnh
+        bits_per_channel (int): Số bit LSB dùng trên mỗi kênh
+        channels (int): Số kênh của ảnh (1, 3 hoặc 4), mọi kênh đều dùng để giấu tin
+        header_pixels (int): Số nhóm 3 kênh của header, bằng số pixel với ảnh 3 kênh
+            (lớn hơn HEADER_PIXELS nếu dùng header mở rộng)
+        
+    Returns:
+        int: Số byte tối đa (0 nếu ảnh không đủ chỗ cho header), không vượt quá
+            độ dài lớn nhất mà header ghi được
+    """
+    payload_pixels = carrierGroups(width * height, channels) - header_pixels
+    if payload_pixels <= 0:
+        return 0
+    capacity = payload_pixels * checkBitsPerChannel(bits_per_channel) * CHANNELS // 8
+    return min(capacity, MAX_MESSAGE_LENGTH if header_pixels == HEADER_PIXELS else MAX_EXTENDED_LENGTH)
+
+def imageCapacity(filename, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Báo cáo khả năng chứa thông điệp của ảnh mà không giải mã ảnh
+    
+    Args:
+        filename (str): Đường dẫn ảnh hoặc file pixel trung gian
+        bits_per_channel (int): Số bit LSB dùng trên mỗi kênh
+        
+    Returns:
+        dict: width, height, channels, pixel_count, bits_per_channel, capacity_bytes
+    """
+    width, height, channels = readImageSize(filename)
+    return {
+        "width": width,
+        "height": height,
+        "channels": channels,
+        "pixel_count": width * height,
+        "bits_per_channel": bits_per_channel,
+        "capacity_bytes": capacityBytes(width, height, bits_per_channel, channels),
+    }
@@ -0,0 +1,152 @@
+"""
+Nén thông điệp trước khi giấu để giảm số pixel bị sửa
+
+Chức năng:
+    - Chọn codec cho thông điệp: không nén, zlib, lzma hoặc tự động chọn kết quả nhỏ nhất
+    - Mã codec được ghi vào header mở rộng của ảnh
+    - Giải nén theo luồng từng khối, không giữ hai bản đầy đủ trong bộ nhớ
+"""
+
+import lzma
+import zlib
+
+from stego_engine import CODEC_NONE
+
+# Mã codec ghi trong header mở rộng
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+CODEC_NAMES = {code: name for name, code in CODECS.items()}
+CODEC_AUTO = "auto"
+
+# Kích thước khối đầu vào/đầu ra khi giải nén theo luồng
+STREAM_CHUNK = 1 << 20
+
+def compressPayload(data, codec=CODEC_AUTO):
+    """
+    Nén thông điệp bằng codec đã chọn
+    
+    Ở chế độ tự động, thông điệp chỉ được nén khi kết quả nhỏ hơn thông điệp
+    gốc (header mở rộng luôn được dùng vì có checksum).
+    
+    Args:
+        data (bytes | numpy.ndarray): Thông điệp dạng byte
+        codec (str): Tên codec trong CODECS hoặc "auto"
+        
+    Returns:
+        tuple: (mã codec, dữ liệu đã nén dạng bytes hoặc dữ liệu gốc nếu không nén)
+    """
+    if codec != CODEC_AUTO and codec not in CODECS:
+        raise ValueError(f"Không hỗ trợ codec {codec}")
+    candidates = []
+    if codec in (CODEC_AUTO, "zlib"):
+        candidates.append((CODEC_ZLIB, zlib.compress(data, 9)))
+    if codec in (CODEC_AUTO, "lzma"):
+        candidates.append((CODEC_LZMA, lzma.compress(data)))
+    if codec == "none" or (codec == CODEC_AUTO and
+                           min(len(c) for _, c in candidates) >= len(data)):
+        return CODEC_NONE, data
+    return min(candidates, key=lambda candidate: len(candidate[1]))
+
+def _iterChunks(data, codec, chunk_size):
+    """Các khối giải nén thô của data, chưa kiểm tra độ dài"""
+    view = memoryview(data)
+    try:
+        if codec == CODEC_NONE:
+            for start in range(0, len(view), chunk_size):
+                yield view[start:start + chunk_size]
+        elif codec == CODEC_ZLIB:
+            decompressor = zlib.decompressobj()
+            for start in range(0, len(view), chunk_size):
+                block = view[start:start + chunk_size]
+                while block:
+                    chunk = decompressor.decompress(block, chunk_size)
+                    if chunk:
+                        yield chunk
+                    block = decompressor.unconsumed_tail
+            chunk = decompressor.flush()
+            if chunk:
+                yield chunk
+        elif codec == CODEC_LZMA:
+            decompressor = lzma.LZMADecompressor()
+            for start in range(0, len(view), chunk_size):
+                chunk = decompressor.decompress(view[start:start + chunk_size], chunk_size)
+                while True:
+                    if chunk:
+                        yield chunk
+                    if decompressor.eof or decompressor.needs_input:
+                        break
+                    chunk = decompressor.decompress(b'', chunk_size)
+        else:
+            raise ValueError(f"Không hỗ trợ mã codec {codec}")
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Không giải nén được thông điệp ({CODEC_NAMES.get(codec, codec)}): {e}") from e
+
+def iterDecompress(data, codec, original_length=None, chunk_size=STREAM_CHUNK):
+    """
+    Giải nén thông điệp theo từng khối
+    
+    Args:
+        data (bytes): Dữ liệu đã nén
+        codec (int): Mã codec đọc từ header
+        original_length (int, optional): Độ dài gốc đọc từ header; khi không nén, các byte
+            bù ở cuối bị cắt bỏ, khi có nén, độ dài khác header gây lỗi ngay khi vượt quá
+        chunk_size (int): Kích thước tối đa của mỗi khối đầu vào và đầu ra
+        
+    Yields:
+        bytes | memoryview: Các khối thông điệp đã giải nén (khi không nén là các lát cắt của data)
+    """
+    if codec == CODEC_NONE and original_length is not None:
+        data = memoryview(data)[:original_length]
+    written = 0
+    for chunk in _iterChunks(data, codec, chunk_size):
+        written += len(chunk)
+        if codec != CODEC_NONE and original_length is not None and written > original_length:
+            raise ValueError(f"Độ dài sau giải nén vượt quá header ({original_length})")
+        yield chunk
+    if codec != CODEC_NONE and original_length is not None and written != original_length:
+        raise ValueError(f"Độ dài sau giải nén ({written}) khác header ({original_length})")
+
+def decompressPayload(data, codec, original_length=None):
+    """
+    Giải nén toàn bộ thông điệp vào một bộ đệm
+    
+    Dùng khi thông điệp cần nằm trong bộ nhớ; khi ghi ra file, dùng decompressToFile.
+    
+    Args:
+        data (bytes): Dữ liệu đã nén
+        codec (int): Mã codec đọc từ header
+        original_length (int, optional): Độ dài gốc đọc từ header, dùng để kiểm tra
+            (khi không nén, các byte bù ở cuối vượt quá độ dài gốc bị cắt bỏ)
+        
+    Returns:
+        bytes | bytearray: Thông điệp gốc (bộ đệm giải nén được trả về trực tiếp, không sao chép)
+    """
+    if codec == CODEC_NONE:
+        if original_length is None or len(data) <= original_length:
+            return data
+        return data[:original_length]
+    output = bytearray()
+    for chunk in iterDecompress(data, codec, original_length):
+        output += chunk
+    return output
+
+def decompressToFile(data, codec, filename, original_length=None):
+    """
+    Giải nén thông điệp thẳng ra file theo từng khối
+    
+    Args:
+        data (bytes): Dữ liệu đã nén
+        codec (int): Mã codec đọc từ header
+        filename (str): File đầu ra
+        original_length (int, optional): Độ dài gốc đọc từ header (xem iterDecompress)
+        
+    Returns:
+        int: Số byte đã ghi
+    """
+    written = 0
+    with open(filename, 'wb') as f:
+        for chunk in iterDecompress(data, codec, original_length):
+            f.write(chunk)
+            written += len(chunk)
+    return written
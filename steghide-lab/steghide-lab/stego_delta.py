@@ -0,0 +1,200 @@
+"""
+Cập nhật thông điệp trong ảnh đã giấu tin bằng cách chỉ sửa các pixel thay đổi
+
+Chức năng:
+    - Bù byte 0 vào cuối thông điệp để luồng bit không có bit bù ở đầu, nhờ đó
+      thêm dòng vào cuối thông điệp không làm lệch các bit phía trước
+    - So sánh luồng bit mới với các bit LSB hiện có trong ảnh theo từng khối
+    - Chỉ ghi lại header và các pixel khác nhau, trên mảng ảnh hoặc trực tiếp trên file không nén
+"""
+
+import json
+import mmap
+import os
+
+import numpy as np
+
+from stego_capacity import capacityBytes
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, CODEC_NONE, bitsToSymbols, carrierPixels,
+                          embedBits, groupsToPixels, headerBits, imageChannels, lsbMask, payloadChecksum,
+                          payloadPadding)
+from stego_inplace import readRasterPixels, writeRasterPixels
+from stego_scatter import scatterKeys, scatterPositions
+from stego_tiled import payloadBits
+
+# Số pixel thông điệp được so sánh trong mỗi khối
+DELTA_CHUNK = 1 << 20
+
+def previousOutput(output_info="stego_output.json"):
+    """
+    Ảnh đã giấu tin của lần chạy trước, dùng để hỏi có cập nhật ảnh này không
+    
+    Args:
+        output_info (str): File thông tin do bước 3 ghi
+        
+    Returns:
+        str: Đường dẫn ảnh đã giấu tin nếu còn tồn tại, None nếu chưa có
+    """
+    if not os.path.exists(output_info):
+        return None
+    with open(output_info, 'r', encoding='utf-8') as f:
+        previous = json.load(f).get('stego', {}).get('output_image')
+    return previous if previous and os.path.exists(previous) else None
+
+def alignPayload(data, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Bù byte 0 vào cuối thông điệp để số bit là bội số của số bit mỗi pixel
+    
+    Khi đó embedBytes không cần bù bit 0 ở đầu, nên byte thứ i luôn nằm ở cùng
+    vị trí pixel dù thông điệp dài thêm hay ngắn đi.
+    
+    Args:
+        data (bytes): Thông điệp gốc
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        bytes: Thông điệp đã bù (dài hơn tối đa 8 byte)
+    """
+    extra = 0
+    while payloadPadding(len(data) + extra, bits_per_channel):
+        extra += 1
+    return bytes(data) + bytes(extra)
+
+def deltaPayload(data, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Chuẩn bị thông điệp và header cho chế độ cập nhật (không nén, bù byte ở cuối)
+    
+    Header mở rộng ghi độ dài đã bù và độ dài gốc; bước 4 cắt bỏ các byte bù
+    theo độ dài gốc.
+    
+    Args:
+        data (bytes): Thông điệp gốc
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        tuple: (dữ liệu đã bù, header từ headerBits có checksum)
+    """
+    stored = alignPayload(data, bits_per_channel)
+    return stored, headerBits(len(stored), bits_per_channel, CODEC_NONE, len(data), payloadChecksum(stored))
+
+def deltaEmbed(image, payload, bits_per_channel=BITS_PER_CHANNEL, header=None, key=None, changed=None):
+    """
+    Giấu header và thông điệp vào ảnh đã giấu tin, chỉ sửa các pixel có bit LSB khác
+    
+    Kết quả giống hệt embedBytes (hoặc embedScattered nếu có khóa) trên cùng
+    ảnh, nhưng chỉ các pixel thực sự thay đổi bị ghi.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh), được sửa trực tiếp
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte (nên dùng deltaPayload)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        key (str, optional): Khóa rải thông điệp (giống khi giấu)
+        changed (list, optional): Nếu có, các mảng chỉ số nhóm kênh đã sửa được thêm vào danh sách này
+        
+    Returns:
+        dict: pixels_compared, pixels_changed, header_pixels_changed, channels_changed
+            (tính theo pixel và kênh thực của ảnh, không theo nhóm 3 kênh)
+    """
+    payload = np.frombuffer(payload, dtype=np.uint8)
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    flat = carrierPixels(image)
+    start_pixel = len(header) // BITS_PER_PIXEL
+    domain = len(flat) - start_pixel
+    bits_per_pixel = bits_per_channel * CHANNELS
+    padding = payloadPadding(len(payload), bits_per_channel)
+    num_pixels = (padding + len(payload) * 8) // bits_per_pixel
+    if num_pixels > domain:
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp")
+    channels = imageChannels(image)
+    offsets = np.arange(CHANNELS)
+    stats = {"pixels_compared": groupsToPixels(start_pixel + num_pixels, channels), "pixels_changed": 0,
+             "header_pixels_changed": 0, "channels_changed": 0}
+    changed_pixels = []
+    
+    def apply(positions, current, target):
+        # Nhóm kênh không trùng với pixel khi ảnh xám hoặc có kênh alpha, nên
+        # các kênh bị sửa được quy về chỉ số pixel thực của ảnh
+        differ = target != current
+        rows = np.flatnonzero(differ.any(axis=1))
+        flat[positions[rows]] = target[rows]
+        samples = (positions[rows, None] * CHANNELS + offsets)[differ[rows]]
+        pixels = np.unique(samples // channels)
+        stats["channels_changed"] += len(samples)
+        changed_pixels.append(pixels)
+        if changed is not None and len(rows):
+            changed.append(positions[rows])
+        return len(pixels)
+    
+    # Header luôn nằm ở các pixel đầu theo thứ tự
+    target = np.array(flat[:start_pixel])
+    embedBits(target.reshape(1, -1, CHANNELS), header)
+    stats["header_pixels_changed"] = apply(np.arange(start_pixel), flat[:start_pixel], target)
+    
+    keys = scatterKeys(key) if key else None
+    mask = lsbMask(bits_per_channel)
+    for start in range(0, num_pixels, DELTA_CHUNK):
+        stop = min(start + DELTA_CHUNK, num_pixels)
+        if key:
+            positions = start_pixel + scatterPositions(keys, domain, start, stop)
+        else:
+            positions = np.arange(start_pixel + start, start_pixel + stop)
+        current = flat[positions]
+        bits = payloadBits(payload, padding, start * bits_per_pixel, stop * bits_per_pixel)
+        apply(positions, current, (current & mask) | bitsToSymbols(bits, bits_per_channel))
+    stats["pixels_changed"] = len(np.unique(np.concatenate(changed_pixels)))
+    return stats
+
+def changedRuns(indices):
+    """
+    Gộp các chỉ số pixel đã sửa thành các đoạn liên tiếp
+    
+    Args:
+        indices (numpy.ndarray): Chỉ số pixel tăng dần
+        
+    Returns:
+        list: Các cặp (pixel đầu, pixel cuối không bao gồm)
+    """
+    if len(indices) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    starts = np.concatenate([[0], breaks])
+    stops = np.concatenate([breaks, [len(indices)]])
+    return [(int(indices[a]), int(indices[b - 1]) + 1) for a, b in zip(starts, stops)]
+
+def deltaEmbedRaster(filename, layout, payload, bits_per_channel=BITS_PER_CHANNEL, header=None):
+    """
+    Cập nhật trực tiếp file ảnh không nén (BMP, PPM, TIFF) đã giấu tin
+    
+    Chỉ các pixel của header và thông điệp được đọc, chỉ các đoạn pixel thay
+    đổi được ghi lại vào file; không giải mã hay mã hóa lại ảnh.
+    
+    Args:
+        filename (str): Ảnh đã giấu tin, được sửa trực tiếp
+        layout (dict): Vị trí dữ liệu pixel từ readRasterLayout
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte (nên dùng deltaPayload)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        dict: Số liệu như deltaEmbed, thêm runs (số đoạn đã ghi) và bytes_patched
+    """
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    header_pixels = len(header) // BITS_PER_PIXEL
+    capacity = capacityBytes(layout['width'], layout['height'], bits_per_channel, header_pixels=header_pixels)
+    if len(payload) > capacity:
+        raise ValueError(f"Ảnh không đủ lớn để chứa thông điệp ({len(payload)} > {capacity} byte)")
+    num_bits = payloadPadding(len(payload), bits_per_channel) + len(payload) * 8
+    num_pixels = header_pixels + num_bits // (bits_per_channel * CHANNELS)
+    
+    changed = []
+    with open(filename, 'r+b') as f, mmap.mmap(f.fileno(), 0) as buffer:
+        region = readRasterPixels(buffer, layout, 0, num_pixels)
+        stats = deltaEmbed(region, payload, bits_per_channel, header, changed=changed)
+        runs = changedRuns(np.concatenate(changed)) if changed else []
+        for start, stop in runs:
+            writeRasterPixels(buffer, layout, start, region[0, start:stop])
+    stats.update({"runs": len(runs), "bytes_patched": stats["pixels_changed"] * CHANNELS})
+    return stats
@@ -0,0 +1,469 @@
+"""
+Bộ máy giấu tin LSB vectơ hóa
+
+Chức năng:
+    - Chuyển luồng bit thành các giá trị 1–4 bit cho từng kênh màu và ngược lại
+    - Giấu header độ dài và thông điệp vào toàn bộ mảng ảnh bằng các phép toán trên mảng
+    - Dùng mọi kênh của ảnh: ảnh xám (1 kênh), màu (3 kênh) hoặc có kênh alpha (4 kênh)
+    - Trích xuất header và đúng số pixel chứa thông điệp bằng các phép toán trên mảng
+    - Header mở rộng (phiên bản 2) có magic, độ dài 64 bit, mã codec nén và CRC32 của thông điệp
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+# Số bit LSB mặc định trên mỗi kênh màu, giới hạn cho phép và số kênh màu của mỗi pixel
+BITS_PER_CHANNEL = 2
+MIN_BITS_PER_CHANNEL = 1
+MAX_BITS_PER_CHANNEL = 4
+CHANNELS = 3
+BITS_PER_PIXEL = BITS_PER_CHANNEL * CHANNELS
+
+# Header 24 bit trong 4 pixel đầu tiên, luôn giấu ở 2 bit mỗi kênh để đọc được
+# trước khi biết độ sâu LSB: 2 bit cao là mã độ sâu, 22 bit còn lại là độ dài.
+# Mã 0 ứng với 2 bit mỗi kênh nên ảnh cũ (độ dài < 2^22) vẫn được đọc đúng.
+HEADER_BITS = 24
+HEADER_PIXELS = HEADER_BITS // BITS_PER_PIXEL
+DEPTH_CODE_BITS = 2
+LENGTH_BITS = HEADER_BITS - DEPTH_CODE_BITS
+MAX_MESSAGE_LENGTH = (1 << LENGTH_BITS) - 1
+DEPTH_CODES = {2: 0, 1: 1, 3: 2, 4: 3}
+DEPTHS = {code: depth for depth, code in DEPTH_CODES.items()}
+
+# Header mở rộng: độ dài 0 (không hợp lệ ở header cũ) báo hiệu 27 byte tiếp theo
+# (36 pixel, cũng ở 2 bit mỗi kênh) gồm magic, phiên bản, số bit mỗi kênh, mã
+# codec, cờ, độ dài đã lưu và độ dài gốc (64 bit), CRC32 của dữ liệu đã lưu và
+# bậc mã Hamming (0 khi giấu LSB thường, xem stego_matrix; trước đây là byte dự
+# phòng luôn bằng 0); thông điệp bắt đầu ngay sau đó. Magic và số bit mỗi kênh
+# (phải khớp mã độ sâu của header cũ) cho phép loại ảnh không giấu tin chỉ từ
+# 40 pixel đầu.
+STEGO_MAGIC = b'SG'
+EXTENDED_VERSION = 2
+EXTENDED_FORMAT = '>2sBBBBQQIB'
+EXTENDED_BYTES = struct.calcsize(EXTENDED_FORMAT)
+EXTENDED_PIXELS = EXTENDED_BYTES * 8 // BITS_PER_PIXEL
+MAX_EXTENDED_LENGTH = (1 << 64) - 1
+FLAG_CHECKSUM = 1
+CODEC_NONE = 0
+
+# Kết quả kiểm tra CRC32 (verifyChecksum) khi ghi vào báo cáo
+INTEGRITY_RESULTS = {True: "ok", False: "mismatch", None: "unknown"}
+
+# Thứ tự kênh khi đọc luồng bit (R, G, B) so với thứ tự lưu của cv2 (B, G, R)
+CHANNEL_ORDER = (2, 1, 0)
+
+# Số kênh của ảnh được giấu tin trực tiếp (xám, màu, màu có alpha)
+CARRIER_CHANNELS = (1, 3, 4)
+
+def imageChannels(image):
+    """
+    Số kênh của mảng ảnh cv2 (ảnh xám là mảng 2 chiều)
+    
+    Args:
+        image (numpy.ndarray): Ảnh H×W, H×W×1, H×W×3 hoặc H×W×4
+        
+    Returns:
+        int: Số kênh
+    """
+    return 1 if image.ndim == 2 else image.shape[2]
+
+def carrierPixels(image):
+    """
+    Góc nhìn (số nhóm, 3) trên các kênh của ảnh, không sao chép
+    
+    Các hàm giấu tin làm việc trên nhóm 3 kênh. Với ảnh 3 kênh mỗi nhóm là một
+    pixel; với ảnh xám hoặc có kênh alpha, các kênh được xếp liên tiếp theo thứ
+    tự hàng rồi chia thành nhóm 3 kênh, nên mọi kênh đều chứa tin (ảnh RGBA
+    chứa 8 bit mỗi pixel ở 2 bit mỗi kênh). Các kênh lẻ ở cuối ảnh không dùng.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (liên tục trong bộ nhớ nếu không phải 3 kênh)
+        
+    Returns:
+        numpy.ndarray: Mảng (số nhóm, 3) dùng chung bộ nhớ với ảnh
+    """
+    if imageChannels(image) == CHANNELS:
+        return image.reshape(-1, CHANNELS)
+    if not image.flags.c_contiguous:
+        raise ValueError("Ảnh xám hoặc có kênh alpha phải liên tục trong bộ nhớ")
+    samples = image.reshape(-1)
+    return samples[:len(samples) - len(samples) % CHANNELS].reshape(-1, CHANNELS)
+
+def carrierGroups(pixel_count, channels=CHANNELS):
+    """
+    Số nhóm 3 kênh của ảnh có pixel_count pixel
+    
+    Args:
+        pixel_count (int): Số pixel
+        channels (int): Số kênh của ảnh
+        
+    Returns:
+        int: Số nhóm (bằng số pixel với ảnh 3 kênh)
+    """
+    return pixel_count * channels // CHANNELS
+
+def groupsToPixels(groups, channels=CHANNELS):
+    """
+    Số pixel của ảnh chứa một số nhóm 3 kênh đầu tiên
+    
+    Args:
+        groups (int): Số nhóm
+        channels (int): Số kênh của ảnh
+        
+    Returns:
+        int: Số pixel (làm tròn lên)
+    """
+    return -(-groups * CHANNELS // channels)
+
+def lsbBits(bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Mặt nạ lấy các bit LSB của một kênh, ví dụ 0000 0011 = 3 với 2 bit
+    
+    Args:
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        int: Mặt nạ các bit thấp
+    """
+    return (1 << bits_per_channel) - 1
+
+def lsbMask(bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Mặt nạ xóa các bit LSB của một kênh, ví dụ 1111 1100 = 252 với 2 bit
+    
+    Args:
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        int: Mặt nạ giữ lại các bit cao
+    """
+    return 0xFF ^ lsbBits(bits_per_channel)
+
+def checkBitsPerChannel(bits_per_channel):
+    """
+    Kiểm tra số bit LSB trên mỗi kênh nằm trong khoảng cho phép
+    
+    Args:
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        int: Giá trị đã kiểm tra
+    """
+    if bits_per_channel not in DEPTH_CODES:
+        raise ValueError(f"Số bit LSB mỗi kênh phải từ {MIN_BITS_PER_CHANNEL} đến "
+                         f"{MAX_BITS_PER_CHANNEL}, nhận được {bits_per_channel}")
+    return bits_per_channel
+
+def encodeMessageLength(message_length, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Mã hóa độ dài thông điệp và độ sâu LSB thành 24 bit header
+    
+    Args:
+        message_length (int): Độ dài thông điệp cần mã hóa (byte)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        
+    Returns:
+        numpy.ndarray: Mảng 24 bit (bit cao nhất đứng trước)
+    """
+    if message_length < 0 or message_length > MAX_MESSAGE_LENGTH:
+        raise ValueError(f"Độ dài thông điệp vượt quá {LENGTH_BITS} bit: {message_length}")
+    field = DEPTH_CODES[checkBitsPerChannel(bits_per_channel)] << LENGTH_BITS | message_length
+    header = np.array([field], dtype='>u4').view(np.uint8)
+    return np.unpackbits(header)[-HEADER_BITS:]
+
+def payloadChecksum(payload):
+    """
+    Tính CRC32 của dữ liệu được giấu (ghi vào header mở rộng)
+    
+    Args:
+        payload (bytes | numpy.ndarray): Dữ liệu đã lưu (sau khi nén nếu có)
+        
+    Returns:
+        int: CRC32 không dấu
+    """
+    return zlib.crc32(payload)
+
+def verifyChecksum(header, payload):
+    """
+    Kiểm tra dữ liệu đã trích xuất với CRC32 ghi trong header
+    
+    Args:
+        header (dict): Thông tin header từ readHeader
+        payload (bytes | numpy.ndarray): Dữ liệu đã trích xuất (trước khi giải nén)
+        
+    Returns:
+        bool: True nếu khớp, False nếu sai; None nếu header không có checksum
+    """
+    if header['checksum'] is None:
+        return None
+    return payloadChecksum(payload) == header['checksum']
+
+def headerBits(message_length, bits_per_channel=BITS_PER_CHANNEL, codec=CODEC_NONE, original_length=None,
+               checksum=None, matrix_order=0):
+    """
+    Tạo header cho thông điệp: header 24 bit cũ nếu đủ, ngược lại header mở rộng
+    
+    Header cũ chỉ được dùng khi thông điệp không nén, không kèm checksum và độ
+    dài vừa 22 bit; có checksum hoặc mã hóa ma trận thì luôn dùng header mở rộng.
+    
+    Args:
+        message_length (int): Số byte được giấu
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        codec (int): Mã codec nén của thông điệp (CODEC_NONE nếu không nén)
+        original_length (int, optional): Độ dài thông điệp trước khi nén
+        checksum (int, optional): CRC32 của dữ liệu được giấu (payloadChecksum)
+        matrix_order (int): Bậc mã Hamming nếu thông điệp được giấu bằng mã hóa ma trận
+        
+    Returns:
+        numpy.ndarray: Mảng bit của header (bội số của 6, giấu ở 2 bit mỗi kênh)
+    """
+    if original_length is None:
+        original_length = message_length
+    if (codec == CODEC_NONE and checksum is None and not matrix_order and original_length == message_length
+            and 0 < message_length <= MAX_MESSAGE_LENGTH):
+        return encodeMessageLength(message_length, bits_per_channel)
+    if not (0 <= message_length <= MAX_EXTENDED_LENGTH and 0 <= original_length <= MAX_EXTENDED_LENGTH):
+        raise ValueError(f"Độ dài thông điệp vượt quá 64 bit: {message_length}")
+    flags = FLAG_CHECKSUM if checksum is not None else 0
+    extended = struct.pack(EXTENDED_FORMAT, STEGO_MAGIC, EXTENDED_VERSION, bits_per_channel, codec, flags,
+                           message_length, original_length, checksum or 0, matrix_order)
+    return np.concatenate([
+        encodeMessageLength(0, bits_per_channel),
+        np.unpackbits(np.frombuffer(extended, dtype=np.uint8)),
+    ])
+
+def bitsToSymbols(bits, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Gộp luồng bit thành các giá trị bits_per_channel bit cho từng kênh
+    
+    Args:
+        bits (numpy.ndarray): Mảng bit, độ dài là bội số của bits_per_channel × 3
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        numpy.ndarray: Mảng (số pixel, 3) theo thứ tự kênh của cv2 (B, G, R)
+    """
+    bits = bits.reshape(-1, bits_per_channel)
+    symbols = np.zeros(len(bits), dtype=np.uint8)
+    for k in range(bits_per_channel):
+        symbols <<= 1
+        symbols |= bits[:, k]
+    return symbols.reshape(-1, CHANNELS)[:, CHANNEL_ORDER]
+
+def embedBits(image, bits, start_pixel=0, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Ghi luồng bit vào các bit LSB của các pixel liên tiếp (theo thứ tự hàng)
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh), được sửa trực tiếp
+        bits (numpy.ndarray): Mảng bit, độ dài là bội số của bits_per_channel × 3
+        start_pixel (int): Chỉ số pixel bắt đầu ghi
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        int: Chỉ số pixel ngay sau pixel cuối cùng đã ghi
+    """
+    bits_per_pixel = bits_per_channel * CHANNELS
+    if len(bits) % bits_per_pixel != 0:
+        raise ValueError(f"Số bit phải là bội số của {bits_per_pixel}")
+    flat = carrierPixels(image)
+    end_pixel = start_pixel + len(bits) // bits_per_pixel
+    if end_pixel > len(flat):
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp")
+    
+    # Xóa các bit LSB bằng mặt nạ rồi OR mặt phẳng bit vào trong cùng một lượt
+    region = flat[start_pixel:end_pixel]
+    region &= lsbMask(bits_per_channel)
+    region |= bitsToSymbols(bits, bits_per_channel)
+    return end_pixel
+
+def embedPayload(image, message_length, payload_bits, bits_per_channel=BITS_PER_CHANNEL, header=None):
+    """
+    Giấu header và thông điệp vào ảnh
+    
+    Header 24 bit chiếm 4 pixel đầu tiên (luôn ở 2 bit mỗi kênh), thông điệp
+    bắt đầu từ pixel thứ 5 (hoặc ngay sau header mở rộng) với bits_per_channel
+    bit mỗi kênh. Với độ sâu mặc định, header là phần đầu của cùng một lần ghi.
+    Nếu số bit thông điệp chưa là bội số của số bit mỗi pixel, phần thiếu được
+    bù bằng bit 0 ở cuối.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh), được sửa trực tiếp
+        message_length (int): Độ dài thông điệp ghi vào header
+        payload_bits (numpy.ndarray): Mảng bit của thông điệp
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        int: Số pixel đã ghi (bao gồm header)
+    """
+    tail = (-len(payload_bits)) % (bits_per_channel * CHANNELS)
+    if header is None:
+        header = headerBits(message_length, bits_per_channel)
+    payload_bits = np.concatenate([
+        payload_bits.astype(np.uint8, copy=False),
+        np.zeros(tail, dtype=np.uint8),
+    ])
+    if bits_per_channel == BITS_PER_CHANNEL:
+        return embedBits(image, np.concatenate([header, payload_bits]))
+    start_pixel = embedBits(image, header)
+    return embedBits(image, payload_bits, start_pixel, bits_per_channel)
+
+def embedBytes(image, payload, bits_per_channel=BITS_PER_CHANNEL, header=None):
+    """
+    Giấu header và thông điệp dạng byte vào ảnh
+    
+    Các bit 0 được bù vào đầu thông điệp (như bước 2 vẫn làm) để số bit là
+    bội số của số bit mỗi pixel, sau đó toàn bộ được ghi bằng các phép toán mảng.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh), được sửa trực tiếp
+        payload (bytes | numpy.ndarray): Thông điệp đã mã hóa thành byte
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        int: Số pixel đã ghi (bao gồm header)
+    """
+    payload = np.frombuffer(payload, dtype=np.uint8)
+    bits = np.concatenate([
+        np.zeros(payloadPadding(len(payload), bits_per_channel), dtype=np.uint8),
+        np.unpackbits(payload),
+    ])
+    return embedPayload(image, len(payload), bits, bits_per_channel, header)
+
+def symbolsToBits(symbols, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Tách các giá trị bits_per_channel bit của từng kênh thành luồng bit
+    
+    Args:
+        symbols (numpy.ndarray): Mảng (số pixel, 3) theo thứ tự kênh của cv2 (B, G, R)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        numpy.ndarray: Mảng bit theo thứ tự R, G, B của từng pixel
+    """
+    symbols = symbols[:, CHANNEL_ORDER].reshape(-1)
+    bits = np.empty((len(symbols), bits_per_channel), dtype=np.uint8)
+    for k in range(bits_per_channel):
+        bits[:, k] = (symbols >> (bits_per_channel - 1 - k)) & 1
+    return bits.reshape(-1)
+
+def extractBits(image, start_pixel, num_pixels, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Đọc luồng bit từ các bit LSB của các pixel liên tiếp (theo thứ tự hàng)
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh)
+        start_pixel (int): Chỉ số pixel bắt đầu đọc
+        num_pixels (int): Số pixel cần đọc (bị cắt nếu vượt quá ảnh)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        numpy.ndarray: Mảng bit đã đọc
+    """
+    flat = carrierPixels(image)
+    region = flat[start_pixel:start_pixel + num_pixels] & lsbBits(bits_per_channel)
+    return symbolsToBits(region, bits_per_channel)
+
+def decodeHeader(image):
+    """
+    Giải mã độ dài thông điệp và độ sâu LSB từ 24 bit header trong 4 pixel đầu tiên
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh)
+        
+    Returns:
+        tuple: (độ dài thông điệp, số bit LSB trên mỗi kênh)
+    """
+    header = np.packbits(extractBits(image, 0, HEADER_PIXELS))
+    field = int.from_bytes(header.tobytes(), 'big')
+    return field & MAX_MESSAGE_LENGTH, DEPTHS[field >> LENGTH_BITS]
+
+def readHeader(image):
+    """
+    Đọc header cũ hoặc header mở rộng từ các pixel đầu tiên
+    
+    Chỉ đọc tối đa 40 pixel; ảnh có độ dài 0 ở header cũ nhưng không có magic
+    (hoặc số bit mỗi kênh không khớp) bị loại ngay mà không đọc phần còn lại.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh) (chỉ cần các pixel đầu)
+        
+    Returns:
+        dict: version (1 với header cũ), message_length (số byte được giấu),
+            bits_per_channel, codec, original_length (độ dài trước khi nén),
+            checksum (CRC32 hoặc None), matrix_order (bậc mã Hamming, 0 nếu giấu LSB thường),
+            payload_pixel (pixel bắt đầu thông điệp)
+    """
+    message_length, bits_per_channel = decodeHeader(image)
+    header = {
+        "version": 1,
+        "message_length": message_length,
+        "bits_per_channel": bits_per_channel,
+        "codec": CODEC_NONE,
+        "original_length": message_length,
+        "checksum": None,
+        "matrix_order": 0,
+        "payload_pixel": HEADER_PIXELS,
+    }
+    if message_length == 0:
+        extended = np.packbits(extractBits(image, HEADER_PIXELS, EXTENDED_PIXELS)).tobytes()
+        if len(extended) < EXTENDED_BYTES:
+            raise ValueError("Ảnh không đủ lớn để chứa header mở rộng")
+        (magic, version, depth, codec, flags, message_length, original_length,
+         checksum, matrix_order) = struct.unpack(EXTENDED_FORMAT, extended)
+        if magic != STEGO_MAGIC:
+            raise ValueError("Ảnh không chứa thông điệp (không có magic của header mở rộng)")
+        if version != EXTENDED_VERSION:
+            raise ValueError(f"Không hỗ trợ header phiên bản {version}")
+        if depth != bits_per_channel:
+            raise ValueError(f"Header không nhất quán: {depth} và {bits_per_channel} bit mỗi kênh")
+        header.update({
+            "version": version,
+            "message_length": message_length,
+            "codec": codec,
+            "original_length": original_length,
+            "checksum": checksum if flags & FLAG_CHECKSUM else None,
+            "matrix_order": matrix_order,
+            "payload_pixel": HEADER_PIXELS + EXTENDED_PIXELS,
+        })
+    return header
+
+def payloadPadding(message_length, bits_per_channel=BITS_PER_CHANNEL):
+    """
+    Tính số bit 0 được bù vào đầu thông điệp để đủ bội số của số bit mỗi pixel
+    
+    Args:
+        message_length (int): Độ dài thông điệp (byte)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        int: Số bit bù
+    """
+    return (-message_length * 8) % (bits_per_channel * CHANNELS)
+
+def extractPayload(image, message_length, bits_per_channel=BITS_PER_CHANNEL, start_pixel=HEADER_PIXELS):
+    """
+    Trích xuất thông điệp chỉ từ các pixel chứa nó, bắt đầu từ start_pixel
+    
+    Chỉ ceil(độ dài × 8 / số bit mỗi pixel) pixel được đọc; các bit bù ở đầu
+    (do bước 2 thêm vào) được bỏ qua trước khi gộp lại thành byte.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh)
+        message_length (int): Độ dài thông điệp (byte) đọc từ header
+        bits_per_channel (int): Số bit LSB trên mỗi kênh đọc từ header
+        start_pixel (int): Pixel bắt đầu thông điệp (payload_pixel của readHeader)
+        
+    Returns:
+        bytes: Thông điệp đã trích xuất (ngắn hơn nếu ảnh không đủ pixel)
+    """
+    num_bits = message_length * 8
+    padding = payloadPadding(message_length, bits_per_channel)
+    num_pixels = (padding + num_bits) // (bits_per_channel * CHANNELS)
+    bits = extractBits(image, start_pixel, num_pixels, bits_per_channel)[padding:]
+    bits = bits[:len(bits) - len(bits) % 8]
+    return np.packbits(bits).tobytes()
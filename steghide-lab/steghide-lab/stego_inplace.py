@@ -0,0 +1,248 @@
+"""
+Giấu và trích xuất tin trực tiếp trên file ảnh không nén (BMP, PPM, TIFF) bằng mmap
+
+Chức năng:
+    - Đọc vị trí dữ liệu pixel từ header BMP 24 bit, PPM (P6) và TIFF RGB không nén
+    - Sao chép ảnh gốc rồi chỉ sửa các byte của header và các pixel chứa thông điệp
+    - Trích xuất thông điệp chỉ bằng cách đọc các byte của những pixel đó
+"""
+
+import mmap
+import shutil
+import struct
+
+import numpy as np
+
+from stego_capacity import (TIFF_BITS_PER_SAMPLE, TIFF_HEIGHT, TIFF_PHOTOMETRIC, TIFF_SAMPLES_PER_PIXEL, TIFF_WIDTH,
+                            capacityBytes, readTiffTags)
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, EXTENDED_PIXELS, HEADER_PIXELS, embedBytes,
+                          extractPayload, headerBits, payloadPadding, readHeader)
+
+# Các thẻ TIFF về vị trí dữ liệu (thẻ kích thước và màu nằm trong stego_capacity)
+TIFF_COMPRESSION = 259
+TIFF_STRIP_OFFSETS = 273
+TIFF_ROWS_PER_STRIP = 278
+TIFF_PLANAR_CONFIG = 284
+
+def _bmpLayout(f):
+    """Vị trí dữ liệu pixel của BMP 24 bit không nén (hàng đệm tới bội số 4 byte)"""
+    f.seek(10)
+    offset, dib_size = struct.unpack('<II', f.read(8))
+    if dib_size < 40:
+        return None
+    width, height, _, bit_count, compression = struct.unpack('<iiHHI', f.read(16))
+    if bit_count != 24 or compression != 0:
+        return None
+    stride = (width * CHANNELS + 3) // 4 * 4
+    return {
+        "format": "bmp",
+        "width": width,
+        "height": abs(height),
+        "rgb": False,
+        # BMP mặc định lưu từ hàng dưới cùng lên, chiều cao âm nghĩa là từ trên xuống
+        "rows": [(offset + stride * (abs(height) - 1), -stride)] if height > 0 else [(offset, stride)],
+        "rows_per_strip": abs(height),
+    }
+
+def _ppmLayout(f):
+    """Vị trí dữ liệu pixel của PPM nhị phân (P6) 8 bit"""
+    f.seek(0)
+    if f.read(2) != b'P6':
+        return None
+    fields = []
+    token = b''
+    while len(fields) < 3:
+        c = f.read(1)
+        if not c:
+            return None
+        if c == b'#' and not token:
+            f.readline()
+        elif c.isspace():
+            if token:
+                fields.append(int(token))
+                token = b''
+        else:
+            token += c
+    width, height, maxval = fields
+    if maxval != 255:
+        return None
+    # Dữ liệu bắt đầu ngay sau một ký tự trắng duy nhất sau maxval
+    return {
+        "format": "ppm",
+        "width": width,
+        "height": height,
+        "rgb": True,
+        "rows": [(f.tell(), width * CHANNELS)],
+        "rows_per_strip": height,
+    }
+
+def _tiffLayout(f):
+    """Vị trí các strip của TIFF RGB 8 bit không nén, các kênh xen kẽ"""
+    tags = readTiffTags(f)
+    if tags is None:
+        return None
+    width = tags[TIFF_WIDTH][0]
+    height = tags[TIFF_HEIGHT][0]
+    if (tags.get(TIFF_COMPRESSION, (1,))[0] != 1 or tags.get(TIFF_PHOTOMETRIC, (0,))[0] != 2
+            or tags.get(TIFF_SAMPLES_PER_PIXEL, (1,))[0] != CHANNELS
+            or tags.get(TIFF_BITS_PER_SAMPLE, (1,)) != (8,) * CHANNELS
+            or tags.get(TIFF_PLANAR_CONFIG, (1,))[0] != 1):
+        return None
+    return {
+        "format": "tiff",
+        "width": width,
+        "height": height,
+        "rgb": True,
+        "rows": [(offset, width * CHANNELS) for offset in tags[TIFF_STRIP_OFFSETS]],
+        "rows_per_strip": tags.get(TIFF_ROWS_PER_STRIP, (height,))[0],
+    }
+
+def readRasterLayout(filename):
+    """
+    Đọc vị trí dữ liệu pixel của ảnh không nén chỉ từ header của file
+    
+    Args:
+        filename (str): Đường dẫn ảnh
+        
+    Returns:
+        dict: format, width, height, rgb (thứ tự kênh R, G, B trong file), rows
+            (danh sách (offset hàng đầu, bước hàng) của từng strip), rows_per_strip;
+            None nếu ảnh nén hoặc không được hỗ trợ
+    """
+    with open(filename, 'rb') as f:
+        head = f.read(4)
+        try:
+            if head[:2] == b'BM':
+                return _bmpLayout(f)
+            if head[:2] == b'P6':
+                return _ppmLayout(f)
+            if head in (b'II*\x00', b'MM\x00*'):
+                return _tiffLayout(f)
+        except (struct.error, KeyError, ValueError):
+            return None
+    return None
+
+def _segments(layout, start_pixel, end_pixel):
+    """Chia khoảng pixel [start, end) thành các đoạn liên tiếp trong file: (offset, số pixel)"""
+    width = layout['width']
+    for row in range(start_pixel // width, (end_pixel - 1) // width + 1):
+        first = max(start_pixel, row * width) - row * width
+        last = min(end_pixel, (row + 1) * width) - row * width
+        strip, row_in_strip = divmod(row, layout['rows_per_strip'])
+        offset, stride = layout['rows'][strip]
+        yield offset + row_in_strip * stride + first * CHANNELS, last - first
+
+def readRasterPixels(buffer, layout, start_pixel, num_pixels):
+    """
+    Đọc các pixel liên tiếp (theo thứ tự hàng) trực tiếp từ dữ liệu file
+    
+    Args:
+        buffer (mmap.mmap): Nội dung file ảnh
+        layout (dict): Vị trí dữ liệu pixel từ readRasterLayout
+        start_pixel (int): Chỉ số pixel bắt đầu
+        num_pixels (int): Số pixel cần đọc
+        
+    Returns:
+        numpy.ndarray: Mảng (1, số pixel, 3) theo thứ tự kênh của cv2 (B, G, R)
+    """
+    pixels = np.empty((num_pixels, CHANNELS), dtype=np.uint8)
+    index = 0
+    for offset, count in _segments(layout, start_pixel, start_pixel + num_pixels):
+        pixels[index:index + count] = np.frombuffer(buffer, np.uint8, count * CHANNELS, offset).reshape(-1, CHANNELS)
+        index += count
+    if layout['rgb']:
+        pixels = np.ascontiguousarray(pixels[:, ::-1])
+    return pixels.reshape(1, -1, CHANNELS)
+
+def writeRasterPixels(buffer, layout, start_pixel, pixels):
+    """
+    Ghi các pixel liên tiếp (theo thứ tự hàng) trực tiếp vào dữ liệu file
+    
+    Args:
+        buffer (mmap.mmap): Nội dung file ảnh, mở để ghi
+        layout (dict): Vị trí dữ liệu pixel từ readRasterLayout
+        start_pixel (int): Chỉ số pixel bắt đầu
+        pixels (numpy.ndarray): Các pixel theo thứ tự kênh của cv2 (B, G, R)
+    """
+    pixels = pixels.reshape(-1, CHANNELS)
+    if layout['rgb']:
+        pixels = pixels[:, ::-1]
+    index = 0
+    for offset, count in _segments(layout, start_pixel, start_pixel + len(pixels)):
+        buffer[offset:offset + count * CHANNELS] = pixels[index:index + count].tobytes()
+        index += count
+
+def embedInPlace(cover_path, output_path, payload, bits_per_channel=BITS_PER_CHANNEL, layout=None, header=None):
+    """
+    Sao chép ảnh gốc rồi giấu thông điệp bằng cách sửa trực tiếp các pixel cần thiết
+    
+    Args:
+        cover_path (str): Ảnh gốc không nén (BMP, PPM, TIFF)
+        output_path (str): Ảnh đầu ra, cùng định dạng với ảnh gốc
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        layout (dict, optional): Vị trí dữ liệu pixel đã đọc trước
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        dict: format, pixels_patched, bytes_patched
+    """
+    layout = layout or readRasterLayout(cover_path)
+    if layout is None:
+        raise ValueError(f"{cover_path} không phải ảnh không nén được hỗ trợ")
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    header_pixels = len(header) // BITS_PER_PIXEL
+    capacity = capacityBytes(layout['width'], layout['height'], bits_per_channel, header_pixels=header_pixels)
+    if len(payload) > capacity:
+        raise ValueError(f"Ảnh không đủ lớn để chứa thông điệp ({len(payload)} > {capacity} byte)")
+    num_bits = payloadPadding(len(payload), bits_per_channel) + len(payload) * 8
+    num_pixels = header_pixels + num_bits // (bits_per_channel * CHANNELS)
+    
+    shutil.copyfile(cover_path, output_path)
+    with open(output_path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as buffer:
+        region = readRasterPixels(buffer, layout, 0, num_pixels)
+        embedBytes(region, payload, bits_per_channel, header)
+        writeRasterPixels(buffer, layout, 0, region)
+    return {
+        "format": layout['format'],
+        "pixels_patched": num_pixels,
+        "bytes_patched": num_pixels * CHANNELS,
+    }
+
+def decodeRasterHeader(filename, layout):
+    """
+    Đọc header (cũ hoặc mở rộng) chỉ từ các pixel đầu tiên của file ảnh không nén
+    
+    Args:
+        filename (str): Đường dẫn ảnh
+        layout (dict): Vị trí dữ liệu pixel từ readRasterLayout
+        
+    Returns:
+        dict: Thông tin header như readHeader
+    """
+    num_pixels = min(HEADER_PIXELS + EXTENDED_PIXELS, layout['width'] * layout['height'])
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return readHeader(readRasterPixels(buffer, layout, 0, num_pixels))
+
+def extractRasterPayload(filename, layout, message_length, bits_per_channel=BITS_PER_CHANNEL,
+                         start_pixel=HEADER_PIXELS):
+    """
+    Trích xuất thông điệp chỉ từ các pixel chứa nó trong file ảnh không nén
+    
+    Args:
+        filename (str): Đường dẫn ảnh
+        layout (dict): Vị trí dữ liệu pixel từ readRasterLayout
+        message_length (int): Độ dài thông điệp (byte) đọc từ header
+        bits_per_channel (int): Số bit LSB trên mỗi kênh đọc từ header
+        start_pixel (int): Pixel bắt đầu thông điệp (payload_pixel của header)
+        
+    Returns:
+        bytes: Thông điệp đã trích xuất (ngắn hơn nếu ảnh không đủ pixel)
+    """
+    num_bits = payloadPadding(message_length, bits_per_channel) + message_length * 8
+    num_pixels = start_pixel + num_bits // (bits_per_channel * CHANNELS)
+    num_pixels = min(num_pixels, layout['width'] * layout['height'])
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        region = readRasterPixels(buffer, layout, 0, num_pixels)
+    return extractPayload(region, message_length, bits_per_channel, start_pixel)
@@ -0,0 +1,208 @@
+"""
+Giấu tin bằng mã hóa ma trận (mã Hamming) trên mặt phẳng LSB
+
+Chức năng:
+    - Mỗi khối 2^p - 1 kênh chứa p bit thông điệp trong syndrome Hamming của các
+      bit LSB, nên mỗi khối sửa tối đa 1 kênh (giấu LSB thường sửa trung bình
+      một nửa số kênh chứa tin)
+    - Chọn bậc p lớn nhất mà thông điệp vẫn vừa với số kênh còn lại sau header
+    - Giấu và trích xuất theo từng lô khối bằng các phép toán mảng, có thể rải các kênh theo khóa
+    - Báo cáo số kênh bị sửa và hiệu suất giấu (số bit thông điệp trên mỗi lần sửa)
+"""
+
+import numpy as np
+
+from stego_engine import (BITS_PER_PIXEL, CHANNELS, CODEC_NONE, EXTENDED_PIXELS, HEADER_PIXELS, carrierGroups,
+                          carrierPixels, embedBits, groupsToPixels, headerBits, imageChannels)
+from stego_scatter import scatterKeys, scatterPositions
+from stego_tiled import payloadBits
+
+# Header ghi 1 bit mỗi kênh để bước 4 đọc đúng mã độ sâu; thông điệp thực sự
+# nằm trong syndrome của bit LSB
+MATRIX_BITS_PER_CHANNEL = 1
+
+# Bậc mã được ghi vào header mở rộng nên thông điệp luôn bắt đầu sau 40 nhóm kênh
+MATRIX_HEADER_PIXELS = HEADER_PIXELS + EXTENDED_PIXELS
+
+# Bậc mã Hamming tối đa (khối 65535 kênh) và số kênh xử lý trong mỗi lô
+MAX_MATRIX_ORDER = 16
+MATRIX_CHUNK = 1 << 20
+
+def matrixBlockSize(order):
+    """
+    Số kênh trong mỗi khối của mã Hamming bậc order
+    
+    Args:
+        order (int): Bậc mã Hamming (số bit thông điệp mỗi khối)
+        
+    Returns:
+        int: 2^order - 1
+    """
+    return (1 << order) - 1
+
+def matrixEfficiency(order):
+    """
+    Hiệu suất giấu dự kiến của mã Hamming với thông điệp ngẫu nhiên
+    
+    Khối có syndrome trùng sẵn với p bit thông điệp (xác suất 2^-p) không cần sửa.
+    
+    Args:
+        order (int): Bậc mã Hamming
+        
+    Returns:
+        float: Số bit thông điệp trên mỗi kênh bị sửa
+    """
+    return order / (1 - 2.0 ** -order)
+
+def lsbEfficiency(bits_per_channel):
+    """
+    Hiệu suất giấu dự kiến của giấu LSB thường để so sánh với matrixEfficiency
+    
+    Args:
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        
+    Returns:
+        float: Số bit thông điệp trên mỗi kênh bị sửa
+    """
+    return bits_per_channel / (1 - 2.0 ** -bits_per_channel)
+
+def matrixSamples(pixel_count, channels=CHANNELS):
+    """
+    Số kênh có thể chứa thông điệp sau header mở rộng
+    
+    Args:
+        pixel_count (int): Số pixel của ảnh
+        channels (int): Số kênh mỗi pixel
+        
+    Returns:
+        int: Số kênh (bội số của 3)
+    """
+    return max(carrierGroups(pixel_count, channels) - MATRIX_HEADER_PIXELS, 0) * CHANNELS
+
+def matrixOrder(message_length, num_samples, max_order=MAX_MATRIX_ORDER):
+    """
+    Chọn bậc mã Hamming lớn nhất mà thông điệp vẫn vừa với số kênh có sẵn
+    
+    Bậc càng lớn thì càng ít kênh bị sửa trên mỗi bit nhưng càng cần nhiều kênh.
+    
+    Args:
+        message_length (int): Độ dài thông điệp (byte)
+        num_samples (int): Số kênh có thể dùng sau header (matrixSamples)
+        max_order (int): Bậc tối đa được xét
+        
+    Returns:
+        int: Bậc mã Hamming, None nếu ảnh không đủ lớn kể cả với bậc 1
+    """
+    num_bits = message_length * 8
+    order = None
+    for candidate in range(1, max_order + 1):
+        if -(-num_bits // candidate) * matrixBlockSize(candidate) > num_samples:
+            break
+        order = candidate
+    return order
+
+def _samplePositions(keys, start_sample, domain, start, stop):
+    """Chỉ số các kênh [start, stop) của luồng thông điệp, tuần tự hoặc rải theo khóa"""
+    if keys is None:
+        return np.arange(start_sample + start, start_sample + stop)
+    return start_sample + scatterPositions(keys, domain, start, stop)
+
+def _syndromes(lsb, block_size):
+    """Syndrome Hamming của từng khối: XOR của chỉ số (từ 1) các kênh có bit LSB bằng 1"""
+    index = np.arange(1, block_size + 1, dtype=np.uint32)
+    return np.bitwise_xor.reduce(lsb.reshape(-1, block_size) * index, axis=1)
+
+def matrixEmbed(image, payload, order, header=None, key=None):
+    """
+    Giấu header vào các nhóm kênh đầu và thông điệp vào syndrome của các khối kênh sau đó
+    
+    Mỗi khối 2^order - 1 kênh mang order bit; nếu syndrome của khối khác các
+    bit này, đảo bit LSB của đúng một kênh (vị trí bằng syndrome XOR thông điệp).
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh), được sửa trực tiếp
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte
+        order (int): Bậc mã Hamming (matrixOrder)
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén có matrix_order)
+        key (str, optional): Khóa rải các kênh của thông điệp
+        
+    Returns:
+        dict: order, block_size, blocks, payload_bits, samples_used, pixels_used,
+            channels_changed, pixels_changed, bits_per_change, expected_bits_per_change
+    """
+    payload = np.frombuffer(payload, dtype=np.uint8)
+    if header is None:
+        header = headerBits(len(payload), MATRIX_BITS_PER_CHANNEL, CODEC_NONE, matrix_order=order)
+    flat = carrierPixels(image)
+    samples = flat.reshape(-1)
+    start_pixel = len(header) // BITS_PER_PIXEL
+    start_sample = start_pixel * CHANNELS
+    domain = len(samples) - start_sample
+    block_size = matrixBlockSize(order)
+    num_bits = len(payload) * 8
+    blocks = -(-num_bits // order)
+    if blocks * block_size > domain:
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp")
+    embedBits(image, header)
+    
+    keys = scatterKeys(key) if key else None
+    weights = 1 << np.arange(order - 1, -1, -1, dtype=np.uint32)
+    per_chunk = max(1, MATRIX_CHUNK // block_size)
+    changed = []
+    for first in range(0, blocks, per_chunk):
+        last = min(first + per_chunk, blocks)
+        positions = _samplePositions(keys, start_sample, domain, first * block_size, last * block_size)
+        message = payloadBits(payload, 0, first * order, last * order).reshape(-1, order) @ weights
+        flip = _syndromes(samples[positions] & 1, block_size) ^ message
+        rows = np.flatnonzero(flip)
+        targets = positions.reshape(-1, block_size)[rows, flip[rows] - 1]
+        samples[targets] ^= 1
+        changed.append(targets)
+    
+    targets = np.concatenate(changed)
+    channels = imageChannels(image)
+    samples_used = blocks * block_size
+    return {
+        "order": order,
+        "block_size": block_size,
+        "blocks": blocks,
+        "payload_bits": num_bits,
+        "samples_used": samples_used,
+        "pixels_used": groupsToPixels(start_pixel + -(-samples_used // CHANNELS), channels),
+        "channels_changed": len(targets),
+        "pixels_changed": len(np.unique(targets // channels)),
+        "bits_per_change": num_bits / len(targets) if len(targets) else None,
+        "expected_bits_per_change": matrixEfficiency(order),
+    }
+
+def matrixExtract(image, message_length, order, start_pixel, key=None):
+    """
+    Trích xuất thông điệp bằng cách tính syndrome của tất cả các khối theo lô
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh)
+        message_length (int): Độ dài thông điệp (byte)
+        order (int): Bậc mã Hamming (matrix_order của readHeader)
+        start_pixel (int): Nhóm kênh bắt đầu thông điệp (payload_pixel của readHeader)
+        key (str, optional): Khóa đã dùng để rải thông điệp khi giấu
+        
+    Returns:
+        bytes: Dữ liệu đã trích xuất (ngắn hơn nếu ảnh không đủ khối)
+    """
+    samples = carrierPixels(image).reshape(-1)
+    start_sample = start_pixel * CHANNELS
+    domain = len(samples) - start_sample
+    block_size = matrixBlockSize(order)
+    blocks = min(-(-message_length * 8 // order), max(domain, 0) // block_size)
+    
+    keys = scatterKeys(key) if key else None
+    shifts = np.arange(order - 1, -1, -1, dtype=np.uint32)
+    per_chunk = max(1, MATRIX_CHUNK // block_size)
+    syndromes = np.empty(blocks, dtype=np.uint32)
+    for first in range(0, blocks, per_chunk):
+        last = min(first + per_chunk, blocks)
+        positions = _samplePositions(keys, start_sample, domain, first * block_size, last * block_size)
+        syndromes[first:last] = _syndromes(samples[positions] & 1, block_size)
+    bits = ((syndromes[:, None] >> shifts) & 1).astype(np.uint8).reshape(-1)
+    num_bits = min(message_length * 8, len(bits) // 8 * 8)
+    return np.packbits(bits[:num_bits]).tobytes()
@@ -0,0 +1,234 @@
+"""
+Giấu và trích xuất tin trên nhiều lõi CPU bằng bộ nhớ dùng chung
+
+Chức năng:
+    - Ảnh được cấp phát trong multiprocessing.shared_memory ngay khi giải mã (SharedImage),
+      các tiến trình con giấu/đọc trực tiếp trên đó nên không chép pixel qua lại
+    - Chia vùng pixel chứa thông điệp thành các dải liên tiếp cố định theo số tiến trình
+    - Mỗi tiến trình chỉ xử lý khoảng bit của dải mình, không pickle dữ liệu pixel
+    - Kết quả giống hệt từng byte so với embedBytes/extractPayload trên một lõi
+"""
+
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, HEADER_PIXELS,
+                          carrierPixels, embedBits, embedBytes, extractBits, extractPayload, headerBits, payloadPadding)
+from stego_tiled import payloadBits
+
+# Dải nhỏ hơn mức này không đáng để chuyển sang tiến trình khác: một lõi giấu khoảng
+# 50 triệu pixel mỗi giây, còn tạo tiến trình con và mở vùng nhớ dùng chung tốn hàng chục ms
+MIN_BAND_PIXELS = 1 << 22
+MIN_BAND_BYTES = MIN_BAND_PIXELS * CHANNELS // 8
+
+class SharedImage(np.ndarray):
+    """
+    Mảng ảnh nằm trong multiprocessing.shared_memory
+    
+    Các tiến trình con mở cùng vùng nhớ theo tên, nên embedParallel và
+    extractParallel làm việc trực tiếp trên ảnh của tiến trình chính. Vùng
+    nhớ được giải phóng khi mảng và mọi góc nhìn của nó không còn được dùng.
+    
+    Attributes:
+        shm (multiprocessing.shared_memory.SharedMemory): Vùng nhớ chứa ảnh
+    """
+    
+    def __new__(cls, shape, dtype=np.uint8):
+        shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1))
+        image = super().__new__(cls, shape, dtype, buffer=shm.buf)
+        image.shm = shm
+        weakref.finalize(image, shm.unlink)
+        return image
+    
+    def __array_finalize__(self, obj):
+        self.shm = getattr(obj, 'shm', None)
+    
+    @classmethod
+    def fromArray(cls, array):
+        """
+        Tạo ảnh trong bộ nhớ dùng chung với nội dung của mảng (chép một lần khi nạp ảnh)
+        
+        Args:
+            array (numpy.ndarray): Ảnh vừa giải mã
+            
+        Returns:
+            SharedImage: Ảnh cùng kích thước và nội dung
+        """
+        image = cls(array.shape, array.dtype)
+        image[...] = array
+        return image
+
+def sharedOffset(array):
+    """
+    Vị trí byte của một vùng pixel trong vùng nhớ dùng chung chứa nó
+    
+    Args:
+        array (numpy.ndarray): Vùng pixel (thường là góc nhìn của SharedImage)
+        
+    Returns:
+        int: Vị trí byte, None nếu vùng không liên tục hoặc không nằm trong SharedImage
+    """
+    shm = getattr(array, 'shm', None)
+    if shm is None or not array.flags.c_contiguous:
+        return None
+    start = array.__array_interface__['data'][0] - np.frombuffer(shm.buf, dtype=np.uint8).ctypes.data
+    return start if 0 <= start and start + array.nbytes <= shm.size else None
+
+def splitRange(total, parts, min_size=1):
+    """
+    Chia khoảng [0, total) thành các đoạn liên tiếp gần bằng nhau
+    
+    Cách chia chỉ phụ thuộc vào tham số nên mọi lần chạy cho cùng kết quả.
+    
+    Args:
+        total (int): Độ dài khoảng
+        parts (int): Số đoạn mong muốn
+        min_size (int): Độ dài tối thiểu mỗi đoạn (số đoạn bị giảm nếu cần)
+        
+    Returns:
+        list: Các cặp (start, stop)
+    """
+    parts = max(1, min(parts, total // max(min_size, 1)))
+    bounds = [total * k // parts for k in range(parts + 1)]
+    return [(bounds[k], bounds[k + 1]) for k in range(parts) if bounds[k + 1] > bounds[k]]
+
+def _embedRange(region_buf, offset, num_pixels, payload_buf, payload_size, bits_per_channel, start, stop):
+    """Giấu phần thông điệp thuộc các pixel [start, stop) của vùng dùng chung"""
+    region = np.ndarray((num_pixels, CHANNELS), dtype=np.uint8, buffer=region_buf, offset=offset)
+    payload = np.ndarray((payload_size,), dtype=np.uint8, buffer=payload_buf)
+    bits_per_pixel = bits_per_channel * CHANNELS
+    padding = payloadPadding(payload_size, bits_per_channel)
+    bits = payloadBits(payload, padding, start * bits_per_pixel, stop * bits_per_pixel)
+    embedBits(region, bits, start, bits_per_channel)
+
+def _embedBand(task):
+    """Tác vụ của tiến trình con: giấu một dải"""
+    region_name, offset, num_pixels, payload_name, payload_size, bits_per_channel, start, stop = task
+    region_shm = shared_memory.SharedMemory(name=region_name)
+    payload_shm = shared_memory.SharedMemory(name=payload_name)
+    try:
+        _embedRange(region_shm.buf, offset, num_pixels, payload_shm.buf, payload_size, bits_per_channel, start,
+                    stop)
+    finally:
+        region_shm.close()
+        payload_shm.close()
+    return stop - start
+
+def _extractRange(region_buf, offset, num_pixels, output_buf, message_length, bits_per_channel, start, stop):
+    """Trích xuất các byte [start, stop) của thông điệp từ vùng dùng chung"""
+    region = np.ndarray((num_pixels, CHANNELS), dtype=np.uint8, buffer=region_buf, offset=offset)
+    output = np.ndarray((message_length,), dtype=np.uint8, buffer=output_buf)
+    bits_per_pixel = bits_per_channel * CHANNELS
+    padding = payloadPadding(message_length, bits_per_channel)
+    first_bit = padding + start * 8
+    last_bit = padding + stop * 8
+    first_pixel = first_bit // bits_per_pixel
+    bits = extractBits(region, first_pixel, -(-last_bit // bits_per_pixel) - first_pixel, bits_per_channel)
+    skip = first_bit - first_pixel * bits_per_pixel
+    output[start:stop] = np.packbits(bits[skip:skip + (stop - start) * 8])
+
+def _extractBand(task):
+    """Tác vụ của tiến trình con: trích xuất một dải byte"""
+    region_name, offset, num_pixels, output_name, message_length, bits_per_channel, start, stop = task
+    region_shm = shared_memory.SharedMemory(name=region_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    try:
+        _extractRange(region_shm.buf, offset, num_pixels, output_shm.buf, message_length, bits_per_channel, start,
+                      stop)
+    finally:
+        region_shm.close()
+        output_shm.close()
+    return stop - start
+
+def _sharedCopy(array):
+    """Tạo vùng nhớ dùng chung chứa bản sao của mảng (chỉ dùng cho thông điệp)"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm
+
+def embedParallel(image, payload, bits_per_channel=BITS_PER_CHANNEL, workers=None, header=None):
+    """
+    Giấu header và thông điệp vào ảnh, chia vùng pixel cho nhiều tiến trình
+    
+    Các tiến trình con ghi thẳng vào ảnh nên ảnh phải là SharedImage; mảng
+    thường được giấu trên một lõi thay vì chép vào rồi chép ra bộ nhớ dùng chung.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh, nên là SharedImage), được sửa trực tiếp
+        payload (bytes | numpy.ndarray): Thông điệp đã mã hóa thành byte
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        workers (int, optional): Số tiến trình (mặc định bằng số lõi CPU)
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        int: Số pixel đã ghi (bao gồm header)
+    """
+    payload = np.frombuffer(payload, dtype=np.uint8)
+    bits_per_pixel = bits_per_channel * CHANNELS
+    num_pixels = (payloadPadding(len(payload), bits_per_channel) + len(payload) * 8) // bits_per_pixel
+    bands = splitRange(num_pixels, workers or os.cpu_count() or 1, MIN_BAND_PIXELS)
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    start_pixel = len(header) // BITS_PER_PIXEL
+    flat = carrierPixels(image)
+    region = flat[start_pixel:start_pixel + num_pixels]
+    offset = sharedOffset(region)
+    if len(bands) <= 1 or offset is None:
+        return embedBytes(image, payload, bits_per_channel, header)
+    if start_pixel + num_pixels > len(flat):
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp")
+    embedBits(image, header)
+    
+    # Các tiến trình con ghi thẳng vào vùng pixel của ảnh, chỉ thông điệp được chép vào bộ nhớ dùng chung
+    payload_shm = _sharedCopy(payload)
+    try:
+        tasks = [(region.shm.name, offset, num_pixels, payload_shm.name, len(payload), bits_per_channel, start, stop)
+                 for start, stop in bands]
+        with ProcessPoolExecutor(max_workers=len(bands)) as executor:
+            list(executor.map(_embedBand, tasks))
+    finally:
+        payload_shm.close()
+        payload_shm.unlink()
+    return start_pixel + num_pixels
+
+def extractParallel(image, message_length, bits_per_channel=BITS_PER_CHANNEL, workers=None,
+                    start_pixel=HEADER_PIXELS):
+    """
+    Trích xuất thông điệp, chia các byte cần đọc cho nhiều tiến trình
+    
+    Các tiến trình con đọc thẳng từ ảnh nên ảnh phải là SharedImage; mảng
+    thường được đọc trên một lõi.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh, nên là SharedImage)
+        message_length (int): Độ dài thông điệp (byte) đọc từ header
+        bits_per_channel (int): Số bit LSB trên mỗi kênh đọc từ header
+        workers (int, optional): Số tiến trình (mặc định bằng số lõi CPU)
+        start_pixel (int): Pixel bắt đầu thông điệp (payload_pixel của header)
+        
+    Returns:
+        bytes: Thông điệp đã trích xuất
+    """
+    bits_per_pixel = bits_per_channel * CHANNELS
+    num_pixels = (payloadPadding(message_length, bits_per_channel) + message_length * 8) // bits_per_pixel
+    flat = carrierPixels(image)
+    bands = splitRange(message_length, workers or os.cpu_count() or 1, MIN_BAND_BYTES)
+    region = flat[start_pixel:start_pixel + num_pixels]
+    offset = sharedOffset(region)
+    if len(bands) <= 1 or start_pixel + num_pixels > len(flat) or offset is None:
+        return extractPayload(image, message_length, bits_per_channel, start_pixel)
+    
+    output_shm = shared_memory.SharedMemory(create=True, size=message_length)
+    try:
+        tasks = [(region.shm.name, offset, num_pixels, output_shm.name, message_length, bits_per_channel, start,
+                  stop) for start, stop in bands]
+        with ProcessPoolExecutor(max_workers=len(bands)) as executor:
+            list(executor.map(_extractBand, tasks))
+        return bytes(output_shm.buf[:message_length])
+    finally:
+        output_shm.close()
+        output_shm.unlink()
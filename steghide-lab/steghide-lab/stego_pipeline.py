@@ -0,0 +1,831 @@
+#!/usr/bin/env python3
+"""
+Quy trình giấu tin hoàn chỉnh trong một tiến trình
+
+Chức năng:
+    - API embed(cover, payload) -> stego và extract(stego) -> payload dùng trực tiếp từ Python
+    - Nơi duy nhất chọn cách giấu (embed: bộ nhớ đệm, cập nhật, sửa trực tiếp file, theo dải
+      hoặc trên mảng qua embedPayload) và cách đọc thông điệp (StegoSource);
+      các bước 3, 4, 5 chỉ thêm phần đọc/ghi file và in kết quả quanh các hàm này
+    - Chạy đủ 5 bước (chuẩn bị → chuyển đổi → giấu → trích xuất → kiểm tra) trong bộ nhớ,
+      chỉ giải mã ảnh gốc một lần và mã hóa ảnh kết quả một lần
+    - Giao diện dòng lệnh không cần nhập liệu tương tác
+    - Giấu bằng mã hóa ma trận Hamming (--matrix), bước trích xuất tự nhận ra từ header
+
+Ví dụ:
+    python3 stego_pipeline.py run image.jpg message.txt -o encrypted_image.png
+    python3 stego_pipeline.py embed image.jpg message.txt -o encrypted_image.png
+    python3 stego_pipeline.py embed huge.png message.txt --memory-budget 256
+    python3 stego_pipeline.py embed image.png log.txt -c lzma
+    python3 stego_pipeline.py embed image.png message.txt --matrix
+    python3 stego_pipeline.py extract encrypted_image.png -o extracted.txt
+    python3 stego_pipeline.py batch manifest.csv --report results.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from stego_cache import CACHE_OUTPUTS, outputKey
+from stego_capacity import capacityBytes
+from stego_codec import CODEC_AUTO, CODEC_NAMES, CODECS, compressPayload, decompressPayload, decompressToFile
+from stego_delta import deltaEmbed, deltaEmbedRaster, deltaPayload
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, CODEC_NONE, MAX_BITS_PER_CHANNEL,
+                          MIN_BITS_PER_CHANNEL, embedBytes, extractPayload, headerBits, imageChannels, payloadChecksum,
+                          readHeader, verifyChecksum)
+from stego_inplace import decodeRasterHeader, embedInPlace, extractRasterPayload, readRasterLayout
+from stego_matrix import MATRIX_BITS_PER_CHANNEL, matrixEmbed, matrixExtract, matrixOrder, matrixSamples
+from stego_parallel import MIN_BAND_PIXELS, SharedImage, embedParallel, extractParallel
+from stego_pixels import PIXELS_MAGIC, PixelBuffer, fileHash, loadPixels, readPixelsHeader
+from stego_scatter import KEY_ENV, embedScattered, extractScattered, keyFingerprint
+from stego_step5_verify import compare_messages
+from stego_tiled import DEFAULT_MEMORY_BUDGET, embedTiled
+from stego_timing import StageTimer
+
+# Định dạng mà cv2.imwrite ghi đúng từng bit với ảnh xám, màu và có alpha; các định dạng
+# khác (JPEG, WebP mặc định, ...) làm hỏng bit LSB nên thông điệp không trích xuất lại được
+LOSSLESS_EXTENSIONS = (".png", ".bmp", ".tif", ".tiff")
+
+# Các chế độ lưu ảnh: phần mở rộng và tham số của cv2.imwrite (đều không mất dữ liệu)
+SAVE_PROFILES = {
+    # Thiết lập mặc định của cv2
+    "default": (".png", []),
+    # Không nén, dùng cho ảnh trung gian
+    "store": (".png", [cv2.IMWRITE_PNG_COMPRESSION, 0]),
+    # Nén nhanh nhất, chỉ mã Huffman
+    "fast": (".png", [cv2.IMWRITE_PNG_COMPRESSION, 1, cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_HUFFMAN_ONLY]),
+    # Nén mạnh nhất, file nhỏ nhất
+    "small": (".png", [cv2.IMWRITE_PNG_COMPRESSION, 9, cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_DEFAULT]),
+    # WebP với chất lượng trên 100 là chế độ không mất dữ liệu
+    "webp": (".webp", [cv2.IMWRITE_WEBP_QUALITY, 101]),
+    # TIFF không nén (bước 4 đọc trực tiếp các pixel cần thiết)
+    "tiff": (".tiff", [cv2.IMWRITE_TIFF_COMPRESSION, 1]),
+}
+DEFAULT_PROFILE = "default"
+
+# Chế độ chỉ giữ đúng từng bit với ảnh 3 kênh: WebP đổi ảnh xám thành ảnh màu
+# và sửa màu của các pixel trong suốt
+COLOR_ONLY_PROFILES = ("webp",)
+
+# Mức nén zlib khi ghi PNG theo dải nếu chế độ không chỉ định
+DEFAULT_PNG_LEVEL = 6
+
+def asPixels(image, workers=None):
+    """
+    Chuẩn hóa đầu vào ảnh thành PixelBuffer
+    
+    Args:
+        image (str | numpy.ndarray | PixelBuffer): Đường dẫn ảnh hoặc file pixel trung gian,
+            mảng ảnh cv2 hoặc bộ đệm pixel
+        workers (int, optional): Số tiến trình sẽ xử lý ảnh; ảnh đủ lớn để chia dải được
+            nạp vào bộ nhớ dùng chung (SharedImage) ngay khi đọc từ file
+        
+    Returns:
+        PixelBuffer: Bộ đệm pixel (mảng được dùng trực tiếp, không sao chép; file pixel
+            trung gian được mở bằng memory map chế độ 'c')
+    """
+    if isinstance(image, PixelBuffer):
+        return image
+    if isinstance(image, np.ndarray):
+        return PixelBuffer(image)
+    with open(image, 'rb') as f:
+        pixels = loadPixels(image) if f.read(len(PIXELS_MAGIC)) == PIXELS_MAGIC else PixelBuffer.fromFile(image)
+    if workers and workers > 1 and len(pixels) >= 2 * MIN_BAND_PIXELS:
+        return PixelBuffer(SharedImage.fromArray(pixels.image))
+    return pixels
+
+def checkOutputFormat(filename, profile=DEFAULT_PROFILE):
+    """
+    Kiểm tra ảnh đầu ra dùng định dạng không mất dữ liệu
+    
+    Args:
+        filename (str): Đường dẫn ảnh đầu ra
+        profile (str): Chế độ lưu trong SAVE_PROFILES (phần mở rộng của chế độ luôn hợp lệ)
+        
+    Returns:
+        str: Đường dẫn hợp lệ
+        
+    Raises:
+        ValueError: Nếu phần mở rộng không thuộc LOSSLESS_EXTENSIONS hay chế độ lưu
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in LOSSLESS_EXTENSIONS and extension != SAVE_PROFILES[profile][0]:
+        raise ValueError(f"Định dạng {extension or '(không có phần mở rộng)'} của {filename} làm mất bit LSB, "
+                         f"hãy dùng {', '.join(LOSSLESS_EXTENSIONS)}")
+    return filename
+
+def profileLevel(profile):
+    """
+    Lấy mức nén PNG của một chế độ lưu (dùng khi ghi PNG theo dải)
+    
+    Args:
+        profile (str): Tên chế độ trong SAVE_PROFILES
+        
+    Returns:
+        int: Mức nén zlib (0-9)
+    """
+    params = SAVE_PROFILES[profile][1]
+    settings = dict(zip(params[::2], params[1::2]))
+    return settings.get(cv2.IMWRITE_PNG_COMPRESSION, DEFAULT_PNG_LEVEL)
+
+def writeImage(filename, image, profile=DEFAULT_PROFILE):
+    """
+    Lưu ảnh đã giấu tin với định dạng không mất dữ liệu
+    
+    Args:
+        filename (str): Đường dẫn ảnh đầu ra (phần mở rộng thuộc LOSSLESS_EXTENSIONS hoặc của chế độ lưu)
+        image (numpy.ndarray): Ảnh đã giấu tin theo thứ tự kênh của cv2
+        profile (str): Chế độ lưu trong SAVE_PROFILES
+        
+    Returns:
+        dict: profile, format, encode_seconds, file_bytes
+    """
+    params = SAVE_PROFILES[profile][1]
+    start = time.perf_counter()
+    if not cv2.imwrite(checkOutputFormat(filename, profile), image, params):
+        raise IOError(f"Không thể lưu ảnh {filename}")
+    return {
+        "profile": profile,
+        "format": os.path.splitext(filename)[1][1:].lower(),
+        "encode_seconds": time.perf_counter() - start,
+        "file_bytes": os.path.getsize(filename),
+    }
+
+def benchmarkProfiles(image, profiles=None):
+    """
+    Đo thời gian mã hóa và kích thước file của các chế độ lưu (mã hóa trong bộ nhớ)
+    
+    Args:
+        image (numpy.ndarray): Ảnh H×W, H×W×3 hoặc H×W×4 theo thứ tự kênh của cv2
+        profiles (list, optional): Các chế độ cần đo (mặc định tất cả chế độ giữ đúng số kênh của ảnh)
+        
+    Returns:
+        list: Mỗi phần tử gồm profile, format, encode_seconds, file_bytes
+    """
+    results = []
+    if profiles is None:
+        profiles = [profile for profile in SAVE_PROFILES
+                    if imageChannels(image) == CHANNELS or profile not in COLOR_ONLY_PROFILES]
+    for profile in profiles:
+        extension, params = SAVE_PROFILES[profile]
+        start = time.perf_counter()
+        ok, encoded = cv2.imencode(extension, image, params)
+        elapsed = time.perf_counter() - start
+        if ok:
+            results.append({
+                "profile": profile,
+                "format": extension[1:],
+                "encode_seconds": elapsed,
+                "file_bytes": len(encoded),
+            })
+    return results
+
+def encodePayload(payload):
+    """
+    Chuẩn hóa thông điệp thành byte
+    
+    Args:
+        payload (str | bytes): Thông điệp dạng văn bản (mã hóa UTF-8) hoặc byte
+        
+    Returns:
+        bytes: Thông điệp dạng byte
+    """
+    if isinstance(payload, str):
+        return payload.encode('utf-8')
+    return bytes(payload)
+
+class PreparedPayload:
+    """
+    Dữ liệu cần giấu (đã nén nếu có) cùng các trường của header mở rộng
+    
+    Attributes:
+        data (bytes | numpy.ndarray): Dữ liệu được giấu
+        codec (int): Mã codec nén
+        original_length (int): Độ dài thông điệp trước khi nén
+        checksum (int): CRC32 của data (None nếu không ghi)
+    """
+    
+    def __init__(self, data, codec=CODEC_NONE, original_length=None, checksum=None):
+        """
+        Args:
+            data (bytes | numpy.ndarray): Dữ liệu được giấu (ví dụ phần payload của bước 2)
+            codec (int): Mã codec nén của data
+            original_length (int, optional): Độ dài trước khi nén (mặc định bằng độ dài data)
+            checksum (int, optional): CRC32 của data
+        """
+        self.data = data
+        self.codec = codec
+        self.original_length = len(data) if original_length is None else original_length
+        self.checksum = checksum
+    
+    @classmethod
+    def fromMessage(cls, message, codec=CODEC_AUTO):
+        """
+        Nén thông điệp và tính CRC32 của dữ liệu được giấu
+        
+        Args:
+            message (str | bytes): Thông điệp cần giấu
+            codec (str): Codec nén (none, zlib, lzma hoặc auto)
+            
+        Returns:
+            PreparedPayload: Dữ liệu đã chuẩn bị
+        """
+        data = encodePayload(message)
+        codec_id, stored = compressPayload(data, codec)
+        return cls(stored, codec_id, len(data), payloadChecksum(stored))
+    
+    def header(self, bits_per_channel=BITS_PER_CHANNEL, matrix_order=0):
+        """
+        Tạo header cho dữ liệu
+        
+        Args:
+            bits_per_channel (int): Số bit LSB trên mỗi kênh
+            matrix_order (int): Bậc mã Hamming, 0 nếu giấu LSB thường
+            
+        Returns:
+            numpy.ndarray: Mảng bit header từ headerBits
+        """
+        return headerBits(len(self.data), bits_per_channel, self.codec, self.original_length, self.checksum,
+                          matrix_order)
+
+def rasterLayout(cover_path, output=None, key=None, matrix=False, band_rows=None, profile=DEFAULT_PROFILE,
+                 benchmark=False):
+    """
+    Bố cục pixel của ảnh gốc khi có thể giấu trực tiếp trên bản sao của file
+    
+    Chỉ dùng được khi ảnh gốc là BMP/PPM/TIFF không nén, ảnh đầu ra cùng
+    định dạng, thông điệp không rải theo khóa, không mã hóa ma trận, không
+    yêu cầu giấu theo dải và không chọn chế độ lưu khác mặc định hay đo các
+    chế độ lưu (bản sao không được mã hóa lại nên hai thiết lập này không có tác dụng).
+    
+    Args:
+        cover_path (str): Đường dẫn ảnh gốc
+        output (str, optional): Đường dẫn ảnh đầu ra (None nếu chưa chọn)
+        key (str, optional): Khóa rải thông điệp
+        matrix (bool): Giấu bằng mã hóa ma trận
+        band_rows (int, optional): Số hàng mỗi dải nếu yêu cầu giấu theo dải
+        profile (str): Chế độ lưu trong SAVE_PROFILES
+        benchmark (bool): Đo thời gian mã hóa của tất cả chế độ lưu
+        
+    Returns:
+        dict: Bố cục từ readRasterLayout, None nếu phải giải mã ảnh
+    """
+    if (key or matrix or band_rows is not None or profile != DEFAULT_PROFILE or benchmark
+            or not os.path.isfile(cover_path)):
+        return None
+    if output and os.path.splitext(output)[1].lower() != os.path.splitext(cover_path)[1].lower():
+        return None
+    return readRasterLayout(cover_path)
+
+def defaultOutput(cover_path, profile=DEFAULT_PROFILE, key=None, matrix=False, band_rows=None, benchmark=False):
+    """
+    Tên ảnh đầu ra mặc định: encrypted_<tên ảnh> với phần mở rộng của chế độ lưu,
+    hoặc giữ nguyên định dạng khi ảnh gốc được giấu trực tiếp trên bản sao (rasterLayout)
+    
+    Args:
+        cover_path (str): Đường dẫn ảnh gốc
+        profile (str): Chế độ lưu trong SAVE_PROFILES
+        key (str, optional): Khóa rải thông điệp
+        matrix (bool): Giấu bằng mã hóa ma trận
+        band_rows (int, optional): Số hàng mỗi dải nếu yêu cầu giấu theo dải
+        benchmark (bool): Đo thời gian mã hóa của tất cả chế độ lưu
+        
+    Returns:
+        str: Tên file đầu ra
+    """
+    if rasterLayout(cover_path, None, key, matrix, band_rows, profile, benchmark) is not None:
+        return "encrypted_" + os.path.basename(cover_path)
+    return "encrypted_" + os.path.splitext(os.path.basename(cover_path))[0] + SAVE_PROFILES[profile][0]
+
+def embed(cover, payload, bits_per_channel=BITS_PER_CHANNEL, workers=None, key=None, codec=CODEC_AUTO,
+          matrix=False, output=None, pixels=None, profile=DEFAULT_PROFILE, memory_budget=None, band_rows=None,
+          incremental=False, cache=None, benchmark=False, timer=None):
+    """
+    Giấu thông điệp vào ảnh gốc
+    
+    Đây là nơi duy nhất chọn cách giấu. Không có output, thông điệp được giấu
+    trên mảng ảnh (embedPayload). Có output, ảnh kết quả được ghi ra file theo
+    một trong các chế độ (mode trong báo cáo):
+        - cache: chép ảnh kết quả đã lưu khi ảnh gốc, dữ liệu và thiết lập giống hệt
+        - delta: cập nhật ảnh đã giấu tin có sẵn, chỉ sửa các pixel khác (dữ liệu không nén)
+        - in_place: ảnh BMP/PPM/TIFF không nén, chỉ sửa các byte cần thiết trong bản sao (rasterLayout)
+        - tiled: ảnh 3 kênh lớn hơn ngân sách bộ nhớ, giấu và ghi PNG theo từng dải
+        - array: giấu trên mảng ảnh rồi mã hóa một lần
+    
+    Args:
+        cover (str | numpy.ndarray | PixelBuffer): Ảnh gốc; mảng được truyền vào sẽ bị sửa trực tiếp
+        payload (str | bytes | PreparedPayload): Thông điệp cần giấu, hoặc dữ liệu đã nén kèm các trường header
+        bits_per_channel (int): Số bit LSB trên mỗi kênh (1-4), được ghi vào header
+        workers (int, optional): Số tiến trình dùng chung vùng pixel (mặc định một lõi)
+        key (str, optional): Khóa để rải thông điệp vào các pixel theo thứ tự giả ngẫu nhiên
+        codec (str): Codec nén thông điệp (none, zlib, lzma hoặc auto; auto là none khi incremental),
+            bỏ qua với PreparedPayload
+        matrix (bool): Giấu bằng mã hóa ma trận Hamming trên bit LSB (bỏ qua bits_per_channel và workers)
+        output (str, optional): Đường dẫn ảnh đầu ra
+        pixels (str | PixelBuffer, optional): Ảnh gốc đã giải mã (ví dụ file pixel trung gian của bước 1),
+            mặc định giải mã cover khi cần
+        profile (str): Chế độ lưu trong SAVE_PROFILES
+        memory_budget (int, optional): Ngân sách bộ nhớ (byte); ảnh lớn hơn được xử lý theo từng dải
+        band_rows (int, optional): Số hàng mỗi dải; nếu có thì luôn giấu theo dải (chỉ PNG 3 kênh)
+        incremental (bool): Cập nhật output nếu đã có, chỉ sửa header và các pixel khác
+        cache (StegoCache, optional): Bộ nhớ đệm ảnh kết quả
+        benchmark (bool): Đo thời gian mã hóa của tất cả chế độ lưu (chế độ array)
+        timer (StageTimer, optional): Bộ đo các giai đoạn
+        
+    Returns:
+        numpy.ndarray | dict: Ảnh đã giấu tin theo thứ tự kênh của cv2 nếu không có output, ngược lại
+            báo cáo gồm output_image, mode, pixel_count, channels, bits_per_channel, matrix_order,
+            header_pixels, warnings và số liệu của chế độ (delta, in_place, tiles, matrix, encode,
+            encode_benchmark, cache)
+    """
+    if not isinstance(payload, PreparedPayload):
+        # Chế độ cập nhật chỉ so sánh dữ liệu không nén: luồng nén thay đổi toàn bộ khi thông điệp thay đổi
+        payload = PreparedPayload.fromMessage(payload, CODEC_NAMES[CODEC_NONE] if incremental and codec == CODEC_AUTO
+                                              else codec)
+    if matrix:
+        bits_per_channel = MATRIX_BITS_PER_CHANNEL
+    if output is None:
+        pixels = asPixels(pixels if pixels is not None else cover, workers)
+        matrix_order = _matrixOrder(payload, len(pixels), pixels.channels) if matrix else 0
+        embedPayload(pixels, payload.data, payload.header(bits_per_channel, matrix_order), bits_per_channel,
+                     workers, key, matrix_order)
+        return pixels.image
+    
+    timer = timer or StageTimer("embed")
+    cover_path = cover if isinstance(cover, str) else None
+    pixels_path = pixels if isinstance(pixels, str) else None
+    layout = None
+    if cover_path:
+        with timer.stage("layout"):
+            layout = rasterLayout(cover_path, output, key, matrix, band_rows, profile, benchmark)
+    if layout is None:
+        with timer.stage("decode"):
+            pixels = asPixels(pixels if pixels is not None else cover, None if key or matrix else workers)
+        pixel_count, channels = len(pixels), pixels.channels
+        if channels != CHANNELS and profile in COLOR_ONLY_PROFILES:
+            raise ValueError(f"Chế độ lưu {profile} không giữ đúng ảnh {channels} kênh")
+        checkOutputFormat(output, profile)
+    else:
+        pixel_count, channels = layout['width'] * layout['height'], CHANNELS
+    
+    matrix_order = _matrixOrder(payload, pixel_count, channels) if matrix else 0
+    header = payload.header(bits_per_channel, matrix_order)
+    # Ghi PNG theo dải chỉ hỗ trợ ảnh 3 kênh
+    tiled = (layout is None and not key and not matrix and channels == CHANNELS
+             and output.lower().endswith(".png")
+             and (band_rows is not None or (memory_budget is not None and pixels.image.nbytes > memory_budget)))
+    report = {
+        "output_image": output,
+        "pixel_count": pixel_count,
+        "channels": channels,
+        "bits_per_channel": bits_per_channel,
+        "matrix_order": matrix_order,
+        "header_pixels": len(header) // BITS_PER_PIXEL,
+        "warnings": [],
+    }
+    
+    # Chế độ cập nhật so sánh luồng bit không nén trên mảng ảnh hoặc trên file không nén
+    if incremental and (payload.codec != CODEC_NONE or tiled or matrix):
+        report["warnings"].append("Chỉ cập nhật được thông điệp không nén, giấu LSB thường và ảnh không xử lý "
+                                  "theo dải, giấu lại toàn bộ")
+        incremental = False
+    report["mode"] = "delta" if incremental else "in_place" if layout else "tiled" if tiled else "array"
+    
+    # Cùng ảnh gốc, cùng dữ liệu và cùng thiết lập thì chép ảnh kết quả đã lưu, không giấu và mã hóa lại
+    cache_key = None
+    if cache and cache.enabled and cover_path and not benchmark and not incremental:
+        with timer.stage("cache"):
+            cover_hash = readPixelsHeader(pixels_path)['source_sha256'] if pixels_path else fileHash(cover_path)
+            cache_key = outputKey(cover_hash, hashlib.sha256(payload.data).hexdigest(), {
+                "bits_per_channel": bits_per_channel,
+                "channels": channels,
+                "codec": payload.codec,
+                "original_length": payload.original_length,
+                "checksum": payload.checksum,
+                "key_fingerprint": keyFingerprint(key),
+                "matrix_order": matrix_order,
+                "mode": report["mode"],
+                "profile": profile,
+                "extension": os.path.splitext(output)[1],
+            })
+            if cache.lookup(CACHE_OUTPUTS, cache_key) is not None and cache.copy(CACHE_OUTPUTS, cache_key, output):
+                report.update({"mode": "cache", "cache": "hit"})
+                return report
+    
+    if incremental:
+        # Byte 0 bù ở cuối giữ các byte không đổi ở nguyên vị trí pixel, chỉ các pixel khác bị ghi
+        data, header = deltaPayload(bytes(payload.data), bits_per_channel)
+        report["previous"] = os.path.exists(output)
+        with timer.stage("delta"):
+            if layout is not None:
+                if not report["previous"]:
+                    shutil.copyfile(cover_path, output)
+                target = readRasterLayout(output)
+                if target is None or (target['width'], target['height']) != (layout['width'], layout['height']):
+                    raise ValueError(f"{output} không cùng kích thước với ảnh gốc {cover_path}")
+                report["delta"] = deltaEmbedRaster(output, target, data, bits_per_channel, header)
+            else:
+                image = PixelBuffer.fromFile(output).image if report["previous"] else pixels.image
+                if image.shape != pixels.image.shape:
+                    raise ValueError(f"{output} không cùng kích thước với ảnh gốc {cover_path or ''}".rstrip())
+                report["delta"] = deltaEmbed(image, data, bits_per_channel, header, key)
+        if layout is None:
+            with timer.stage("encode"):
+                report["encode"] = writeImage(output, image, profile)
+    elif layout is not None:
+        with timer.stage("embed"):
+            report["in_place"] = embedInPlace(cover_path, output, payload.data, bits_per_channel, layout, header)
+    elif tiled:
+        # Mỗi dải được giấu tin ngay trước khi mã hóa nên hai giai đoạn được đo chung
+        start = time.perf_counter()
+        with timer.stage("encode"):
+            report["tiles"] = embedTiled(pixels.image, payload.data, output, bits_per_channel,
+                                         memory_budget or DEFAULT_MEMORY_BUDGET, band_rows, profileLevel(profile),
+                                         header)
+        report["encode"] = {
+            "profile": profile,
+            "format": "png",
+            "encode_seconds": time.perf_counter() - start,
+            "file_bytes": os.path.getsize(output),
+        }
+    else:
+        with timer.stage("embed"):
+            matrix_stats = embedPayload(pixels, payload.data, header, bits_per_channel, workers, key, matrix_order)
+        if matrix_stats:
+            report["matrix"] = matrix_stats
+        with timer.stage("encode"):
+            report["encode"] = writeImage(output, pixels.image, profile)
+        if benchmark:
+            with timer.stage("benchmark"):
+                report["encode_benchmark"] = benchmarkProfiles(pixels.image)
+    
+    if cache_key:
+        with timer.stage("cache_store"):
+            cache.store(CACHE_OUTPUTS, cache_key, output)
+        report["cache"] = "miss"
+    return report
+
+def _matrixOrder(payload, pixel_count, channels):
+    """Bậc mã Hamming lớn nhất mà dữ liệu vừa với số kênh của ảnh"""
+    order = matrixOrder(len(payload.data), matrixSamples(pixel_count, channels))
+    if order is None:
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp bằng mã hóa ma trận")
+    return order
+
+def embedPayload(cover, data, header, bits_per_channel=BITS_PER_CHANNEL, workers=None, key=None, matrix_order=0):
+    """
+    Giấu dữ liệu đã chuẩn bị (đã nén, đã có header) vào mảng ảnh
+    
+    Chọn cách giấu theo thiết lập: mã hóa ma trận, rải theo khóa, nhiều tiến
+    trình hoặc tuần tự trên một lõi.
+    
+    Args:
+        cover (str | numpy.ndarray | PixelBuffer): Ảnh gốc; mảng được sửa trực tiếp
+        data (bytes | numpy.ndarray): Dữ liệu cần giấu (sau khi nén)
+        header (numpy.ndarray): Header từ headerBits (ghi matrix_order nếu dùng mã hóa ma trận)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh
+        workers (int, optional): Số tiến trình dùng chung vùng pixel (mặc định một lõi)
+        key (str, optional): Khóa để rải thông điệp vào các pixel theo thứ tự giả ngẫu nhiên
+        matrix_order (int): Bậc mã Hamming, 0 nếu giấu LSB thường
+        
+    Returns:
+        dict: Số liệu của matrixEmbed khi dùng mã hóa ma trận, None với giấu LSB thường
+    """
+    pixels = asPixels(cover, None if key or matrix_order else workers)
+    capacity = capacityBytes(pixels.width, pixels.height, bits_per_channel, pixels.channels,
+                             len(header) // BITS_PER_PIXEL)
+    if len(data) > capacity:
+        raise ValueError(f"Ảnh không đủ lớn để chứa thông điệp ({len(data)} > {capacity} byte)")
+    if matrix_order:
+        return matrixEmbed(pixels.image, data, matrix_order, header, key)
+    if key:
+        embedScattered(pixels.image, data, key, bits_per_channel, header)
+    elif workers and workers > 1:
+        embedParallel(pixels.image, data, bits_per_channel, workers, header)
+    else:
+        embedBytes(pixels.image, data, bits_per_channel, header)
+    return None
+
+class StegoSource:
+    """
+    Ảnh đã giấu tin cần trích xuất
+    
+    File BMP/PPM/TIFF không nén (khi không có khóa) chỉ được đọc header của
+    file và các byte chứa thông điệp; ảnh khác, thông điệp rải theo khóa hoặc
+    mã hóa ma trận cần cả mảng pixel nên ảnh được giải mã (một lần, khi cần).
+    """
+    
+    def __init__(self, stego, key=None, workers=None):
+        """
+        Args:
+            stego (str | numpy.ndarray | PixelBuffer): Ảnh đã giấu tin
+            key (str, optional): Khóa đã dùng để rải thông điệp khi giấu
+            workers (int, optional): Số tiến trình sẽ đọc thông điệp (ảnh lớn được giải mã vào bộ nhớ dùng chung)
+        """
+        self.stego = stego
+        self.key = key
+        self.workers = None if key else workers
+        self.layout = readRasterLayout(stego) if isinstance(stego, str) and not key else None
+        self._pixels = None
+        if self.layout is None:
+            self.width, self.height, self.channels = self.pixels.width, self.pixels.height, self.pixels.channels
+        else:
+            self.width, self.height, self.channels = self.layout['width'], self.layout['height'], CHANNELS
+    
+    @property
+    def pixels(self):
+        """Bộ đệm pixel của ảnh, chỉ giải mã ở lần dùng đầu tiên"""
+        if self._pixels is None:
+            self._pixels = asPixels(self.stego, self.workers)
+        return self._pixels
+    
+    def readHeader(self):
+        """
+        Đọc header cũ hoặc mở rộng từ các pixel đầu tiên
+        
+        Returns:
+            dict: Thông tin header như readHeader của stego_engine
+        """
+        if self.layout is None:
+            return readHeader(self.pixels.image)
+        return decodeRasterHeader(self.stego, self.layout)
+    
+    def checkLength(self, header):
+        """
+        Kiểm tra độ dài trong header vừa với số pixel còn lại sau header
+        
+        Args:
+            header (dict): Thông tin header từ readHeader
+            
+        Returns:
+            int: Dung lượng tối đa (byte)
+            
+        Raises:
+            ValueError: Nếu độ dài bằng 0 hoặc vượt quá dung lượng
+        """
+        capacity = capacityBytes(self.width, self.height, header['bits_per_channel'], self.channels,
+                                 header['payload_pixel'])
+        if header['message_length'] <= 0 or header['message_length'] > capacity:
+            raise ValueError(f"Độ dài thông điệp không hợp lệ ({header['message_length']}, tối đa {capacity} byte)")
+        return capacity
+    
+    def readPayload(self, header, workers=None):
+        """
+        Đọc dữ liệu đã lưu (chưa giải nén, chưa kiểm tra CRC32) theo header
+        
+        Args:
+            header (dict): Thông tin header từ readHeader
+            workers (int, optional): Số tiến trình dùng chung vùng pixel (mặc định một lõi)
+            
+        Returns:
+            bytes: Dữ liệu đã trích xuất
+        """
+        self.checkLength(header)
+        message_length = header['message_length']
+        bits_per_channel = header['bits_per_channel']
+        start_pixel = header['payload_pixel']
+        if header['matrix_order']:
+            return matrixExtract(self.pixels.image, message_length, header['matrix_order'], start_pixel, self.key)
+        if self.key:
+            return extractScattered(self.pixels.image, message_length, self.key, bits_per_channel, start_pixel)
+        if self.layout is not None:
+            return extractRasterPayload(self.stego, self.layout, message_length, bits_per_channel, start_pixel)
+        if workers and workers > 1:
+            return extractParallel(self.pixels.image, message_length, bits_per_channel, workers, start_pixel)
+        return extractPayload(self.pixels.image, message_length, bits_per_channel, start_pixel)
+
+def extract(stego, workers=None, key=None, output=None):
+    """
+    Trích xuất thông điệp từ ảnh đã giấu tin
+    
+    Args:
+        stego (str | numpy.ndarray | PixelBuffer): Ảnh đã giấu tin
+        workers (int, optional): Số tiến trình dùng chung vùng pixel (mặc định một lõi)
+        key (str, optional): Khóa đã dùng để rải thông điệp khi giấu
+        output (str, optional): File để giải nén thông điệp thẳng vào theo từng khối
+        
+    Returns:
+        bytes | bytearray | int: Thông điệp đã trích xuất (đã giải nén nếu header ghi codec,
+            đã kiểm tra CRC32 nếu có), hoặc số byte đã ghi nếu có output
+    """
+    source = StegoSource(stego, key, workers)
+    header = source.readHeader()
+    payload = source.readPayload(header, workers)
+    if verifyChecksum(header, payload) is False:
+        raise ValueError(f"CRC32 của thông điệp không khớp với header ({header['checksum']:08x})")
+    if output:
+        return decompressToFile(payload, header['codec'], output, header['original_length'])
+    return decompressPayload(payload, header['codec'], header['original_length'])
+
+def run(cover_path, message_path, output_image=None, bits_per_channel=BITS_PER_CHANNEL, workers=None,
+        key=None, codec=CODEC_AUTO, matrix=False):
+    """
+    Chạy đủ 5 bước trong một tiến trình mà không tạo file trung gian
+    
+    Args:
+        cover_path (str): Đường dẫn ảnh gốc
+        message_path (str): Đường dẫn file thông điệp
+        output_image (str, optional): Đường dẫn lưu ảnh đã giấu tin (PNG, BMP hoặc TIFF)
+        bits_per_channel (int): Số bit LSB trên mỗi kênh (1-4)
+        workers (int, optional): Số tiến trình khi giấu và trích xuất
+        key (str, optional): Khóa để rải thông điệp theo thứ tự giả ngẫu nhiên
+        codec (str): Codec nén thông điệp (none, zlib, lzma hoặc auto)
+        matrix (bool): Giấu bằng mã hóa ma trận Hamming
+        
+    Returns:
+        dict: Báo cáo gồm thông tin ảnh, thông điệp và kết quả so sánh
+    """
+    # Ảnh lưu bằng định dạng mất dữ liệu sẽ khác mảng trong bộ nhớ, nên bị từ chối trước khi giấu
+    if output_image:
+        checkOutputFormat(output_image)
+    
+    # Bước 1: chuẩn bị (giải mã ảnh gốc một lần duy nhất, vào bộ nhớ dùng chung nếu chia nhiều tiến trình)
+    pixels = asPixels(cover_path, None if key or matrix else workers)
+    with open(message_path, 'r', encoding='utf-8') as f:
+        message = f.read()
+    
+    # Bước 2 + 3: chuyển đổi và giấu tin trên cùng mảng ảnh
+    payload = encodePayload(message)
+    embed(pixels, payload, bits_per_channel, workers, key, codec, matrix)
+    
+    # Mã hóa ảnh kết quả một lần duy nhất
+    if output_image:
+        writeImage(output_image, pixels.image)
+    
+    # Bước 4: trích xuất từ mảng trong bộ nhớ (định dạng không mất dữ liệu nên giống hệt file)
+    extracted = extract(pixels, workers, key).decode('utf-8', errors='replace')
+    
+    # Bước 5: kiểm tra
+    comparison = compare_messages(message, extracted)
+    
+    return {
+        "image_info": {
+            "path": cover_path,
+            "pixel_count": len(pixels),
+            "height": pixels.height,
+            "width": pixels.width,
+            "channels": pixels.channels,
+            "capacity_bytes": capacityBytes(pixels.width, pixels.height, bits_per_channel, pixels.channels)
+        },
+        "message_info": {
+            "path": message_path,
+            "length": len(message),
+            "bytes": len(payload)
+        },
+        "stego": {
+            "output_image": output_image,
+            "bits_per_channel": bits_per_channel,
+            "codec": codec,
+            "scatter": bool(key),
+            "matrix": matrix
+        },
+        "comparison": comparison,
+        "status": "Success" if comparison["match"] else "Partial Success"
+    }
+
+def _cmdRun(args):
+    """Lệnh 'run': chạy cả 5 bước và in kết quả"""
+    report = run(args.cover, args.message, args.output, args.bits_per_channel, args.jobs, args.key, args.codec,
+                 args.matrix)
+    comparison = report["comparison"]
+    print(f"- Ảnh: {args.cover} ({report['image_info']['width']}x{report['image_info']['height']})")
+    print(f"- Thông điệp: {report['message_info']['length']} ký tự ({report['message_info']['bytes']} byte)")
+    if args.output:
+        print(f"- Ảnh đã giấu tin: {args.output}")
+    print(f"- Tỷ lệ giống nhau: {comparison['diff_ratio'] * 100:.2f}%")
+    print(f"- Kết quả: {'TRÙNG KHỚP HOÀN TOÀN ✓' if comparison['match'] else 'KHÔNG TRÙNG KHỚP ✗'}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if comparison["match"] else 1
+
+def _cmdEmbed(args):
+    """Lệnh 'embed': giấu file thông điệp vào ảnh"""
+    with open(args.message, 'rb') as f:
+        payload = f.read()
+    output = args.output or defaultOutput(args.cover, key=args.key, matrix=args.matrix, band_rows=args.band_rows)
+    memory_budget = int(args.memory_budget * 1e6) if args.memory_budget else None
+    report = embed(args.cover, payload, args.bits_per_channel, args.jobs, args.key, args.codec, args.matrix,
+                   output=output, memory_budget=memory_budget, band_rows=args.band_rows)
+    for warning in report["warnings"]:
+        print(f"Cảnh báo: {warning}")
+    if "tiles" in report:
+        tiles = report["tiles"]
+        print(f"Đã sửa {tiles['bands_modified']}/{tiles['bands']} dải ({tiles['band_rows']} hàng mỗi dải)")
+    print(f"Đã giấu {len(payload)} byte vào: {output}")
+    return 0
+
+def _cmdExtract(args):
+    """Lệnh 'extract': trích xuất thông điệp ra file hoặc stdout"""
+    if args.output:
+        written = extract(args.stego, args.jobs, args.key, args.output)
+        print(f"Đã trích xuất {written} byte vào: {args.output}")
+    else:
+        sys.stdout.buffer.write(extract(args.stego, args.jobs, args.key))
+    return 0
+
+def _cmdBatch(args):
+    """Lệnh 'batch': xử lý hàng loạt theo manifest (xem stego_batch)"""
+    from stego_batch import cmdBatch
+    return cmdBatch(args)
+
+def _addBitsArgument(cmd):
+    """Thêm tùy chọn số bit LSB trên mỗi kênh cho một lệnh"""
+    cmd.add_argument("-b", "--bits-per-channel", type=int, default=BITS_PER_CHANNEL,
+                     choices=range(MIN_BITS_PER_CHANNEL, MAX_BITS_PER_CHANNEL + 1),
+                     help=f"Số bit LSB trên mỗi kênh (mặc định {BITS_PER_CHANNEL})")
+
+def _addJobsArgument(cmd, help="Số tiến trình dùng chung vùng pixel của một ảnh (mặc định 1)"):
+    """Thêm tùy chọn số tiến trình cho một lệnh"""
+    cmd.add_argument("-j", "--jobs", type=int, help=help)
+
+def _addKeyArgument(cmd):
+    """Thêm tùy chọn khóa rải thông điệp cho một lệnh"""
+    cmd.add_argument("-k", "--key", default=os.environ.get(KEY_ENV),
+                     help=f"Khóa để rải thông điệp vào các pixel theo thứ tự giả ngẫu nhiên "
+                          f"(mặc định biến môi trường {KEY_ENV})")
+
+def _addCodecArgument(cmd):
+    """Thêm tùy chọn codec nén thông điệp cho một lệnh"""
+    cmd.add_argument("-c", "--codec", default=CODEC_AUTO, choices=[*CODECS, CODEC_AUTO],
+                     help=f"Codec nén thông điệp (mặc định {CODEC_AUTO}: chọn kết quả nhỏ nhất)")
+
+def _addMatrixArgument(cmd):
+    """Thêm tùy chọn mã hóa ma trận cho một lệnh"""
+    cmd.add_argument("--matrix", action="store_true",
+                     help="Giấu bằng mã hóa ma trận Hamming: ít kênh bị sửa hơn trên mỗi bit thông điệp")
+
+def buildParser():
+    """
+    Tạo bộ phân tích tham số dòng lệnh
+    
+    Returns:
+        argparse.ArgumentParser: Bộ phân tích với các lệnh run, embed, extract, batch
+    """
+    parser = argparse.ArgumentParser(description="Giấu tin LSB trong ảnh trong một tiến trình")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    cmd = commands.add_parser("run", help="Chạy cả 5 bước trong bộ nhớ")
+    cmd.add_argument("cover", help="Ảnh gốc")
+    cmd.add_argument("message", help="File thông điệp (UTF-8)")
+    cmd.add_argument("-o", "--output", help="Lưu ảnh đã giấu tin: PNG, BMP hoặc TIFF (mặc định không ghi file)")
+    cmd.add_argument("--report", help="Lưu báo cáo JSON")
+    _addBitsArgument(cmd)
+    _addJobsArgument(cmd)
+    _addKeyArgument(cmd)
+    _addCodecArgument(cmd)
+    _addMatrixArgument(cmd)
+    cmd.set_defaults(func=_cmdRun)
+    
+    cmd = commands.add_parser("embed", help="Giấu thông điệp vào ảnh")
+    cmd.add_argument("cover", help="Ảnh gốc")
+    cmd.add_argument("message", help="File thông điệp")
+    cmd.add_argument("-o", "--output", help="Ảnh đầu ra PNG, BMP hoặc TIFF (mặc định encrypted_<tên ảnh>.png, "
+                                            "giữ nguyên định dạng với BMP/PPM/TIFF không nén)")
+    _addBitsArgument(cmd)
+    cmd.add_argument("--memory-budget", type=float, help="Giấu và ghi PNG theo từng dải với ngân sách bộ nhớ (MB)")
+    cmd.add_argument("--band-rows", type=int, help="Số hàng mỗi dải khi giấu theo dải")
+    _addJobsArgument(cmd)
+    _addKeyArgument(cmd)
+    _addCodecArgument(cmd)
+    _addMatrixArgument(cmd)
+    cmd.set_defaults(func=_cmdEmbed)
+    
+    cmd = commands.add_parser("extract", help="Trích xuất thông điệp từ ảnh")
+    cmd.add_argument("stego", help="Ảnh đã giấu tin")
+    cmd.add_argument("-o", "--output", help="File lưu thông điệp (mặc định in ra stdout)")
+    _addJobsArgument(cmd)
+    _addKeyArgument(cmd)
+    cmd.set_defaults(func=_cmdExtract)
+    
+    cmd = commands.add_parser("batch", help="Giấu và trích xuất hàng loạt theo manifest")
+    cmd.add_argument("manifest", help="File CSV hoặc JSONL với các cột cover, payload, output "
+                                      "(và bits_per_channel, key, codec, matrix tùy chọn)")
+    cmd.add_argument("--report", default="stego_batch.jsonl", help="File JSONL ghi kết quả từng mục")
+    _addJobsArgument(cmd, "Số tiến trình xử lý các mục (mặc định bằng số lõi CPU)")
+    _addBitsArgument(cmd)
+    _addCodecArgument(cmd)
+    _addMatrixArgument(cmd)
+    cmd.set_defaults(func=_cmdBatch)
+    return parser
+
+def main(argv=None):
+    """
+    Hàm chính
+    """
+    args = buildParser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (IOError, ValueError) as e:
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
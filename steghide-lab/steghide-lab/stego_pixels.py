@@ -0,0 +1,236 @@
+"""
+Bộ đệm pixel dùng chung cho các bước giấu tin
+
+Chức năng:
+    - Bọc mảng ảnh numpy của cv2 mà không sao chép dữ liệu
+    - Chuyển đổi giữa chỉ số phẳng và vị trí (hàng, cột) của pixel
+    - Cung cấp góc nhìn theo thứ tự kênh R, G, B như các bước vẫn dùng
+    - Giữ nguyên số kênh của ảnh gốc: xám (1 kênh), màu (3 kênh) hoặc có alpha (4 kênh)
+    - Lưu và mở file pixel trung gian (header nhỏ + dữ liệu thô) bằng memory map
+"""
+
+import hashlib
+import json
+import struct
+
+import cv2
+import numpy as np
+
+from stego_engine import CARRIER_CHANNELS, CHANNELS, imageChannels
+
+# File pixel trung gian: magic + độ dài header (uint32) + header JSON + dữ liệu thô.
+# Dữ liệu thô bắt đầu ở ranh giới trang để memory map chỉ chạm các trang cần thiết.
+PIXELS_MAGIC = b'STEGOPX1'
+PIXELS_ALIGNMENT = 4096
+
+# Tên loại ảnh theo số kênh
+CHANNEL_NAMES = {1: "xám", 3: "màu", 4: "màu có alpha"}
+
+def loadedChannels(channels, bit_depth=8):
+    """
+    Số kênh của ảnh sau PixelBuffer.fromFile khi cv2 giải mã file thành channels kênh
+    
+    Args:
+        channels (int): Số kênh cv2 giải mã được với IMREAD_UNCHANGED
+        bit_depth (int): Số bit mỗi kênh của ảnh đã giải mã
+        
+    Returns:
+        int: channels nếu ảnh 8 bit có 1, 3 hoặc 4 kênh, ngược lại 3 (ảnh được đọc lại thành ảnh màu)
+    """
+    return channels if bit_depth == 8 and channels in CARRIER_CHANNELS else CHANNELS
+
+class PixelBuffer:
+    """
+    Danh sách pixel gọn nhẹ dựa trên mảng ảnh uint8 của cv2
+    
+    Mỗi pixel vẫn được đánh chỉ số phẳng theo thứ tự hàng như danh sách
+    [row, col, R, G, B] trước đây, nhưng dữ liệu chỉ nằm trong một mảng
+    numpy duy nhất (1, 3 hoặc 4 byte mỗi pixel tùy số kênh).
+    
+    Attributes:
+        image (numpy.ndarray): Mảng ảnh H×W (xám), H×W×3 (B, G, R) hoặc H×W×4 (B, G, R, A) của cv2
+    """
+    
+    def __init__(self, image):
+        """
+        Args:
+            image (numpy.ndarray): Ảnh H×W, H×W×3 hoặc H×W×4 uint8 của cv2 (không bị sao chép)
+        """
+        if image.dtype != np.uint8 or image.ndim not in (2, 3) or imageChannels(image) not in CARRIER_CHANNELS:
+            raise ValueError(f"Ảnh phải là mảng H×W, H×W×3 hoặc H×W×4 uint8, nhận được {image.dtype} {image.shape}")
+        self.image = image
+    
+    @classmethod
+    def fromFile(cls, filename):
+        """
+        Đọc ảnh từ file vào bộ đệm pixel, giữ nguyên kênh alpha và ảnh xám
+        
+        Ảnh có độ sâu khác 8 bit (ví dụ PNG 16 bit) được đọc lại như trước
+        thành ảnh màu 3 kênh 8 bit.
+        
+        Args:
+            filename (str): Tên file ảnh cần đọc
+            
+        Returns:
+            PixelBuffer: Bộ đệm chứa ảnh đã giải mã
+        """
+        image = cv2.imread(filename, cv2.IMREAD_UNCHANGED)
+        if image is not None and image.ndim == 3 and image.shape[2] == 1:
+            image = image[..., 0]
+        if image is not None and (image.dtype != np.uint8 or
+                                  loadedChannels(imageChannels(image)) != imageChannels(image)):
+            image = cv2.imread(filename)
+        if image is None:
+            raise ValueError(f"Không thể giải mã ảnh {filename}")
+        return cls(image)
+    
+    @property
+    def height(self):
+        return self.image.shape[0]
+    
+    @property
+    def width(self):
+        return self.image.shape[1]
+    
+    @property
+    def channels(self):
+        """int: Số kênh của ảnh (1, 3 hoặc 4)"""
+        return imageChannels(self.image)
+    
+    @property
+    def flat(self):
+        """numpy.ndarray: Góc nhìn (số pixel, số kênh) theo thứ tự kênh của cv2, không sao chép"""
+        return self.image.reshape(-1, self.channels)
+    
+    @property
+    def rgb(self):
+        """numpy.ndarray: Góc nhìn H×W×3 theo thứ tự R, G, B (bỏ alpha), không sao chép; ảnh xám giữ nguyên H×W"""
+        return self.image if self.image.ndim == 2 else self.image[..., 2::-1]
+    
+    def position(self, index):
+        """
+        Chuyển chỉ số phẳng thành vị trí (hàng, cột)
+        
+        Args:
+            index (int): Chỉ số phẳng của pixel
+            
+        Returns:
+            tuple: (row, col)
+        """
+        if index < 0:
+            index += len(self)
+        return divmod(index, self.width)
+    
+    def index(self, row, col):
+        """
+        Chuyển vị trí (hàng, cột) thành chỉ số phẳng
+        
+        Args:
+            row (int): Hàng của pixel
+            col (int): Cột của pixel
+            
+        Returns:
+            int: Chỉ số phẳng của pixel
+        """
+        return row * self.width + col
+    
+    def __len__(self):
+        return self.height * self.width
+    
+    def __getitem__(self, index):
+        """
+        Trả về pixel theo định dạng [row, col, R, G, B] như danh sách cũ
+        
+        Ảnh xám lặp lại độ sáng ở cả ba kênh; kênh alpha (nếu có) được thêm vào cuối.
+        
+        Args:
+            index (int): Chỉ số phẳng của pixel (cho phép chỉ số âm)
+            
+        Returns:
+            list: [row, col, R, G, B] hoặc [row, col, R, G, B, A]
+        """
+        row, col = self.position(index)
+        if not 0 <= row < self.height:
+            raise IndexError("Chỉ số pixel vượt quá kích thước ảnh")
+        if self.image.ndim == 2:
+            value = self.image[row, col]
+            return [row, col, value, value, value]
+        b, g, r = self.image[row, col, :3]
+        return [row, col, r, g, b] + list(self.image[row, col, 3:])
+
+def fileHash(filename, chunk_size=1 << 20):
+    """
+    Tính SHA-256 của file theo từng khối
+    
+    Args:
+        filename (str): Đường dẫn file
+        chunk_size (int): Kích thước mỗi khối đọc
+        
+    Returns:
+        str: Chuỗi hex SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def savePixels(pixels, filename, source_hash=None):
+    """
+    Lưu bộ đệm pixel thành file trung gian có thể memory map
+    
+    Args:
+        pixels (PixelBuffer): Bộ đệm pixel cần lưu
+        filename (str): Đường dẫn file đầu ra
+        source_hash (str, optional): SHA-256 của file ảnh gốc
+    """
+    image = np.ascontiguousarray(pixels.image)
+    header = json.dumps({
+        "shape": list(image.shape),
+        "dtype": image.dtype.str,
+        "source_sha256": source_hash,
+    }).encode('utf-8')
+    prefix = len(PIXELS_MAGIC) + 4 + len(header)
+    header += b' ' * ((-prefix) % PIXELS_ALIGNMENT)
+    
+    with open(filename, 'wb') as f:
+        f.write(PIXELS_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(memoryview(image).cast('B'))
+
+def readPixelsHeader(filename):
+    """
+    Đọc header của file pixel trung gian mà không đọc dữ liệu pixel
+    
+    Args:
+        filename (str): Đường dẫn file pixel
+        
+    Returns:
+        dict: shape, dtype, source_sha256 và offset của dữ liệu thô
+    """
+    with open(filename, 'rb') as f:
+        if f.read(len(PIXELS_MAGIC)) != PIXELS_MAGIC:
+            raise ValueError(f"{filename} không phải file pixel trung gian")
+        (header_length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    header['shape'] = tuple(header['shape'])
+    header['offset'] = len(PIXELS_MAGIC) + 4 + header_length
+    return header
+
+def loadPixels(filename, mode='c'):
+    """
+    Mở file pixel trung gian bằng memory map, không đọc toàn bộ dữ liệu
+    
+    Args:
+        filename (str): Đường dẫn file pixel
+        mode (str): Chế độ của numpy.memmap; 'c' (mặc định) cho phép sửa
+            trong bộ nhớ mà không ghi ngược vào file
+            
+    Returns:
+        PixelBuffer: Bộ đệm pixel dựa trên memory map
+    """
+    header = readPixelsHeader(filename)
+    image = np.memmap(filename, dtype=np.dtype(header['dtype']), mode=mode,
+                      offset=header['offset'], shape=header['shape'])
+    return PixelBuffer(image)
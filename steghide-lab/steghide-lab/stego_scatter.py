@@ -0,0 +1,181 @@
+"""
+Rải thông điệp vào các pixel theo thứ tự giả ngẫu nhiên phụ thuộc khóa
+
+Chức năng:
+    - Hoán vị các pixel sau header bằng mạng Feistel có khóa (kèm cycle-walking)
+    - Tính vị trí của từng phần thông điệp trực tiếp từ chỉ số, không tạo cả hoán vị
+    - Giấu và trích xuất theo từng khối vị trí bằng các phép toán mảng, bộ nhớ O(thông điệp)
+    - Khóa chỉ được nhập khi chạy (hoặc lấy từ biến môi trường), file JSON chỉ lưu dấu vân tay của khóa
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, HEADER_PIXELS, bitsToSymbols,
+                          carrierPixels, embedBits, headerBits, lsbBits, lsbMask, payloadPadding, symbolsToBits)
+from stego_tiled import payloadBits
+
+# Số vòng Feistel và số vị trí được tính trong mỗi khối
+SCATTER_ROUNDS = 6
+SCATTER_CHUNK = 1 << 20
+
+# Biến môi trường chứa khóa rải thông điệp, dùng thay cho việc nhập khóa ở mỗi bước
+KEY_ENV = "STEGO_KEY"
+
+# Hằng số nhân của hàm trộn splitmix64
+MIX_MULTIPLIERS = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9))
+
+def scatterKeys(key):
+    """
+    Sinh khóa cho từng vòng Feistel từ khóa người dùng
+    
+    Args:
+        key (str | bytes): Khóa bí mật
+        
+    Returns:
+        numpy.ndarray: SCATTER_ROUNDS khóa vòng uint64
+    """
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    digest = hashlib.sha512(b'stego-scatter' + key).digest()
+    return np.frombuffer(digest[:8 * SCATTER_ROUNDS], dtype='<u8').astype(np.uint64)
+
+def keyFingerprint(key):
+    """
+    Dấu vân tay ngắn của khóa, lưu vào JSON để kiểm tra khóa nhập lại ở bước sau mà không lưu khóa
+    
+    Args:
+        key (str | bytes): Khóa bí mật
+        
+    Returns:
+        str: 16 ký tự hex đầu của SHA-256 (tách miền với scatterKeys), None nếu không có khóa
+    """
+    if not key:
+        return None
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return hashlib.sha256(b'stego-key-fingerprint' + key).hexdigest()[:16]
+
+def readKey(prompt):
+    """
+    Lấy khóa rải thông điệp từ biến môi trường STEGO_KEY, nếu không có thì hỏi người dùng
+    
+    Args:
+        prompt (str): Câu hỏi khi phải nhập khóa
+        
+    Returns:
+        str: Khóa, None nếu để trống
+    """
+    return os.environ.get(KEY_ENV) or input(prompt).strip() or None
+
+def _round(values, round_key, half_mask):
+    """Hàm vòng Feistel: trộn nửa phải với khóa vòng (splitmix64)"""
+    x = (values ^ round_key) * MIX_MULTIPLIERS[0]
+    x ^= x >> np.uint64(29)
+    x *= MIX_MULTIPLIERS[1]
+    x ^= x >> np.uint64(32)
+    return x & half_mask
+
+def _feistel(values, keys, half_bits):
+    """Một lượt Feistel cân bằng trên các số 2 × half_bits bit"""
+    half_mask = np.uint64((1 << half_bits) - 1)
+    shift = np.uint64(half_bits)
+    left = values >> shift
+    right = values & half_mask
+    for round_key in keys:
+        left, right = right, left ^ _round(right, round_key, half_mask)
+    return (left << shift) | right
+
+def scatterPositions(keys, domain, start, stop):
+    """
+    Tính ảnh của các chỉ số [start, stop) qua hoán vị có khóa trên [0, domain)
+    
+    Giá trị rơi ra ngoài miền được đưa qua Feistel lần nữa (cycle-walking)
+    cho đến khi nằm trong miền, nên kết quả vẫn là một hoán vị.
+    
+    Args:
+        keys (numpy.ndarray): Khóa vòng từ scatterKeys
+        domain (int): Kích thước miền (số pixel có thể dùng)
+        start (int): Chỉ số đầu
+        stop (int): Chỉ số cuối (không bao gồm)
+        
+    Returns:
+        numpy.ndarray: Các vị trí int64 tương ứng, không trùng nhau
+    """
+    half_bits = max(1, ((domain - 1).bit_length() + 1) // 2)
+    values = _feistel(np.arange(start, stop, dtype=np.uint64), keys, half_bits)
+    outside = np.flatnonzero(values >= domain)
+    while len(outside):
+        values[outside] = _feistel(values[outside], keys, half_bits)
+        outside = outside[values[outside] >= domain]
+    return values.astype(np.int64)
+
+def embedScattered(image, payload, key, bits_per_channel=BITS_PER_CHANNEL, header=None):
+    """
+    Giấu header vào các pixel đầu và rải thông điệp vào các pixel còn lại theo khóa
+    
+    Luồng bit giống hệt chế độ tuần tự (bù bit 0 ở đầu), chỉ khác vị trí pixel.
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh), được sửa trực tiếp
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte
+        key (str | bytes): Khóa bí mật
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        int: Số pixel đã ghi (bao gồm header)
+    """
+    payload = np.frombuffer(payload, dtype=np.uint8)
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    start_pixel = len(header) // BITS_PER_PIXEL
+    flat = carrierPixels(image)
+    domain = len(flat) - start_pixel
+    bits_per_pixel = bits_per_channel * CHANNELS
+    padding = payloadPadding(len(payload), bits_per_channel)
+    num_pixels = (padding + len(payload) * 8) // bits_per_pixel
+    if num_pixels > domain:
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp")
+    embedBits(image, header)
+    
+    keys = scatterKeys(key)
+    mask = lsbMask(bits_per_channel)
+    for start in range(0, num_pixels, SCATTER_CHUNK):
+        stop = min(start + SCATTER_CHUNK, num_pixels)
+        positions = start_pixel + scatterPositions(keys, domain, start, stop)
+        bits = payloadBits(payload, padding, start * bits_per_pixel, stop * bits_per_pixel)
+        flat[positions] = (flat[positions] & mask) | bitsToSymbols(bits, bits_per_channel)
+    return start_pixel + num_pixels
+
+def extractScattered(image, message_length, key, bits_per_channel=BITS_PER_CHANNEL, start_pixel=HEADER_PIXELS):
+    """
+    Trích xuất thông điệp đã được rải theo khóa
+    
+    Args:
+        image (numpy.ndarray): Ảnh uint8 của cv2 (1, 3 hoặc 4 kênh)
+        message_length (int): Độ dài thông điệp (byte) đọc từ header
+        key (str | bytes): Khóa bí mật
+        bits_per_channel (int): Số bit LSB trên mỗi kênh đọc từ header
+        start_pixel (int): Pixel bắt đầu thông điệp (payload_pixel của header)
+        
+    Returns:
+        bytes: Thông điệp đã trích xuất (rỗng nếu ảnh không đủ pixel)
+    """
+    flat = carrierPixels(image)
+    domain = len(flat) - start_pixel
+    padding = payloadPadding(message_length, bits_per_channel)
+    num_pixels = (padding + message_length * 8) // (bits_per_channel * CHANNELS)
+    if num_pixels > domain:
+        return b''
+    
+    keys = scatterKeys(key)
+    chunks = []
+    for start in range(0, num_pixels, SCATTER_CHUNK):
+        stop = min(start + SCATTER_CHUNK, num_pixels)
+        positions = start_pixel + scatterPositions(keys, domain, start, stop)
+        chunks.append(symbolsToBits(flat[positions] & lsbBits(bits_per_channel), bits_per_channel))
+    bits = np.concatenate(chunks)[padding:] if chunks else np.zeros(0, dtype=np.uint8)
+    return np.packbits(bits).tobytes()
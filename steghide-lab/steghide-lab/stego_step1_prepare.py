@@ -2,37 +2,19 @@
 Bước 1: Chuẩn bị dữ liệu cho giấu tin
 
 Chức năng:
-    - Đọc ảnh gốc và chuyển thành danh sách pixel
+    - Đọc ảnh gốc và chuyển thành danh sách pixel (giữ nguyên ảnh xám và kênh alpha)
     - Đọc thông điệp từ file
     - Lưu thông tin vào file trung gian
+    - Ghi thời gian và bộ nhớ của từng giai đoạn (stego_timing)
+    - Dùng lại ảnh đã giải mã từ bộ nhớ đệm theo SHA-256 của ảnh (stego_cache)
 """
 
 import os
-import cv2
-import numpy as np
 import json
 
-def makePicture(pic):
-    """
-    Chuyển đổi danh sách pixel thành ảnh
-    
-    Args:
-        pic (list): Danh sách các pixel theo định dạng [row, col, R, G, B]
-        
-    Returns:
-        numpy.ndarray: Ảnh dưới dạng mảng numpy
-    """
-    img1 = []
-    img2 = []
-    row = pic[-1][0] + 1
-    col = pic[-1][1] + 1
-    for i in range(row):
-        for j in range(col):
-            index = i * col + j
-            img1 += [[np.uint8(pic[index][4]), np.uint8(pic[index][3]), np.uint8(pic[index][2])]]
-        img2 += [img1]
-        img1 = []
-    return np.array(img2)
+from stego_cache import CACHE_PIXELS, StegoCache, pixelsKey
+from stego_pixels import CHANNEL_NAMES, PixelBuffer, fileHash, loadPixels, savePixels
+from stego_timing import StageTimer
 
 def getTextFromFile(filename):
     """
@@ -49,28 +31,17 @@ def getTextFromFile(filename):
 
 def getPicture(filename):
     """
-    Đọc ảnh và chuyển đổi thành danh sách các pixel
+    Đọc ảnh vào bộ đệm pixel, giữ nguyên số kênh (xám, màu hoặc có alpha)
     
     Args:
         filename (str): Tên file ảnh cần đọc
         
     Returns:
-        list: Danh sách các pixel [row, col, R, G, B]
+        PixelBuffer: Danh sách pixel [row, col, R, G, B] dựa trên mảng ảnh
     """
-    img = cv2.imread(filename)
-    lis = img.shape
-    piclist = []
-    row = lis[0]
-    col = lis[1]
-    for i in range(row):
-        for j in range(col):
-            pix_b = img[i][j][0]
-            pix_g = img[i][j][1]
-            pix_r = img[i][j][2]
-            piclist.append([i, j, pix_r, pix_g, pix_b])
-    return piclist
+    return PixelBuffer.fromFile(filename)
 
-def prepare_data(image_path, message_path, output_json=None):
+def prepare_data(image_path, message_path, output_json=None, timer=None, cache=None):
     """
     Chuẩn bị dữ liệu cho giấu tin
     
@@ -78,36 +49,50 @@ def prepare_data(image_path, message_path, output_json=None):
         image_path (str): Đường dẫn đến ảnh gốc
         message_path (str): Đường dẫn đến file thông điệp
         output_json (str, optional): Đường dẫn để lưu dữ liệu chuẩn bị
+        timer (StageTimer, optional): Bộ đo dùng chung với các giai đoạn sau của bước 1
+        cache (StegoCache, optional): Bộ nhớ đệm ảnh đã giải mã (mặc định luôn giải mã ảnh)
         
     Returns:
         dict: Dữ liệu đã chuẩn bị
     """
-    print(f"Đọc ảnh từ: {image_path}")
-    pixels = getPicture(image_path)
+    timer = timer or StageTimer("prepare")
+    with timer.stage("hash"):
+        image_hash = fileHash(image_path)
+    
+    # Ảnh đã giải mã trước đó được mở bằng memory map từ bộ nhớ đệm, không gọi cv2.imread
+    cached = cache.lookup(CACHE_PIXELS, pixelsKey(image_hash)) if cache else None
+    print(f"Đọc ảnh từ: {cached or image_path}")
+    with timer.stage("decode"):
+        pixels = loadPixels(cached) if cached else getPicture(image_path)
     
     print(f"Đọc thông điệp từ: {message_path}")
-    message = getTextFromFile(message_path)
+    with timer.stage("read_message"):
+        message = getTextFromFile(message_path)
     
     # Tạo cấu trúc dữ liệu đầu ra
     data = {
         "image_info": {
             "path": image_path,
             "pixel_count": len(pixels),
-            "height": pixels[-1][0] + 1,
-            "width": pixels[-1][1] + 1
+            "height": pixels.height,
+            "width": pixels.width,
+            "channels": pixels.channels,
+            "sha256": image_hash
         },
         "message_info": {
             "path": message_path,
             "length": len(message),
             "preview": message[:50] + ("..." if len(message) > 50 else "")
         },
-        "message": message,
         "output_image": "encrypted_" + os.path.basename(image_path)
     }
+    timer.attach(data)
+    if cache:
+        cache.attach(data, "prepare")
     
     # Chúng ta không thể json.dump danh sách pixels trực tiếp 
     # vì nó quá lớn và numpy arrays không serialize được
-    # Thay vào đó, chúng ta lưu thông tin về ảnh
+    # Thay vào đó, chúng ta lưu thông tin về ảnh và đường dẫn thông điệp
     
     if output_json:
         print(f"Lưu thông tin vào: {output_json}")
@@ -118,7 +103,8 @@ def prepare_data(image_path, message_path, output_json=None):
     print("\nThông tin chuẩn bị:")
     print(f"- Ảnh: {image_path}")
     print(f"  + Số pixel: {len(pixels)}")
-    print(f"  + Kích thước: {pixels[-1][0] + 1}x{pixels[-1][1] + 1}")
+    print(f"  + Kích thước: {pixels.height}x{pixels.width}")
+    print(f"  + Số kênh: {pixels.channels} ({CHANNEL_NAMES[pixels.channels]})")
     print(f"- Thông điệp: {message_path}")
     print(f"  + Độ dài: {len(message)} ký tự")
     
@@ -146,14 +132,24 @@ def main():
     output_json = "stego_data.json"
     
     # Chuẩn bị dữ liệu
-    pixels, message, data = prepare_data(image_path, message_path, output_json)
-    
-    # Lưu danh sách pixels riêng (chỉ để cho bước 2)
-    pickle_path = "stego_pixels.bin"
-    import pickle
-    print(f"Lưu danh sách pixels vào: {pickle_path}")
-    with open(pickle_path, 'wb') as f:
-        pickle.dump(pixels, f)
+    timer = StageTimer("prepare")
+    cache = StegoCache()
+    pixels, message, data = prepare_data(image_path, message_path, output_json, timer, cache)
+    
+    # Lưu danh sách pixels riêng (header nhỏ + dữ liệu thô) cho bước 2 và bước 3;
+    # mục trong bộ nhớ đệm có cùng định dạng nên được chép thẳng
+    pixels_path = "stego_pixels.bin"
+    key = pixelsKey(data['image_info']['sha256'])
+    print(f"Lưu danh sách pixels vào: {pixels_path}")
+    with timer.stage("pixel_conversion"):
+        if not cache.copy(CACHE_PIXELS, key, pixels_path):
+            savePixels(pixels, pixels_path, data['image_info']['sha256'])
+            cache.store(CACHE_PIXELS, key, pixels_path)
+    
+    # Ghi lại file dữ liệu kèm số liệu của giai đoạn lưu pixels và bộ nhớ đệm
+    cache.attach(timer.attach(data), "prepare")
+    with open(output_json, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -4,99 +4,188 @@ Bước 2: Chuyển đổi thông điệp thành dạng nhị phân
 Chức năng:
     - Đọc dữ liệu từ bước 1
     - Chuyển đổi thông điệp thành chuỗi nhị phân
-    - Phân tích khả năng chứa thông điệp của ảnh
-    - Lưu chuỗi nhị phân vào file trung gian
+    - Phân tích khả năng chứa thông điệp của ảnh theo số kênh (xám, màu hoặc có alpha)
+    - Nén thông điệp nếu giúp giảm số pixel cần sửa (stego_codec)
+    - Lưu thông điệp dạng byte đã đóng gói vào file payload riêng
+    - Ghi thời gian và bộ nhớ của từng giai đoạn (stego_timing)
+    - Chọn bậc mã Hamming cho chế độ mã hóa ma trận và ước tính hiệu suất giấu (stego_matrix)
+    - Không nén thông điệp khi bước 3 sẽ cập nhật ảnh đã giấu tin (stego_delta chỉ so sánh dữ liệu không nén)
 """
 
 import os
 import json
-import pickle
+import numpy as np
+
+from stego_capacity import capacityBytes, imageCapacity
+from stego_codec import CODEC_AUTO, CODEC_NAMES, CODECS, compressPayload
+from stego_delta import previousOutput
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, CODEC_NONE, MAX_BITS_PER_CHANNEL,
+                          MIN_BITS_PER_CHANNEL, checkBitsPerChannel, groupsToPixels, headerBits, payloadChecksum)
+from stego_matrix import (MATRIX_BITS_PER_CHANNEL, lsbEfficiency, matrixBlockSize, matrixEfficiency, matrixOrder,
+                          matrixSamples)
+from stego_scatter import keyFingerprint, readKey
+from stego_step1_prepare import getTextFromFile
+from stego_timing import StageTimer
+
+# Giá trị nhập ở câu hỏi số bit để chọn chế độ mã hóa ma trận
+MATRIX_MODE = "m"
 
 def textToBinary(text):
     """
     Chuyển đổi văn bản thành dạng nhị phân
     
+    Văn bản được mã hóa UTF-8 rồi tách thành bit trong một lượt, nên mọi
+    ký tự (kể cả tiếng Việt có dấu) đều được giữ nguyên khi trích xuất.
+    
     Args:
         text (str): Văn bản cần chuyển đổi
         
     Returns:
-        str: Chuỗi nhị phân tương ứng
+        numpy.ndarray: Mảng bit (8 bit cho mỗi byte UTF-8, bit cao nhất đứng trước)
     """
-    binary_text = ""
-    for char in text:
-        # Chuyển mỗi ký tự thành mã nhị phân 8 bit
-        binary_char = bin(ord(char))[2:]
-        # Đảm bảo mỗi ký tự có đủ 8 bit
-        binary_char = (8 - len(binary_char)) * "0" + binary_char
-        binary_text += binary_char
-    
-    return binary_text
+    return np.unpackbits(np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
 
-def convert_message(stego_data_path, output_json=None):
+def convert_message(stego_data_path, output_json=None, payload_path="stego_payload.bin",
+                    bits_per_channel=BITS_PER_CHANNEL, scatter_key=None, codec=CODEC_AUTO, matrix=False,
+                    incremental=False):
     """
     Chuyển đổi thông điệp từ dữ liệu đã chuẩn bị
     
     Args:
         stego_data_path (str): Đường dẫn đến file dữ liệu từ bước 1
         output_json (str, optional): Đường dẫn để lưu kết quả chuyển đổi
+        payload_path (str): Đường dẫn file payload chứa các bit đã đóng gói thành byte
+        bits_per_channel (int): Số bit LSB dùng trên mỗi kênh màu (1-4)
+        scatter_key (str, optional): Khóa để rải thông điệp vào các pixel theo thứ tự giả ngẫu nhiên
+            (không ghi vào JSON, chỉ lưu cờ và dấu vân tay của khóa)
+        codec (str): Codec nén thông điệp (none, zlib, lzma hoặc auto để chọn kết quả nhỏ nhất)
+        matrix (bool): Giấu bằng mã hóa ma trận Hamming trên bit LSB (bỏ qua bits_per_channel)
+        incremental (bool): Bước 3 sẽ cập nhật ảnh đã giấu tin có sẵn; codec auto được đổi thành none
+            vì luồng nén thay đổi toàn bộ khi thông điệp thay đổi
         
     Returns:
         dict: Dữ liệu đã chuyển đổi
     """
+    if matrix:
+        bits_per_channel = MATRIX_BITS_PER_CHANNEL
+    if incremental and codec == CODEC_AUTO:
+        codec = CODEC_NAMES[CODEC_NONE]
+    checkBitsPerChannel(bits_per_channel)
+    timer = StageTimer("convert")
+    
     # Đọc dữ liệu từ bước 1
     print(f"Đọc dữ liệu từ: {stego_data_path}")
     with open(stego_data_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    # Lấy thông điệp
-    message = data['message']
+    # Đọc thông điệp từ file gốc (bước 1 không còn chép thông điệp vào JSON)
+    with timer.stage("read_message"):
+        message = getTextFromFile(data['message_info']['path'])
     
-    # Đọc danh sách pixels
-    pickle_path = "stego_pixels.bin"
-    if os.path.exists(pickle_path):
-        print(f"Đọc danh sách pixels từ: {pickle_path}")
-        with open(pickle_path, 'rb') as f:
-            pixels = pickle.load(f)
+    # Chỉ đọc header của file pixels (hoặc của ảnh gốc) để biết khả năng chứa
+    pixels_path = "stego_pixels.bin"
+    capacity = None
+    for path in [pixels_path, data['image_info']['path']]:
+        if os.path.exists(path):
+            try:
+                print(f"Đọc thông tin kích thước ảnh từ: {path}")
+                capacity = imageCapacity(path, bits_per_channel)
+                break
+            except ValueError as e:
+                print(f"Cảnh báo: {e}")
+    
+    # Số kênh của ảnh đã giải mã ở bước 1 (mọi kênh đều chứa tin)
+    channels = data['image_info'].get('channels') or (capacity['channels'] if capacity else CHANNELS)
+    if capacity is not None:
+        capacity['channels'] = channels
+        num_pixels_available = capacity['pixel_count']
         data['pixels_available'] = True
     else:
-        print(f"Cảnh báo: Không tìm thấy file {pickle_path}. Sẽ không kiểm tra khả năng chứa thông điệp.")
-        pixels = None
+        print("Cảnh báo: Không đọc được kích thước ảnh. Sẽ không kiểm tra khả năng chứa thông điệp.")
+        num_pixels_available = None
         data['pixels_available'] = False
     
     # Chuyển đổi thông điệp thành chuỗi nhị phân
     print("Chuyển đổi thông điệp thành chuỗi nhị phân...")
-    binary_message = textToBinary(message)
+    with timer.stage("bit_conversion"):
+        binary_message = textToBinary(message)
+        message_bytes = len(binary_message) // 8
+        packed = np.packbits(binary_message)
+    
+    # Nén thông điệp; codec khác none cần header mở rộng ghi mã codec và độ dài gốc
+    with timer.stage("compress"):
+        codec_id, payload = compressPayload(packed, codec)
+        payload = np.frombuffer(payload, dtype=np.uint8)
+        checksum = payloadChecksum(payload)
+    
+    # Mã hóa ma trận dùng bậc Hamming lớn nhất vừa với ảnh (bước 3 chọn lại nếu chưa biết kích thước ảnh)
+    matrix_order = None
+    if matrix and capacity is not None:
+        matrix_order = matrixOrder(payload.nbytes, matrixSamples(num_pixels_available, channels))
+    header = headerBits(payload.nbytes, bits_per_channel, codec_id, message_bytes, checksum,
+                        (matrix_order or 1) if matrix else 0)
+    header_groups = len(header) // BITS_PER_PIXEL
+    header_pixels = groupsToPixels(header_groups, channels)
+    
+    # Số bit 0 cần bù vào đầu để độ dài là bội số của số bit mỗi nhóm 3 kênh (bước 3 tự thêm khi giấu);
+    # mã hóa ma trận chỉ bù bit 0 ở cuối khối cuối cùng
+    group_bits = bits_per_channel * CHANNELS
+    bits_per_pixel = bits_per_channel * channels
+    padding = 0 if matrix else (-payload.nbytes * 8) % group_bits
     
-    # Đảm bảo độ dài chuỗi nhị phân là bội số của 6
-    padding = 0
-    if len(binary_message) % 6 != 0:
-        padding = (6 - (len(binary_message) % 6))
-        binary_message = padding * "0" + binary_message
+    # Lưu các bit dưới dạng byte đã đóng gói, JSON chỉ giữ vị trí và độ dài
+    print(f"Lưu payload ({payload.nbytes} byte) vào: {payload_path}")
+    with timer.stage("write_payload"):
+        payload.tofile(payload_path)
     
     # Tính toán số pixel cần thiết
-    num_bits = len(binary_message)
-    bits_per_pixel = 6  # 2 bit LSB × 3 kênh màu
-    num_pixels_needed = (num_bits // bits_per_pixel) + 4  # +4 cho header
+    num_bits = payload.nbytes * 8 + padding
+    if matrix:
+        order = matrix_order or 1
+        num_samples = -(-num_bits // order) * matrixBlockSize(order)
+        num_pixels_needed = groupsToPixels(-(-num_samples // CHANNELS) + header_groups, channels)
+        efficiency = matrixEfficiency(order)
+    else:
+        num_pixels_needed = groupsToPixels(num_bits // group_bits + header_groups, channels)
+        efficiency = lsbEfficiency(bits_per_channel)
     
     # Kiểm tra khả năng chứa thông điệp
     can_embed = True
     reason = None
     
-    if pixels is not None:
-        num_pixels_available = len(pixels)
-        if num_pixels_needed > num_pixels_available:
+    if capacity is not None:
+        capacity['capacity_bytes'] = capacityBytes(capacity['width'], capacity['height'], bits_per_channel,
+                                                   channels, header_groups)
+        if payload.nbytes > capacity['capacity_bytes'] or (matrix and matrix_order is None):
             can_embed = False
             reason = "Ảnh không đủ lớn để chứa thông điệp"
     
     # Thêm thông tin vào dữ liệu
     data['binary'] = {
-        "message": binary_message,
-        "length": len(binary_message),
+        "payload_file": payload_path,
+        "offset": 0,
+        "size": payload.nbytes,
+        "message_bytes": message_bytes,
+        "codec": codec_id,
+        "codec_name": CODEC_NAMES[codec_id],
+        "checksum": checksum,
+        "header_pixels": header_pixels,
+        "channels": channels,
+        "length": num_bits,
         "padding": padding,
+        "bits_per_channel": bits_per_channel,
+        "scatter": bool(scatter_key),
+        "key_fingerprint": keyFingerprint(scatter_key),
+        "matrix": matrix,
+        "matrix_order": matrix_order,
+        "incremental": incremental,
+        "expected_bits_per_change": efficiency,
         "pixels_needed": num_pixels_needed,
+        "capacity_bytes": capacity['capacity_bytes'] if capacity else None,
         "can_embed": can_embed,
         "reason": reason
     }
+    timer.attach(data)
     
     # Lưu dữ liệu
     if output_json:
@@ -106,13 +195,21 @@ def convert_message(stego_data_path, output_json=None):
     
     # Hiển thị thông tin
     print("\nKết quả chuyển đổi:")
-    print(f"- Thông điệp: {len(message)} ký tự")
-    print(f"- Chuỗi nhị phân: {len(binary_message)} bit")
+    print(f"- Thông điệp: {len(message)} ký tự ({message_bytes} byte UTF-8)")
+    print(f"- Nén: {CODEC_NAMES[codec_id]} ({message_bytes} → {payload.nbytes} byte)")
+    print(f"- CRC32 ghi vào header: {checksum:08x} ({header_pixels} pixel header)")
+    print(f"- Chuỗi nhị phân: {num_bits} bit")
     print(f"  + Padding: {padding} bit")
-    print(f"- Số pixel cần thiết: {num_pixels_needed}")
+    print(f"- Số bit LSB mỗi kênh: {bits_per_channel} ({bits_per_pixel} bit mỗi pixel, {channels} kênh)")
+    if matrix:
+        print(f"- Mã hóa ma trận: Hamming bậc {matrix_order or '?'} "
+              f"({matrixBlockSize(matrix_order or 1)} kênh mỗi khối)")
+    print(f"- Thứ tự pixel: {'rải theo khóa' if scatter_key else 'tuần tự'}")
+    print(f"- Số pixel cần thiết: {num_pixels_needed} (dự kiến {efficiency:.2f} bit mỗi kênh bị sửa)")
     
-    if pixels is not None:
-        print(f"- Số pixel có sẵn: {len(pixels)}")
+    if capacity is not None:
+        print(f"- Số pixel có sẵn: {num_pixels_available}")
+        print(f"- Dung lượng tối đa: {capacity['capacity_bytes']} byte")
         if can_embed:
             print(f"- Khả năng chứa thông điệp: CÓ THỂ ✓")
         else:
@@ -138,8 +235,39 @@ def main():
     # Đường dẫn để lưu kết quả chuyển đổi
     output_json = "stego_binary.json"
     
+    # Số bit LSB trên mỗi kênh: ít bit khó phát hiện hơn, nhiều bit chứa được nhiều hơn
+    # hoặc mã hóa ma trận: ít kênh bị sửa nhất trên mỗi bit thông điệp
+    bits_input = input(f"Nhập số bit LSB trên mỗi kênh ({MIN_BITS_PER_CHANNEL}-{MAX_BITS_PER_CHANNEL}, {MATRIX_MODE} để mã hóa ma trận Hamming, Enter để mặc định {BITS_PER_CHANNEL}): ").strip()
+    matrix = bits_input.lower() == MATRIX_MODE
+    try:
+        if matrix:
+            bits_per_channel = MATRIX_BITS_PER_CHANNEL
+        else:
+            bits_per_channel = checkBitsPerChannel(int(bits_input)) if bits_input else BITS_PER_CHANNEL
+    except ValueError as e:
+        print(f"Lỗi: {e}")
+        return
+    
+    # Khóa rải thông điệp: để trống thì giấu tuần tự từ pixel thứ 5
+    # (bước 3 hỏi lại khóa, JSON không lưu khóa)
+    scatter_key = readKey("Nhập khóa để rải thông điệp ngẫu nhiên (Enter để giấu tuần tự): ")
+    
+    # Chỉ hỏi chế độ cập nhật khi lần chạy trước đã tạo ảnh đã giấu tin
+    incremental = False
+    previous = previousOutput()
+    if previous:
+        incremental = input(f"Bước 3 cập nhật {previous} với thông điệp mới, chỉ sửa các pixel khác? (y/n): ").strip().lower() == 'y'
+    
+    # Codec nén: tự động chỉ nén khi thông điệp nhỏ đi (không nén khi cập nhật ảnh có sẵn)
+    default_codec = CODEC_NAMES[CODEC_NONE] if incremental else CODEC_AUTO
+    codec = input(f"Chọn codec nén ({', '.join(CODECS)}, {CODEC_AUTO}; Enter để mặc định {default_codec}): ").strip() or default_codec
+    if codec != CODEC_AUTO and codec not in CODECS:
+        print(f"Lỗi: Không hỗ trợ codec {codec}")
+        return
+    
     # Chuyển đổi thông điệp
-    data = convert_message(stego_data_path, output_json)
+    data = convert_message(stego_data_path, output_json, bits_per_channel=bits_per_channel,
+                           scatter_key=scatter_key, codec=codec, matrix=matrix, incremental=incremental)
     
     # Kiểm tra xem có thể tiếp tục không
     if data['binary']['can_embed'] is False:
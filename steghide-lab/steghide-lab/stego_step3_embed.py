@@ -5,106 +5,62 @@ Chức năng:
     - Đọc dữ liệu từ bước 1 và bước 2
     - Giấu thông điệp vào ảnh
     - Lưu ảnh đã giấu tin
+    - Với ảnh lớn hơn ngân sách bộ nhớ, giấu và lưu theo từng dải hàng (stego_tiled)
+    - Với ảnh BMP/PPM/TIFF không nén và chế độ lưu mặc định, chỉ sửa các byte cần thiết trong bản sao (stego_inplace)
+    - Rải thông điệp theo khóa nếu bước 2 có khóa (stego_scatter); khóa được nhập lại khi chạy và kiểm tra
+      bằng dấu vân tay bước 2 lưu, không đọc từ JSON
+    - Lưu ảnh theo chế độ nhanh/nhỏ (PNG, WebP hoặc TIFF không mất dữ liệu) và đo thời gian mã hóa
+    - Ghi thời gian và bộ nhớ của từng giai đoạn (stego_timing)
+    - Dùng lại ảnh kết quả đã lưu khi ảnh gốc, dữ liệu và thiết lập giống hệt (stego_cache)
+    - Cập nhật ảnh đã giấu tin khi thông điệp thay đổi, chỉ sửa các pixel khác (stego_delta)
+    - Giấu tin vào mọi kênh của ảnh xám và ảnh có kênh alpha, lưu giữ nguyên số kênh
+    - Giấu bằng mã hóa ma trận Hamming nếu bước 2 chọn, báo cáo số kênh bị sửa (stego_matrix)
+    - Cách giấu do embed của stego_pipeline chọn (một nơi duy nhất), bước này chỉ đọc/ghi JSON và in kết quả
 """
 
 import os
 import json
-import pickle
-import cv2
 import numpy as np
 
-def putDataInPixel(index, sixBinary, pixels):
-    """
-    Chèn 6 bit thông tin vào 2-bit LSB của 3 kênh màu R,G,B của 1 pixel
-    
-    Args:
-        index (int): Chỉ số của pixel trong danh sách
-        sixBinary (str): Chuỗi 6 bit cần chèn
-        pixels (list): Danh sách các pixel
-    """
-    # Xóa 2 bit thấp nhất của mỗi kênh màu (AND với 1111 1100 = 252 ở hệ thập phân)
-    pixels[index][2] &= 252  # R
-    pixels[index][3] &= 252  # G
-    pixels[index][4] &= 252  # B
-    
-    # Chèn 2 bit đầu vào kênh R
-    pixels[index][2] |= int(sixBinary[0:2], 2)
-    
-    # Chèn 2 bit tiếp theo vào kênh G
-    pixels[index][3] |= int(sixBinary[2:4], 2)
-    
-    # Chèn 2 bit cuối vào kênh B
-    pixels[index][4] |= int(sixBinary[4:6], 2)
+from stego_cache import StegoCache
+from stego_delta import previousOutput
+from stego_engine import BITS_PER_CHANNEL, CHANNELS, CODEC_NONE
+from stego_pipeline import (COLOR_ONLY_PROFILES, DEFAULT_PROFILE, SAVE_PROFILES, PreparedPayload, defaultOutput,
+                            embed)
+from stego_pixels import readPixelsHeader
+from stego_scatter import keyFingerprint, readKey
+from stego_tiled import DEFAULT_MEMORY_BUDGET
+from stego_timing import StageTimer
 
-def encodeMessageLength(message_length, pixels):
+def loadPayload(binary_info):
     """
-    Mã hóa độ dài thông điệp vào 4 pixel đầu tiên của ảnh
+    Mở phần payload của bước 2 bằng memory map, không sao chép dữ liệu
     
     Args:
-        message_length (int): Độ dài thông điệp cần mã hóa
-        pixels (list): Danh sách các pixel
-    """
-    # Chuyển độ dài thành chuỗi nhị phân 24 bit
-    messageLengthBin = bin(message_length)[2:]
-    messageLengthBin = (24 - len(messageLengthBin)) * "0" + messageLengthBin
-    
-    # Thêm độ dài vào 4 pixel đầu tiên (mỗi pixel chứa 6 bit)
-    pixelIndex = 0
-    for i in range(0, 24, 6):
-        putDataInPixel(pixelIndex, messageLengthBin[i:i+6], pixels)
-        pixelIndex += 1
-
-def makePicture(pic):
-    """
-    Chuyển đổi danh sách pixel thành ảnh
-    
-    Args:
-        pic (list): Danh sách các pixel theo định dạng [row, col, R, G, B]
+        binary_info (dict): Thông tin 'binary' do bước 2 ghi vào JSON
         
     Returns:
-        numpy.ndarray: Ảnh dưới dạng mảng numpy
+        numpy.memmap: Các byte của thông điệp
     """
-    img1 = []
-    img2 = []
-    row = pic[-1][0] + 1
-    col = pic[-1][1] + 1
-    for i in range(row):
-        for j in range(col):
-            index = i * col + j
-            img1 += [[np.uint8(pic[index][4]), np.uint8(pic[index][3]), np.uint8(pic[index][2])]]
-        img2 += [img1]
-        img1 = []
-    return np.array(img2)
+    return np.memmap(binary_info['payload_file'], dtype=np.uint8, mode='r',
+                     offset=binary_info['offset'], shape=(binary_info['size'],))
 
-def saveImage(pixels, output_filename):
-    """
-    Lưu danh sách pixel thành file ảnh
-    
-    Args:
-        pixels (list): Danh sách các pixel
-        output_filename (str): Tên file đầu ra
-        
-    Returns:
-        bool: True nếu lưu thành công, False nếu có lỗi
-    """
-    try:
-        # Chuyển đổi danh sách pixel thành định dạng ảnh
-        image = makePicture(pixels)
-        
-        # Lưu ảnh
-        cv2.imwrite(output_filename, image)
-        return True
-    except Exception as e:
-        print(f"Lỗi khi lưu ảnh: {e}")
-        return False
-
-def embed_message(binary_data_path, output_info=None):
+def embed_message(binary_data_path, output_info=None, memory_budget=DEFAULT_MEMORY_BUDGET, band_rows=None,
+                  profile=DEFAULT_PROFILE, benchmark=False, cache=None, incremental=False, scatter_key=None):
     """
     Giấu thông điệp vào ảnh
     
     Args:
         binary_data_path (str): Đường dẫn đến file dữ liệu từ bước 2
         output_info (str, optional): Đường dẫn để lưu thông tin về ảnh đã giấu tin
+        memory_budget (int): Ngân sách bộ nhớ (byte); ảnh lớn hơn được xử lý theo từng dải hàng
+        band_rows (int, optional): Số hàng mỗi dải; nếu có thì luôn dùng chế độ theo dải
+        profile (str): Chế độ lưu ảnh trong SAVE_PROFILES
+        benchmark (bool): Đo thời gian mã hóa và kích thước của tất cả chế độ lưu
+        cache (StegoCache, optional): Bộ nhớ đệm ảnh kết quả (mặc định luôn giấu và mã hóa lại)
+        incremental (bool): Cập nhật ảnh đã giấu tin có sẵn, chỉ sửa header và các pixel khác với thông điệp mới
+            (chỉ khi không nén; BMP/PPM/TIFF được sửa trực tiếp trên file, định dạng khác vẫn mã hóa lại)
+        scatter_key (str, optional): Khóa rải thông điệp đã nhập ở bước 2 (bắt buộc nếu bước 2 có khóa)
         
     Returns:
         bool: True nếu giấu tin thành công, False nếu có lỗi
@@ -119,57 +75,108 @@ def embed_message(binary_data_path, output_info=None):
         print("Lỗi: Không thể giấu tin. Dữ liệu không hợp lệ hoặc ảnh không đủ dung lượng.")
         return False
     
-    # Đọc danh sách pixels
-    pickle_path = "stego_pixels.bin"
-    if not os.path.exists(pickle_path):
-        print(f"Lỗi: Không tìm thấy file {pickle_path}")
+    binary_info = data['binary']
+    # JSON chỉ lưu dấu vân tay của khóa để kiểm tra khóa được nhập lại
+    if not binary_info.get('scatter'):
+        scatter_key = None
+    elif keyFingerprint(scatter_key) != binary_info.get('key_fingerprint'):
+        print("Lỗi: Khóa rải thông điệp không khớp với khóa đã nhập ở bước 2")
+        return False
+    matrix = binary_info.get('matrix', False)
+    cover_path = data['image_info']['path']
+    
+    # Danh sách pixels của bước 1 được mở bằng memory map thay vì giải mã lại ảnh gốc
+    pixels_path = "stego_pixels.bin"
+    pixels = None
+    if os.path.exists(pixels_path):
+        if readPixelsHeader(pixels_path)['source_sha256'] != data['image_info'].get('sha256'):
+            print(f"Lỗi: File {pixels_path} không khớp với ảnh gốc {cover_path}")
+            return False
+        print(f"Đọc danh sách pixels từ: {pixels_path}")
+        pixels = pixels_path
+    elif not os.path.exists(cover_path):
+        print(f"Lỗi: Không tìm thấy file {pixels_path}")
         return False
     
-    print(f"Đọc danh sách pixels từ: {pickle_path}")
-    with open(pickle_path, 'rb') as f:
-        pixels = pickle.load(f)
+    channels = data['image_info'].get('channels', CHANNELS)
+    if channels != CHANNELS and profile in COLOR_ONLY_PROFILES:
+        print(f"Cảnh báo: Chế độ {profile} không giữ đúng ảnh {channels} kênh, dùng chế độ {DEFAULT_PROFILE}")
+        profile = DEFAULT_PROFILE
+    output_image = defaultOutput(cover_path, profile, scatter_key, matrix, band_rows, benchmark)
     
-    # Lấy thông tin
-    binary_message = data['binary']['message']
-    message_length = data['message_info']['length']
-    output_image = "encrypted_" + os.path.splitext(os.path.basename(data['image_info']['path']))[0] + ".png"
+    # Header ghi độ dài thông điệp tính theo byte UTF-8 (và độ dài sau khi nén nếu có)
+    message_length = binary_info['message_bytes']
+    codec = binary_info.get('codec', CODEC_NONE)
+    payload = PreparedPayload(loadPayload(binary_info), codec, message_length, binary_info.get('checksum'))
     
     print("\nThông tin giấu tin:")
-    print(f"- Ảnh gốc: {data['image_info']['path']}")
-    print(f"- Thông điệp: {message_length} ký tự")
-    print(f"- Chuỗi nhị phân: {len(binary_message)} bit")
-    print(f"- Pixel cần thiết: {data['binary']['pixels_needed']}")
-    print(f"- Pixel có sẵn: {len(pixels)}")
+    print(f"- Ảnh gốc: {cover_path}")
+    print(f"- Thông điệp: {data['message_info']['length']} ký tự ({message_length} byte)")
+    print(f"- Chuỗi nhị phân: {binary_info['length']} bit")
+    print(f"- Pixel cần thiết: {binary_info['pixels_needed']}")
     
-    # Mã hóa độ dài thông điệp vào 4 pixel đầu tiên
-    print("\nBắt đầu giấu tin...")
-    print("- Mã hóa độ dài thông điệp vào 4 pixel đầu tiên")
-    encodeMessageLength(message_length, pixels)
-    
-    # Giấu thông điệp
-    print(f"- Giấu {len(binary_message)} bit dữ liệu vào các pixel")
+    # Cách giấu (bộ nhớ đệm, cập nhật, sửa trực tiếp file, theo dải hoặc trên mảng) do embed của stego_pipeline chọn
+    timer = StageTimer("embed")
+    try:
+        report = embed(cover_path, payload, binary_info.get('bits_per_channel', BITS_PER_CHANNEL), key=scatter_key,
+                       matrix=matrix, output=output_image, pixels=pixels, profile=profile,
+                       memory_budget=memory_budget, band_rows=band_rows, incremental=incremental, cache=cache,
+                       benchmark=benchmark, timer=timer)
+    except (IOError, ValueError) as e:
+        print(f"Lỗi khi giấu tin: {e}")
+        return False
     
-    # Bắt đầu giấu tin từ pixel thứ 5 (sau header)
-    pixelIndex = 4
+    print(f"- Pixel có sẵn: {report['pixel_count']} ({report['channels']} kênh)")
+    for warning in report['warnings']:
+        print(f"Cảnh báo: {warning}")
     
-    # Giấu tin
-    for i in range(0, len(binary_message), 6):
-        # Đảm bảo chúng ta không vượt quá độ dài của binary_message
-        end = min(i + 6, len(binary_message))
-        sixBinary = binary_message[i:end]
-        
-        # Đảm bảo sixBinary có đủ 6 bit
-        if len(sixBinary) < 6:
-            sixBinary = sixBinary + '0' * (6 - len(sixBinary))
-            
-        putDataInPixel(pixelIndex, sixBinary, pixels)
-        pixelIndex += 1
-    
-    # Lưu ảnh đã giấu tin
-    print(f"Lưu ảnh đã giấu tin vào: {output_image}")
-    if not saveImage(pixels, output_image):
-        print("Lỗi: Không thể lưu ảnh đã giấu tin")
-        return False
+    # Header độ dài là phần đầu của cùng một lần ghi, thông điệp bắt đầu ngay sau header
+    print("\nBắt đầu giấu tin...")
+    print(f"- Mã hóa độ dài thông điệp vào {report['header_pixels']} pixel đầu tiên")
+    if codec != CODEC_NONE:
+        print(f"- Thông điệp đã nén bằng {binary_info['codec_name']} ({binary_info['size']} byte)")
+    if matrix:
+        print(f"- Giấu {binary_info['length']} bit dữ liệu vào syndrome của các khối kênh "
+              f"(mã Hamming bậc {report['matrix_order']}, {'rải theo khóa' if scatter_key else 'tuần tự'})")
+    else:
+        print(f"- Giấu {binary_info['length']} bit dữ liệu vào các pixel "
+              f"({report['bits_per_channel']} bit LSB mỗi kênh, {'rải theo khóa' if scatter_key else 'tuần tự'})")
+    
+    mode = report['mode']
+    if mode == "cache":
+        print(f"- Dùng lại ảnh đã giấu tin từ bộ nhớ đệm, lưu vào: {output_image}")
+    elif mode == "delta":
+        delta = report['delta']
+        if report['previous']:
+            print(f"- Cập nhật ảnh đã giấu tin {output_image}, chỉ sửa header và các pixel khác")
+        else:
+            print(f"- Chưa có {output_image}, giấu vào ảnh gốc theo chế độ cập nhật")
+        print(f"- Đã sửa {delta['pixels_changed']}/{delta['pixels_compared']} pixel "
+              f"({delta['header_pixels_changed']} pixel header, {delta['channels_changed']} kênh)")
+    elif mode == "in_place":
+        in_place = report['in_place']
+        print(f"- Ảnh {in_place['format'].upper()} không nén, chỉ sửa các pixel cần thiết trong bản sao")
+        print(f"- Đã sửa {in_place['pixels_patched']} pixel ({in_place['bytes_patched']} byte)")
+    elif mode == "tiled":
+        tiles = report['tiles']
+        print(f"- Xử lý theo từng dải với ngân sách {memory_budget / 1e6:.1f} MB")
+        print(f"- Đã sửa {tiles['bands_modified']}/{tiles['bands']} dải ({tiles['band_rows']} hàng mỗi dải)")
+    elif 'matrix' in report:
+        matrix_stats = report['matrix']
+        print(f"- Đã sửa {matrix_stats['channels_changed']} kênh ({matrix_stats['pixels_changed']}/"
+              f"{matrix_stats['pixels_used']} pixel), hiệu suất {matrix_stats['bits_per_change'] or 0:.2f} "
+              f"bit mỗi kênh bị sửa (dự kiến {matrix_stats['expected_bits_per_change']:.2f})")
+    if 'encode' in report:
+        encode = report['encode']
+        print(f"Lưu ảnh đã giấu tin vào: {output_image} (chế độ {encode['profile']})")
+        print(f"- Mã hóa: {encode['encode_seconds']:.3f} giây, {encode['file_bytes']} byte")
+    elif mode == "in_place":
+        print(f"Lưu ảnh đã giấu tin vào: {output_image}")
+    if 'encode_benchmark' in report:
+        print("\nSo sánh các chế độ lưu:")
+        for result in report['encode_benchmark']:
+            print(f"- {result['profile']:<8} {result['format']:<5} "
+                  f"{result['encode_seconds']:.3f} giây  {result['file_bytes']} byte")
     
     # Lưu thông tin
     if output_info:
@@ -177,6 +184,12 @@ def embed_message(binary_data_path, output_info=None):
             "output_image": output_image,
             "status": "Thành công",
         }
+        for field in ("tiles", "in_place", "delta", "matrix", "encode", "encode_benchmark", "cache"):
+            if field in report:
+                data['stego'][field] = report[field]
+        timer.attach(data)
+        if cache:
+            cache.attach(data, "embed")
         
         print(f"Lưu thông tin giấu tin vào: {output_info}")
         with open(output_info, 'w', encoding='utf-8') as f:
@@ -206,8 +219,31 @@ def main():
     # Đường dẫn để lưu thông tin về ảnh đã giấu tin
     output_info = "stego_output.json"
     
+    with open(binary_data_path, 'r', encoding='utf-8') as f:
+        binary_info = json.load(f).get('binary', {})
+    
+    # Khóa không được lưu trong JSON nên được nhập lại (hoặc lấy từ biến môi trường STEGO_KEY)
+    scatter_key = None
+    if binary_info.get('scatter'):
+        scatter_key = readKey("Nhập khóa đã dùng ở bước 2 để rải thông điệp: ")
+    
+    # Chọn chế độ lưu ảnh
+    profile = input(f"Chọn chế độ lưu ảnh ({', '.join(SAVE_PROFILES)}; Enter để mặc định): ").strip() or DEFAULT_PROFILE
+    if profile not in SAVE_PROFILES:
+        print(f"Lỗi: Không có chế độ lưu {profile}")
+        return
+    benchmark = input("Đo thời gian mã hóa với tất cả các chế độ? (y/n): ").strip().lower() == 'y'
+    
+    # Chế độ cập nhật được chọn ở bước 2 (để bước 2 không nén thông điệp); chỉ hỏi lại với dữ liệu cũ
+    incremental = binary_info.get('incremental')
+    previous = previousOutput(output_info)
+    if incremental is None and previous:
+        incremental = input(f"Cập nhật {previous} với thông điệp mới, chỉ sửa các pixel khác? (y/n): ").strip().lower() == 'y'
+    incremental = bool(incremental and previous)
+    
     # Giấu tin
-    success = embed_message(binary_data_path, output_info)
+    success = embed_message(binary_data_path, output_info, profile=profile, benchmark=benchmark, cache=StegoCache(),
+                            incremental=incremental, scatter_key=scatter_key)
     
     if not success:
         print("\nGiấu tin thất bại. Không thể giấu tin.")
@@ -5,109 +5,75 @@ Chức năng:
     - Đọc ảnh đã giấu tin
     - Trích xuất thông điệp từ ảnh
     - Lưu thông điệp vào file
+    - Đọc thông điệp đã rải theo khóa (stego_scatter)
+    - Với ảnh BMP/PPM/TIFF không nén, chỉ đọc các byte của header và thông điệp (stego_inplace)
+    - Giải nén thông điệp theo codec ghi trong header mở rộng (stego_codec)
+    - Kiểm tra tính toàn vẹn bằng CRC32 ghi trong header, không cần thông điệp gốc
+    - Ghi thời gian và bộ nhớ của từng giai đoạn (stego_timing)
+    - Đọc thông điệp từ mọi kênh của ảnh xám và ảnh có kênh alpha
+    - Giải mã syndrome của tất cả các khối theo lô khi ảnh dùng mã hóa ma trận (stego_matrix)
+    - Việc đọc header và chọn cách trích xuất nằm ở StegoSource (stego_pipeline), bước này chỉ
+      thêm phần hiển thị, kiểm tra CRC32, giải nén và ghi file
 """
 
 import os
 import json
-import cv2
-import numpy as np
+import codecs
 
-def exportDataFromPixel(index, pixels):
-    """
-    Trích xuất 6 bit từ 2-bit LSB của 3 kênh màu R,G,B của 1 pixel
-    
-    Args:
-        index (int): Chỉ số của pixel trong danh sách
-        pixels (list): Danh sách các pixel
-        
-    Returns:
-        str: Chuỗi 6 bit được trích xuất
-    """
-    temp = ""
-    
-    # Lấy 2 bit thấp nhất từ kênh R
-    firstLocal = bin(pixels[index][2] & 3)[2:]
-    firstLocal = (2 - len(firstLocal)) * "0" + firstLocal
-    temp += firstLocal
-    
-    # Lấy 2 bit thấp nhất từ kênh G
-    secondLocal = bin(pixels[index][3] & 3)[2:]
-    secondLocal = (2 - len(secondLocal)) * "0" + secondLocal
-    temp += secondLocal
-    
-    # Lấy 2 bit thấp nhất từ kênh B
-    thirdLocal = bin(pixels[index][4] & 3)[2:]
-    thirdLocal = (2 - len(thirdLocal)) * "0" + thirdLocal
-    temp += thirdLocal
-    
-    return temp
+from stego_codec import CODEC_NAMES, decompressPayload, iterDecompress
+from stego_engine import CODEC_NONE, INTEGRITY_RESULTS, verifyChecksum
+from stego_matrix import matrixBlockSize
+from stego_pipeline import StegoSource
+from stego_scatter import readKey
+from stego_timing import StageTimer
 
-def binaryToText(binary):
-    """
-    Chuyển đổi chuỗi nhị phân thành văn bản
-    
-    Args:
-        binary (str): Chuỗi nhị phân cần chuyển đổi
-        
-    Returns:
-        str: Văn bản tương ứng
-    """
-    text = ""
-    # Xử lý từng nhóm 8 bit để chuyển thành ký tự
-    for i in range(0, len(binary), 8):
-        if i + 8 <= len(binary):
-            byte = binary[i:i+8]
-            text += chr(int(byte, 2))
-    
-    return text
+# Số ký tự đầu của thông điệp được hiển thị để xem trước
+PREVIEW_LENGTH = 100
 
-def getPicture(filename):
+def bytesToText(data):
     """
-    Đọc ảnh và chuyển đổi thành danh sách các pixel
+    Chuyển đổi dữ liệu byte thành văn bản
     
     Args:
-        filename (str): Tên file ảnh cần đọc
+        data (bytes): Dữ liệu byte đã trích xuất
         
     Returns:
-        list: Danh sách các pixel [row, col, R, G, B]
+        str: Văn bản tương ứng (giải mã UTF-8, byte lỗi được thay bằng U+FFFD)
     """
-    img = cv2.imread(filename)
-    lis = img.shape
-    piclist = []
-    row = lis[0]
-    col = lis[1]
-    for i in range(row):
-        for j in range(col):
-            pix_b = img[i][j][0]
-            pix_g = img[i][j][1]
-            pix_r = img[i][j][2]
-            piclist.append([i, j, pix_r, pix_g, pix_b])
-    return piclist
+    return data.decode('utf-8', errors='replace')
 
-def decodeMessageLength(pixels):
+def writeText(data, codec, original_length, filename, preview_length=PREVIEW_LENGTH):
     """
-    Giải mã độ dài thông điệp từ 4 pixel đầu tiên
+    Giải nén thông điệp và ghi ra file văn bản theo từng khối, không giữ cả thông điệp trong bộ nhớ
     
     Args:
-        pixels (list): Danh sách các pixel
+        data (bytes): Dữ liệu đã trích xuất (chưa giải nén)
+        codec (int): Mã codec đọc từ header
+        original_length (int): Độ dài gốc đọc từ header
+        filename (str): File văn bản đầu ra
+        preview_length (int): Số ký tự đầu được giữ lại để xem trước
         
     Returns:
-        int: Độ dài thông điệp
+        tuple: (số byte thông điệp, số ký tự, preview_length ký tự đầu)
     """
-    # Đọc 24 bit từ 4 pixel đầu tiên
-    msgLengthInBinary = ""
-    for ind in range(4):
-        msgLengthInBinary += exportDataFromPixel(ind, pixels)
-    
-    # Chuyển đổi từ nhị phân sang số nguyên
-    try:
-        msgLen = int(msgLengthInBinary, 2)
-        return msgLen
-    except ValueError:
-        print(f"Lỗi: Không thể giải mã độ dài thông điệp")
-        return None
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    num_bytes = num_chars = 0
+    preview = ""
+    with open(filename, 'w', encoding='utf-8') as f:
+        for chunk in iterDecompress(data, codec, original_length):
+            num_bytes += len(chunk)
+            text = decoder.decode(chunk)
+            f.write(text)
+            num_chars += len(text)
+            if len(preview) < preview_length:
+                preview += text[:preview_length - len(preview)]
+        text = decoder.decode(b'', final=True)
+        f.write(text)
+        num_chars += len(text)
+        preview = (preview + text)[:preview_length]
+    return num_bytes, num_chars, preview
 
-def extract_message(stego_image_path, output_text=None, output_info=None):
+def extract_message(stego_image_path, output_text=None, output_info=None, scatter_key=None):
     """
     Trích xuất thông điệp từ ảnh
     
@@ -115,66 +81,107 @@ def extract_message(stego_image_path, output_text=None, output_info=None):
         stego_image_path (str): Đường dẫn đến ảnh đã giấu tin
         output_text (str, optional): Đường dẫn để lưu thông điệp trích xuất
         output_info (str, optional): Đường dẫn để lưu thông tin về việc trích xuất
+        scatter_key (str, optional): Khóa đã dùng để rải thông điệp khi giấu
         
     Returns:
-        str: Thông điệp được trích xuất nếu thành công, None nếu thất bại
+        str: Thông điệp được trích xuất nếu thành công (khi có output_text, thông điệp được ghi
+            thẳng ra file và chỉ phần xem trước được trả về), None nếu thất bại
     """
+    timer = StageTimer("extract")
+    
     # Đọc ảnh đã giấu tin
     print(f"Đọc ảnh đã giấu tin: {stego_image_path}")
     try:
-        pixels = getPicture(stego_image_path)
+        # Ảnh không nén chỉ cần đọc header của file, không giải mã toàn bộ ảnh
+        # (thông điệp rải theo khóa hoặc mã hóa ma trận cần cả mảng ảnh, xem StegoSource)
+        with timer.stage("decode"):
+            source = StegoSource(stego_image_path, scatter_key)
+        width, height, channels = source.width, source.height, source.channels
+        pixel_count = width * height
     except Exception as e:
         print(f"Lỗi khi đọc ảnh: {e}")
         return None
     
-    print(f"Đã đọc ảnh có {len(pixels)} pixel")
+    print(f"Đã đọc ảnh có {pixel_count} pixel ({channels} kênh)")
     
-    # Đọc độ dài thông điệp từ 4 pixel đầu tiên
+    # Đọc độ dài thông điệp từ 4 pixel đầu tiên (và header mở rộng ngay sau nếu có);
+    # ảnh không giấu tin bị loại ngay tại đây mà không đọc các pixel còn lại
     print("Đọc độ dài thông điệp từ header...")
-    message_length = decodeMessageLength(pixels)
-    
-    if message_length is None or message_length <= 0 or message_length > 100000:  # Giới hạn ở 100k ký tự
-        print(f"Lỗi: Độ dài thông điệp không hợp lệ ({message_length})")
+    try:
+        with timer.stage("header"):
+            header = source.readHeader()
+            # Độ dài phải vừa với số pixel còn lại sau header
+            source.checkLength(header)
+    except ValueError as e:
+        print(f"Lỗi: {e}")
         return None
-    
-    print(f"Độ dài thông điệp: {message_length} ký tự")
+    message_length = header['message_length']
+    bits_per_channel = header['bits_per_channel']
+    codec = header['codec']
+    matrix_order = header['matrix_order']
+    
+    print(f"Độ dài thông điệp: {message_length} byte")
+    print(f"Số bit LSB mỗi kênh: {bits_per_channel}")
+    if matrix_order:
+        print(f"Mã hóa ma trận: Hamming bậc {matrix_order} ({matrixBlockSize(matrix_order)} kênh mỗi khối)")
+    if codec != CODEC_NONE:
+        print(f"Codec nén: {CODEC_NAMES.get(codec, codec)} (độ dài gốc {header['original_length']} byte)")
     
     # Tính số bit cần đọc
     num_bits_needed = message_length * 8
     print(f"Số bit cần đọc: {num_bits_needed}")
     
-    # Đọc thông điệp nhị phân
+    # Chỉ đọc các pixel chứa thông điệp, ngay sau header
     print("Trích xuất dữ liệu nhị phân...")
-    secret_msg_binary = ""
-    
-    # Bắt đầu đọc từ pixel thứ 5 (sau header)
-    pixel_index = 4
-    
-    # Đọc đủ số bit cần thiết hoặc đến hết ảnh
-    while len(secret_msg_binary) < num_bits_needed and pixel_index < len(pixels):
-        secret_msg_binary += exportDataFromPixel(pixel_index, pixels)
-        pixel_index += 1
-    
-    # Cắt đến đúng độ dài cần thiết
-    secret_msg_binary = secret_msg_binary[:num_bits_needed]
+    try:
+        with timer.stage("extract"):
+            payload = source.readPayload(header)
+    except (IOError, ValueError) as e:
+        # Header hợp lệ nhưng không đọc được phần dữ liệu (file bị cắt, hỏng hoặc sai khóa)
+        print(f"Lỗi khi trích xuất dữ liệu: {e}")
+        print("Tính toàn vẹn: không đọc được dữ liệu theo header, thông điệp đã bị hỏng ✗")
+        return None
+    bits_read = len(payload) * 8
     
     # Kiểm tra xem đã đọc đủ bit chưa
-    if len(secret_msg_binary) < num_bits_needed:
-        print(f"Cảnh báo: Chỉ đọc được {len(secret_msg_binary)}/{num_bits_needed} bit")
-    
-    # Chuyển đổi từ nhị phân sang văn bản
-    print("Chuyển đổi dữ liệu nhị phân thành văn bản...")
-    extracted_message = binaryToText(secret_msg_binary)
+    if bits_read < num_bits_needed:
+        print(f"Cảnh báo: Chỉ đọc được {bits_read}/{num_bits_needed} bit")
+    
+    # Kiểm tra CRC32 của dữ liệu đã đọc (trước khi giải nén) với header
+    with timer.stage("checksum"):
+        integrity = verifyChecksum(header, payload)
+    if integrity is None:
+        print("Tính toàn vẹn: không kiểm tra được (header cũ không có checksum)")
+    elif integrity:
+        print(f"Tính toàn vẹn: CRC32 {header['checksum']:08x} khớp ✓")
+    else:
+        print(f"Cảnh báo: CRC32 không khớp với header ({header['checksum']:08x}), thông điệp đã bị hỏng ✗")
     
-    # Kiểm tra độ dài thông điệp
-    if len(extracted_message) != message_length:
-        print(f"Cảnh báo: Độ dài thông điệp trích xuất ({len(extracted_message)}) không khớp với độ dài đã mã hóa ({message_length})")
+    # Giải nén theo từng khối nếu thông điệp đã được nén khi giấu, cắt các byte 0
+    # bù ở cuối (chế độ cập nhật của bước 3) rồi chuyển thành văn bản; khi có file
+    # đầu ra, các khối được ghi thẳng ra file thay vì gom lại trong bộ nhớ
+    if codec != CODEC_NONE:
+        print("Giải nén thông điệp...")
+    try:
+        if output_text:
+            print(f"Lưu thông điệp trích xuất vào: {output_text}")
+            with timer.stage("write_message"):
+                message_bytes, extracted_length, extracted_message = writeText(
+                    payload, codec, header['original_length'], output_text)
+        else:
+            with timer.stage("decompress"):
+                payload = decompressPayload(payload, codec, header['original_length'])
+            print("Chuyển đổi dữ liệu nhị phân thành văn bản...")
+            with timer.stage("text_conversion"):
+                extracted_message = bytesToText(payload)
+            message_bytes, extracted_length = len(payload), len(extracted_message)
+    except ValueError as e:
+        print(f"Lỗi: {e}")
+        return None
     
-    # Lưu thông điệp trích xuất
-    if output_text and extracted_message:
-        print(f"Lưu thông điệp trích xuất vào: {output_text}")
-        with open(output_text, 'w', encoding='utf-8') as f:
-            f.write(extracted_message)
+    # Kiểm tra độ dài thông điệp (tính theo byte như trong header)
+    if message_bytes != header['original_length']:
+        print(f"Cảnh báo: Độ dài thông điệp trích xuất ({message_bytes} byte) không khớp với độ dài đã mã hóa ({header['original_length']} byte)")
     
     # Lưu thông tin trích xuất
     if output_info:
@@ -182,9 +189,16 @@ def extract_message(stego_image_path, output_text=None, output_info=None):
         extract_info = {
             "stego_image": stego_image_path,
             "message_length": message_length,
-            "bits_read": len(secret_msg_binary),
+            "bits_per_channel": bits_per_channel,
+            "codec": CODEC_NAMES.get(codec, codec),
+            "original_length": header['original_length'],
+            "scatter": bool(scatter_key),
+            "matrix_order": matrix_order,
+            "checksum": header['checksum'],
+            "integrity": INTEGRITY_RESULTS[integrity],
+            "bits_read": bits_read,
             "bits_needed": num_bits_needed,
-            "extracted_length": len(extracted_message),
+            "extracted_length": extracted_length,
             "output_file": output_text
         }
         
@@ -200,6 +214,7 @@ def extract_message(stego_image_path, output_text=None, output_info=None):
                 data = {"extract": extract_info}
         else:
             data = {"extract": extract_info}
+        timer.attach(data)
         
         # Lưu thông tin
         print(f"Lưu thông tin trích xuất vào: {output_info}")
@@ -209,9 +224,8 @@ def extract_message(stego_image_path, output_text=None, output_info=None):
     # Hiển thị preview thông điệp
     if extracted_message:
         print("\nXem trước thông điệp trích xuất:")
-        preview_length = min(100, len(extracted_message))
-        preview = extracted_message[:preview_length]
-        if len(extracted_message) > preview_length:
+        preview = extracted_message[:PREVIEW_LENGTH]
+        if extracted_length > PREVIEW_LENGTH:
             preview += "..."
         print(preview)
     
@@ -260,11 +274,14 @@ def main():
     if not output_text:
         output_text = f"extracted_{os.path.basename(stego_image_path)}.txt"
     
+    # Khóa đã dùng khi giấu (nếu có)
+    scatter_key = readKey("Nhập khóa đã dùng để rải thông điệp (Enter nếu giấu tuần tự): ")
+    
     # Đường dẫn để lưu thông tin trích xuất
     output_info = "stego_extract.json"
     
     # Trích xuất thông điệp
-    extracted_message = extract_message(stego_image_path, output_text, output_info)
+    extracted_message = extract_message(stego_image_path, output_text, output_info, scatter_key)
     
     if extracted_message:
         print(f"\nBước 4 hoàn tất. Thông điệp đã được trích xuất thành công.")
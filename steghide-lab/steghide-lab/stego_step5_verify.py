@@ -3,15 +3,38 @@ Bước 5: Kiểm tra tính chính xác của quá trình giấu và trích xu
 
 Chức năng:
     - Đọc thông điệp gốc và thông điệp đã trích xuất
-    - So sánh hai thông điệp
+    - So sánh hai thông điệp: kích thước và SHA-256 trước, chỉ so sánh nội dung khi khác nhau
     - Hiển thị thống kê về quá trình giấu tin và trích xuất
+    - Kiểm tra ảnh đã giấu tin chỉ bằng CRC32 trong header khi không còn thông điệp gốc
+    - Gộp thời gian và bộ nhớ từng giai đoạn của các bước thành bảng và file profile (stego_timing)
+    - Hiển thị số lần trúng/trượt bộ nhớ đệm của các bước (stego_cache)
+    - Hiển thị số kênh bị sửa và hiệu suất giấu của chế độ mã hóa ma trận (stego_matrix)
 """
 
 import os
 import json
 import difflib
+import hashlib
+from collections import Counter
 from datetime import datetime
 
+import numpy as np
+
+from stego_cache import CACHE_KINDS
+from stego_codec import decompressPayload
+from stego_engine import CODEC_NONE, INTEGRITY_RESULTS, verifyChecksum
+from stego_scatter import readKey
+from stego_timing import StageTimer, collectTimings, writeChromeTrace
+
+# Kích thước khối khi băm file và khi so sánh theo từng đoạn
+HASH_CHUNK = 1 << 20
+COMPARE_CHUNK = 1 << 20
+
+# Tổng số ký tự tối đa để dùng difflib.SequenceMatcher: chi phí bậc hai chỉ chấp nhận được
+# với vài trăm ký tự, lớn hơn thì ước lượng độ giống nhau bằng các phép toán tuyến tính
+DIFFLIB_LIMIT = 512
+SIMILARITY_BLOCK = 64
+
 def read_file(file_path):
     """
     Đọc nội dung từ file
@@ -29,10 +52,159 @@ def read_file(file_path):
         print(f"Lỗi khi đọc file {file_path}: {e}")
         return None
 
+def read_payload(payload_info):
+    """
+    Đọc thông điệp từ file payload do bước 2 tạo ra (giải nén nếu cần)
+    
+    Args:
+        payload_info (dict): Thông tin 'binary' trong dữ liệu JSON
+        
+    Returns:
+        str: Nội dung thông điệp, None nếu có lỗi
+    """
+    try:
+        with open(payload_info["payload_file"], 'rb') as f:
+            f.seek(payload_info["offset"])
+            payload = f.read(payload_info["size"])
+        codec = payload_info.get("codec", CODEC_NONE)
+        if codec != CODEC_NONE:
+            payload = decompressPayload(payload, codec, payload_info["message_bytes"])
+        return payload.decode('utf-8')
+    except Exception as e:
+        print(f"Lỗi khi đọc file payload {payload_info['payload_file']}: {e}")
+        return None
+
+def file_digest(file_path, chunk_size=HASH_CHUNK):
+    """
+    Tính SHA-256 của file theo từng khối, không đọc cả file vào bộ nhớ
+    
+    Args:
+        file_path (str): Đường dẫn đến file
+        chunk_size (int): Kích thước mỗi khối đọc
+        
+    Returns:
+        str: SHA-256 dạng hex
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compare_files(original_path, extracted_path, original_length=None, extracted_length=None):
+    """
+    So sánh nhanh hai file thông điệp bằng kích thước rồi SHA-256
+    
+    Args:
+        original_path (str): File thông điệp gốc
+        extracted_path (str): File thông điệp đã trích xuất
+        original_length (int, optional): Số ký tự của thông điệp gốc (mặc định số byte)
+        extracted_length (int, optional): Số ký tự của thông điệp trích xuất (mặc định số byte)
+        
+    Returns:
+        dict: Kết quả so sánh nếu hai file giống hệt, None nếu khác (cần so sánh nội dung)
+    """
+    original_size = os.path.getsize(original_path)
+    if original_size != os.path.getsize(extracted_path):
+        return None
+    original_sha256 = file_digest(original_path)
+    if original_sha256 != file_digest(extracted_path):
+        return None
+    return {
+        "match": True,
+        "original_length": original_length if original_length is not None else original_size,
+        "extracted_length": extracted_length if extracted_length is not None else original_size,
+        "diff_ratio": 1.0,
+        "first_diff_pos": None,
+        "first_diff_original": None,
+        "first_diff_extracted": None,
+        "method": "sha256",
+        "sha256": original_sha256
+    }
+
+def common_prefix(a, b, chunk_size=COMPARE_CHUNK):
+    """
+    Tính độ dài phần đầu chung của hai mảng, so sánh từng khối để dừng sớm
+    
+    Args:
+        a (numpy.ndarray): Mảng thứ nhất
+        b (numpy.ndarray): Mảng thứ hai
+        chunk_size (int): Số phần tử so sánh mỗi lượt
+        
+    Returns:
+        int: Số phần tử đầu giống nhau
+    """
+    length = min(len(a), len(b))
+    for start in range(0, length, chunk_size):
+        stop = min(start + chunk_size, length)
+        diff = np.flatnonzero(a[start:stop] != b[start:stop])
+        if len(diff):
+            return start + int(diff[0])
+    return length
+
+def block_matches(a, b, block=SIMILARITY_BLOCK):
+    """
+    Đếm số phần tử nằm trong các khối giống nhau của hai mảng (không phụ thuộc vị trí khối)
+    
+    Args:
+        a (numpy.ndarray): Mảng thứ nhất
+        b (numpy.ndarray): Mảng thứ hai
+        block (int): Số phần tử mỗi khối
+        
+    Returns:
+        int: Số phần tử khớp (ước lượng dưới của số ký tự chung)
+    """
+    counts = Counter(a[k:k + block].tobytes() for k in range(0, len(a) - block + 1, block))
+    matches = 0
+    for k in range(0, len(b) - block + 1, block):
+        key = b[k:k + block].tobytes()
+        if counts[key] > 0:
+            counts[key] -= 1
+            matches += block
+    return matches
+
+def similarity_ratio(original, extracted, a, b):
+    """
+    Tính độ giống nhau 2 × số ký tự khớp / tổng số ký tự với chi phí giới hạn
+    
+    Thông điệp rất ngắn (DIFFLIB_LIMIT) dùng difflib.SequenceMatcher. Thông điệp dài hơn chỉ
+    dùng phần đầu và phần cuối chung, so sánh từng vị trí nếu phần giữa cùng độ
+    dài (lỗi thay thế), ngược lại so khớp theo khối băm; tất cả đều tuyến tính.
+    
+    Args:
+        original (str): Thông điệp gốc
+        extracted (str): Thông điệp đã trích xuất
+        a (numpy.ndarray): Mã ký tự của thông điệp gốc
+        b (numpy.ndarray): Mã ký tự của thông điệp đã trích xuất
+        
+    Returns:
+        tuple: (độ giống nhau từ 0 đến 1, phương pháp đã dùng)
+    """
+    total = len(a) + len(b)
+    if total == 0:
+        return 1.0, "exact"
+    if total <= DIFFLIB_LIMIT:
+        return difflib.SequenceMatcher(None, original, extracted).ratio(), "difflib"
+    
+    prefix = common_prefix(a, b)
+    suffix = common_prefix(a[prefix:][::-1], b[prefix:][::-1])
+    a_middle = a[prefix:len(a) - suffix]
+    b_middle = b[prefix:len(b) - suffix]
+    if len(a_middle) == len(b_middle):
+        matches = int(np.count_nonzero(a_middle == b_middle))
+        method = "positional"
+    else:
+        matches = block_matches(a_middle, b_middle)
+        method = "blocks"
+    return 2.0 * (prefix + suffix + matches) / total, method
+
 def compare_messages(original, extracted):
     """
     So sánh thông điệp gốc và thông điệp đã trích xuất
     
+    Chi phí tuyến tính theo độ dài: khớp hoàn toàn được trả về ngay, vị trí khác
+    biệt đầu tiên được tìm bằng phép so sánh mảng.
+    
     Args:
         original (str): Thông điệp gốc
         extracted (str): Thông điệp đã trích xuất
@@ -53,29 +225,41 @@ def compare_messages(original, extracted):
     original_length = len(original)
     extracted_length = len(extracted)
     
-    # Tính toán mức độ khác biệt
-    matcher = difflib.SequenceMatcher(None, original, extracted)
-    diff_ratio = matcher.ratio()
-    
     # Xác định xem hai thông điệp có trùng khớp không
     match = (original == extracted)
+    if match:
+        return {
+            "match": True,
+            "original_length": original_length,
+            "extracted_length": extracted_length,
+            "diff_ratio": 1.0,
+            "first_diff_pos": None,
+            "first_diff_original": None,
+            "first_diff_extracted": None,
+            "method": "exact"
+        }
+    
+    # Mã ký tự (UTF-32) để so sánh theo vị trí ký tự bằng các phép toán mảng
+    a = np.frombuffer(original.encode('utf-32-le'), dtype='<u4')
+    b = np.frombuffer(extracted.encode('utf-32-le'), dtype='<u4')
+    
+    # Tính toán mức độ khác biệt
+    diff_ratio, method = similarity_ratio(original, extracted, a, b)
     
-    # Nếu không trùng khớp, tìm vị trí đầu tiên khác nhau
+    # Tìm vị trí đầu tiên khác nhau
     first_diff_pos = None
     first_diff_original = None
     first_diff_extracted = None
     
-    if not match:
-        min_len = min(original_length, extracted_length)
-        for i in range(min_len):
-            if original[i] != extracted[i]:
-                first_diff_pos = i
-                # Lấy một đoạn nhỏ xung quanh vị trí khác biệt
-                start = max(0, i-10)
-                end = min(min_len, i+10)
-                first_diff_original = original[start:end]
-                first_diff_extracted = extracted[start:end]
-                break
+    min_len = min(original_length, extracted_length)
+    i = common_prefix(a, b)
+    if i < min_len:
+        first_diff_pos = i
+        # Lấy một đoạn nhỏ xung quanh vị trí khác biệt
+        start = max(0, i-10)
+        end = min(min_len, i+10)
+        first_diff_original = original[start:end]
+        first_diff_extracted = extracted[start:end]
     
     return {
         "match": match,
@@ -84,10 +268,43 @@ def compare_messages(original, extracted):
         "diff_ratio": diff_ratio,
         "first_diff_pos": first_diff_pos,
         "first_diff_original": first_diff_original,
-        "first_diff_extracted": first_diff_extracted
+        "first_diff_extracted": first_diff_extracted,
+        "method": method
     }
 
-def verify_steganography(original_data_path=None, extracted_data_path=None, output_report=None):
+def format_bytes(value):
+    """
+    Định dạng số byte để hiển thị trong bảng hiệu suất
+    
+    Args:
+        value (int): Số byte (None nếu không đo được)
+        
+    Returns:
+        str: Giá trị kèm đơn vị, "-" nếu không có
+    """
+    if value is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+def print_timings(rows):
+    """
+    Hiển thị bảng thời gian và bộ nhớ của từng giai đoạn
+    
+    Args:
+        rows (list): Bảng từ stego_timing.collectTimings
+    """
+    print(f"  {'Bước':<8} {'Giai đoạn':<16} {'Thời gian':>10} {'CPU':>10} {'RSS đỉnh':>10} {'Đọc':>10} {'Ghi':>10}")
+    for row in rows:
+        print(f"  {row['step']:<8} {row['stage']:<16} {row['wall_seconds']:>9.4f}s {row['cpu_seconds']:>9.4f}s "
+              f"{format_bytes(row['peak_rss_bytes']):>10} {format_bytes(row['bytes_read']):>10} "
+              f"{format_bytes(row['bytes_written']):>10}")
+
+def verify_steganography(original_data_path=None, extracted_data_path=None, output_report=None,
+                         profile_path=None):
     """
     Kiểm tra tính chính xác của quá trình giấu và trích xuất
     
@@ -95,10 +312,12 @@ def verify_steganography(original_data_path=None, extracted_data_path=None, outp
         original_data_path (str, optional): Đường dẫn đến file thông tin ban đầu
         extracted_data_path (str, optional): Đường dẫn đến file thông tin trích xuất
         output_report (str, optional): Đường dẫn để lưu báo cáo
+        profile_path (str, optional): Đường dẫn để lưu profile dạng Chrome trace của các bước
         
     Returns:
         dict: Kết quả kiểm tra
     """
+    timer = StageTimer("verify")
     report = {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "files": {
@@ -189,25 +408,41 @@ def verify_steganography(original_data_path=None, extracted_data_path=None, outp
     else:
         report["files"]["extracted_message_exists"] = True
     
-    # Đọc thông điệp
-    original_message = None
-    extracted_message = None
+    # Hai file giống hệt (cùng kích thước và SHA-256) thì không cần đọc nội dung
+    comparison = None
+    if (original_message_path and os.path.exists(original_message_path)
+            and extracted_message_path and os.path.exists(extracted_message_path)):
+        print("So sánh kích thước và SHA-256 của hai file thông điệp...")
+        with timer.stage("hash"):
+            comparison = compare_files(original_message_path, extracted_message_path,
+                                       original_data.get("message_info", {}).get("length"),
+                                       extracted_data.get("extract", {}).get("extracted_length"))
+    
+    if comparison is None:
+        # Đọc thông điệp
+        original_message = None
+        extracted_message = None
+        
+        with timer.stage("read_messages"):
+            if original_message_path and os.path.exists(original_message_path):
+                original_message = read_file(original_message_path)
+            else:
+                # Thử đọc thông điệp từ file payload của bước 2
+                payload_info = original_data.get("binary", {})
+                if os.path.exists(payload_info.get("payload_file") or ""):
+                    original_message = read_payload(payload_info)
+                    print(f"Đọc thông điệp gốc từ file payload: {payload_info['payload_file']}")
+            
+            if extracted_message_path and os.path.exists(extracted_message_path):
+                extracted_message = read_file(extracted_message_path)
+        
+        # So sánh thông điệp
+        if original_message is not None and extracted_message is not None:
+            print("So sánh thông điệp gốc và thông điệp đã trích xuất...")
+            with timer.stage("compare"):
+                comparison = compare_messages(original_message, extracted_message)
     
-    if original_message_path and os.path.exists(original_message_path):
-        original_message = read_file(original_message_path)
-    else:
-        # Thử đọc thông điệp từ dữ liệu JSON
-        if "message" in original_data:
-            original_message = original_data["message"]
-            print("Đọc thông điệp gốc từ dữ liệu JSON.")
-    
-    if extracted_message_path and os.path.exists(extracted_message_path):
-        extracted_message = read_file(extracted_message_path)
-    
-    # So sánh thông điệp
-    if original_message is not None and extracted_message is not None:
-        print("So sánh thông điệp gốc và thông điệp đã trích xuất...")
-        comparison = compare_messages(original_message, extracted_message)
+    if comparison is not None:
         report["comparison"] = comparison
         
         # Hiển thị kết quả
@@ -228,11 +463,25 @@ def verify_steganography(original_data_path=None, extracted_data_path=None, outp
                 if comparison["first_diff_original"] and comparison["first_diff_extracted"]:
                     print(f"  + Gốc: \"{comparison['first_diff_original']}\"")
                     print(f"  + Trích xuất: \"{comparison['first_diff_extracted']}\"")
+    elif extracted_data.get("extract", {}).get("integrity") in ("ok", "mismatch"):
+        # Không có thông điệp gốc: dùng kết quả kiểm tra CRC32 trong header của bước 4
+        integrity = extracted_data["extract"]["integrity"]
+        print("Không có thông điệp gốc, dùng kết quả kiểm tra CRC32 của bước 4.")
+        if integrity == "ok":
+            print("- Kết quả: CRC32 KHỚP VỚI HEADER ✓")
+            report["status"] = "Success"
+        else:
+            print("- Kết quả: CRC32 KHÔNG KHỚP VỚI HEADER ✗")
+            report["status"] = "Failed"
+            report["error"] = "CRC32 của thông điệp trích xuất không khớp với header"
     else:
         print("Không thể so sánh thông điệp do thiếu dữ liệu.")
         report["status"] = "Incomplete"
         report["error"] = "Không thể so sánh thông điệp do thiếu dữ liệu"
     
+    if "integrity" in extracted_data.get("extract", {}):
+        report["integrity"] = extracted_data["extract"]["integrity"]
+    
     # Thu thập thông tin hiệu suất
     print("\n=== THÔNG TIN HIỆU SUẤT ===")
     
@@ -255,7 +504,7 @@ def verify_steganography(original_data_path=None, extracted_data_path=None, outp
     if "extract" in extracted_data:
         extract_info = extracted_data["extract"]
         print(f"- Ảnh đã giấu tin: {extract_info.get('stego_image', 'N/A')}")
-        print(f"- Độ dài thông điệp đọc được: {extract_info.get('message_length', 'N/A')} ký tự")
+        print(f"- Độ dài thông điệp đọc được: {extract_info.get('message_length', 'N/A')} byte")
         print(f"- Số bit đã đọc: {extract_info.get('bits_read', 'N/A')}/{extract_info.get('bits_needed', 'N/A')}")
         
         if "performance" not in report:
@@ -268,6 +517,106 @@ def verify_steganography(original_data_path=None, extracted_data_path=None, outp
             "bits_needed": extract_info.get('bits_needed', 'N/A')
         }
     
+    # Số kênh bị sửa và hiệu suất giấu khi bước 3 dùng mã hóa ma trận
+    matrix = original_data.get("stego", {}).get("matrix")
+    if matrix:
+        print(f"- Mã hóa ma trận: Hamming bậc {matrix['order']}, sửa {matrix['channels_changed']} kênh "
+              f"({matrix['pixels_changed']}/{matrix['pixels_used']} pixel)")
+        print(f"- Hiệu suất giấu: {matrix['bits_per_change'] or 0:.2f} bit mỗi kênh bị sửa "
+              f"(dự kiến {matrix['expected_bits_per_change']:.2f})")
+        report.setdefault("performance", {})["matrix"] = matrix
+    
+    # Thời gian và bộ nhớ từng giai đoạn: các bước 1-3 được chép theo JSON, bước 4 nằm trong file trích xuất
+    timings = collectTimings(original_data, extracted_data, timer.attach({}))
+    if timings:
+        print("- Thời gian từng giai đoạn:")
+        print_timings(timings)
+        report.setdefault("performance", {})["timings"] = timings
+        report["performance"]["total_seconds"] = sum(row['wall_seconds'] for row in timings)
+        if profile_path:
+            events = writeChromeTrace(timings, profile_path)
+            print(f"- Lưu profile ({events} giai đoạn) vào: {profile_path}")
+            report["performance"]["profile"] = profile_path
+    
+    # Số lần trúng/trượt bộ nhớ đệm do bước 1 và bước 3 ghi lại
+    cache = {**original_data.get("cache", {}), **extracted_data.get("cache", {})}
+    if cache:
+        print("- Bộ nhớ đệm:")
+        for step, info in cache.items():
+            for kind in CACHE_KINDS:
+                if kind in info:
+                    print(f"  + {step} ({kind}): trúng {info[kind]['hits']}, trượt {info[kind]['misses']}")
+        report.setdefault("performance", {})["cache"] = cache
+    
+    # Lưu báo cáo
+    if output_report:
+        print(f"\nLưu báo cáo vào: {output_report}")
+        with open(output_report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    return report
+
+def verify_image(stego_image_path, scatter_key=None, output_report=None):
+    """
+    Kiểm tra ảnh đã giấu tin chỉ bằng CRC32 ghi trong header, không cần thông điệp gốc
+    
+    Args:
+        stego_image_path (str): Đường dẫn đến ảnh đã giấu tin
+        scatter_key (str, optional): Khóa đã dùng để rải thông điệp khi giấu
+        output_report (str, optional): Đường dẫn để lưu báo cáo
+        
+    Returns:
+        dict: Kết quả kiểm tra (status Success nếu CRC32 khớp)
+    """
+    report = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "files": {
+            "stego_image": stego_image_path
+        },
+        "status": "Initialized"
+    }
+    
+    # stego_pipeline dùng compare_messages của bước này nên chỉ import khi cần
+    from stego_pipeline import StegoSource
+    
+    # Đọc header và dữ liệu đã lưu (chưa giải nén) từ ảnh
+    print(f"Đọc ảnh đã giấu tin: {stego_image_path}")
+    try:
+        source = StegoSource(stego_image_path, scatter_key)
+        header = source.readHeader()
+        payload = source.readPayload(header)
+    except Exception as e:
+        print(f"Lỗi: {e}")
+        report["status"] = "Failed"
+        report["error"] = str(e)
+        return report
+    
+    integrity = verifyChecksum(header, payload)
+    report["integrity"] = INTEGRITY_RESULTS[integrity]
+    report["header"] = {
+        "version": header['version'],
+        "message_length": header['message_length'],
+        "original_length": header['original_length'],
+        "bits_per_channel": header['bits_per_channel'],
+        "codec": header['codec'],
+        "matrix_order": header['matrix_order'],
+        "checksum": header['checksum']
+    }
+    
+    print("\n=== KẾT QUẢ KIỂM TRA CHECKSUM ===")
+    print(f"- Header phiên bản {header['version']}, {header['message_length']} byte dữ liệu")
+    if integrity is None:
+        print("- Kết quả: không kiểm tra được (header cũ không có checksum)")
+        report["status"] = "Incomplete"
+        report["error"] = "Header không có checksum"
+    elif integrity:
+        print(f"- Kết quả: CRC32 {header['checksum']:08x} KHỚP ✓")
+        report["status"] = "Success"
+    else:
+        print(f"- Kết quả: CRC32 KHÔNG KHỚP với header ({header['checksum']:08x}) ✗")
+        report["status"] = "Failed"
+        report["error"] = "CRC32 của thông điệp trích xuất không khớp với header"
+    
     # Lưu báo cáo
     if output_report:
         print(f"\nLưu báo cáo vào: {output_report}")
@@ -290,29 +639,36 @@ def main():
     
     extracted_data_path = "stego_extract.json"
     
+    # Đường dẫn để lưu báo cáo và profile của các bước (mở bằng chrome://tracing hoặc Perfetto)
+    output_report = "stego_verification.json"
+    profile_path = "stego_profile.json"
+    
+    report = None
     if original_data_path is None:
         print("Không tìm thấy file thông tin ban đầu.")
-        custom_path = input("Nhập đường dẫn đến file thông tin ban đầu: ").strip()
-        if custom_path and os.path.exists(custom_path):
+        custom_path = input("Nhập đường dẫn đến file thông tin ban đầu (hoặc ảnh đã giấu tin để kiểm tra bằng checksum): ").strip()
+        if custom_path and os.path.exists(custom_path) and not custom_path.lower().endswith(".json"):
+            # Chỉ có ảnh: kiểm tra bằng CRC32 trong header, không cần các bước trước
+            scatter_key = readKey("Nhập khóa đã dùng để rải thông điệp (Enter nếu giấu tuần tự): ")
+            report = verify_image(custom_path, scatter_key, output_report)
+        elif custom_path and os.path.exists(custom_path):
             original_data_path = custom_path
         else:
             print("Không thể tiếp tục. Vui lòng chạy các bước trước.")
             return
     
-    if not os.path.exists(extracted_data_path):
-        print("Không tìm thấy file thông tin trích xuất.")
-        custom_path = input("Nhập đường dẫn đến file thông tin trích xuất: ").strip()
-        if custom_path and os.path.exists(custom_path):
-            extracted_data_path = custom_path
-        else:
-            print("Không thể tiếp tục. Vui lòng chạy bước 4 trước.")
-            return
-    
-    # Đường dẫn để lưu báo cáo
-    output_report = "stego_verification.json"
-    
-    # Kiểm tra tính chính xác
-    report = verify_steganography(original_data_path, extracted_data_path, output_report)
+    if report is None:
+        if not os.path.exists(extracted_data_path):
+            print("Không tìm thấy file thông tin trích xuất.")
+            custom_path = input("Nhập đường dẫn đến file thông tin trích xuất: ").strip()
+            if custom_path and os.path.exists(custom_path):
+                extracted_data_path = custom_path
+            else:
+                print("Không thể tiếp tục. Vui lòng chạy bước 4 trước.")
+                return
+        
+        # Kiểm tra tính chính xác
+        report = verify_steganography(original_data_path, extracted_data_path, output_report, profile_path)
     
     print("\n=== KẾT LUẬN ===")
     if report["status"] == "Success":
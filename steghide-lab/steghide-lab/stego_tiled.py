@@ -0,0 +1,208 @@
+"""
+Giấu tin theo từng dải hàng với bộ nhớ giới hạn cho ảnh rất lớn
+
+Chức năng:
+    - Chia ảnh gốc (mảng hoặc memory map của stego_pixels.bin) thành các dải hàng
+    - Chỉ sao chép và sửa các dải mà header hoặc thông điệp chạm tới
+    - Ghi ảnh PNG kết quả theo từng dải, các dải còn lại được chép nguyên vẹn
+"""
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from stego_capacity import PNG_SIGNATURE, capacityBytes
+from stego_engine import (BITS_PER_CHANNEL, BITS_PER_PIXEL, CHANNELS, EXTENDED_PIXELS, HEADER_PIXELS, embedBits,
+                          headerBits, imageChannels, payloadPadding)
+
+# Ngân sách bộ nhớ mặc định cho một dải (byte)
+DEFAULT_MEMORY_BUDGET = 256 << 20
+
+# Mỗi dải cần: bản sao dải để sửa, các hàng đã lọc cho PNG và một mảng tạm khi lọc
+BAND_COPIES = 3
+
+def bandRows(width, memory_budget=DEFAULT_MEMORY_BUDGET, band_rows=None, channels=CHANNELS):
+    """
+    Tính số hàng mỗi dải sao cho bộ nhớ đỉnh không vượt ngân sách
+    
+    Args:
+        width (int): Chiều rộng ảnh
+        memory_budget (int): Ngân sách bộ nhớ (byte)
+        band_rows (int, optional): Số hàng mong muốn, bị giảm nếu vượt ngân sách
+        channels (int): Số kênh màu
+        
+    Returns:
+        int: Số hàng mỗi dải (dải đầu luôn chứa đủ các pixel header, kể cả header mở rộng)
+    """
+    rows = memory_budget // (BAND_COPIES * (width * channels + 1))
+    if band_rows:
+        rows = min(rows, band_rows)
+    header_rows = -(-(HEADER_PIXELS + EXTENDED_PIXELS) // width)
+    if rows < header_rows:
+        raise ValueError(f"Ngân sách bộ nhớ {memory_budget} byte không đủ cho một dải {header_rows} hàng")
+    return rows
+
+def payloadBits(payload, padding, start_bit, end_bit):
+    """
+    Lấy một đoạn của luồng bit thông điệp (bit bù ở đầu + bit thông điệp + bit 0 ở cuối)
+    
+    Chỉ các byte thông điệp thuộc đoạn cần lấy mới được giải nén thành bit.
+    
+    Args:
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte
+        padding (int): Số bit 0 bù vào đầu thông điệp
+        start_bit (int): Vị trí bit bắt đầu trong luồng
+        end_bit (int): Vị trí bit kết thúc (không bao gồm)
+        
+    Returns:
+        numpy.ndarray: Mảng end_bit - start_bit bit
+    """
+    bits = np.zeros(end_bit - start_bit, dtype=np.uint8)
+    lo = max(start_bit - padding, 0)
+    hi = min(max(end_bit - padding, 0), len(payload) * 8)
+    if hi > lo:
+        chunk = np.unpackbits(np.frombuffer(payload, dtype=np.uint8)[lo // 8:-(-hi // 8)])
+        lead = max(padding - start_bit, 0)
+        bits[lead:lead + hi - lo] = chunk[lo % 8:lo % 8 + hi - lo]
+    return bits
+
+def embedBands(image, payload, band_rows, bits_per_channel=BITS_PER_CHANNEL, header=None):
+    """
+    Giấu header và thông điệp vào ảnh theo từng dải hàng
+    
+    Cho kết quả giống hệt embedBytes nhưng chỉ sao chép các dải được sửa;
+    các dải phía sau thông điệp được trả về nguyên vẹn (không sao chép).
+    
+    Args:
+        image (numpy.ndarray): Ảnh H×W×3 uint8 của cv2 (có thể là memory map chỉ đọc)
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte
+        band_rows (int): Số hàng mỗi dải
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Yields:
+        tuple: (numpy.ndarray dải ảnh, bool dải đã bị sửa)
+    """
+    height, width = image.shape[:2]
+    bits_per_pixel = bits_per_channel * CHANNELS
+    padding = payloadPadding(len(payload), bits_per_channel)
+    num_bits = padding + len(payload) * 8
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    payload_pixel = len(header) // BITS_PER_PIXEL
+    end_pixel = payload_pixel + -(-num_bits // bits_per_pixel)
+    if end_pixel > height * width:
+        raise ValueError("Ảnh không đủ lớn để chứa thông điệp")
+    
+    for row in range(0, height, band_rows):
+        band = image[row:row + band_rows]
+        first = row * width
+        last = first + band.shape[0] * width
+        if first >= end_pixel:
+            yield band, False
+            continue
+        
+        # Chỉ dải chứa header hoặc thông điệp mới được sao chép để sửa
+        band = np.array(band)
+        if first == 0:
+            embedBits(band, header)
+        start = max(first, payload_pixel)
+        stop = min(last, end_pixel)
+        if stop > start:
+            bits = payloadBits(payload, padding, (start - payload_pixel) * bits_per_pixel,
+                               (stop - payload_pixel) * bits_per_pixel)
+            embedBits(band, bits, start - first, bits_per_channel)
+        yield band, True
+
+def _writeChunk(f, chunk_type, data):
+    """Ghi một chunk PNG (độ dài, loại, dữ liệu, CRC)"""
+    f.write(struct.pack('>I', len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+def writePngBands(filename, width, height, bands, compression=6):
+    """
+    Ghi ảnh PNG RGB 8 bit theo từng dải mà không giữ toàn bộ ảnh trong bộ nhớ
+    
+    Mỗi hàng dùng bộ lọc Sub của PNG (hiệu với pixel bên trái) rồi được nén
+    tiếp vào cùng một luồng zlib. Nếu ghi lỗi, file dở dang bị xóa.
+    
+    Args:
+        filename (str): Đường dẫn file PNG đầu ra
+        width (int): Chiều rộng ảnh
+        height (int): Chiều cao ảnh
+        bands (iterable): Các dải H'×W×3 theo thứ tự kênh của cv2, từ trên xuống
+        compression (int): Mức nén zlib (0-9)
+        
+    Returns:
+        int: Số hàng đã ghi
+    """
+    compressor = zlib.compressobj(compression)
+    rows_written = 0
+    try:
+        with open(filename, 'wb') as f:
+            f.write(PNG_SIGNATURE)
+            _writeChunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            for band in bands:
+                if band.shape[1:] != (width, CHANNELS):
+                    raise ValueError(f"Ghi PNG theo dải chỉ hỗ trợ ảnh {CHANNELS} kênh, dải có kích thước {band.shape}")
+                rgb = band[..., ::-1].reshape(band.shape[0], width * CHANNELS)
+                rows = np.empty((band.shape[0], width * CHANNELS + 1), dtype=np.uint8)
+                rows[:, 0] = 1
+                rows[:, 1:CHANNELS + 1] = rgb[:, :CHANNELS]
+                np.subtract(rgb[:, CHANNELS:], rgb[:, :-CHANNELS], out=rows[:, CHANNELS + 1:])
+                data = compressor.compress(rows)
+                if data:
+                    _writeChunk(f, b'IDAT', data)
+                rows_written += band.shape[0]
+            _writeChunk(f, b'IDAT', compressor.flush())
+            _writeChunk(f, b'IEND', b'')
+        if rows_written != height:
+            raise ValueError(f"Số hàng đã ghi ({rows_written}) khác chiều cao ảnh ({height})")
+    except BaseException:
+        if os.path.exists(filename):
+            os.unlink(filename)
+        raise
+    return rows_written
+
+def embedTiled(image, payload, output_filename, bits_per_channel=BITS_PER_CHANNEL,
+               memory_budget=DEFAULT_MEMORY_BUDGET, band_rows=None, compression=6, header=None):
+    """
+    Giấu thông điệp và ghi ảnh PNG kết quả theo từng dải với bộ nhớ giới hạn
+    
+    Args:
+        image (numpy.ndarray): Ảnh H×W×3 uint8 của cv2, không bị sửa (ảnh xám hoặc có alpha không được hỗ trợ)
+        payload (bytes | numpy.ndarray): Thông điệp dạng byte
+        output_filename (str): Đường dẫn file PNG đầu ra
+        bits_per_channel (int): Số bit LSB trên mỗi kênh dùng cho thông điệp
+        memory_budget (int): Ngân sách bộ nhớ cho một dải (byte)
+        band_rows (int, optional): Số hàng mỗi dải mong muốn
+        compression (int): Mức nén zlib của PNG (0-9)
+        header (numpy.ndarray, optional): Header từ headerBits (mặc định header không nén)
+        
+    Returns:
+        dict: band_rows, bands, bands_modified
+    """
+    height, width = image.shape[:2]
+    # Các dải được giấu theo chỉ số pixel và ghi thành PNG RGB nên chỉ hỗ trợ ảnh 3 kênh
+    if imageChannels(image) != CHANNELS:
+        raise ValueError(f"Giấu theo dải chỉ hỗ trợ ảnh {CHANNELS} kênh (ảnh có {imageChannels(image)} kênh)")
+    if header is None:
+        header = headerBits(len(payload), bits_per_channel)
+    capacity = capacityBytes(width, height, bits_per_channel, header_pixels=len(header) // BITS_PER_PIXEL)
+    if len(payload) > capacity:
+        raise ValueError(f"Ảnh không đủ lớn để chứa thông điệp ({len(payload)} > {capacity} byte)")
+    rows = bandRows(width, memory_budget, band_rows)
+    stats = {"band_rows": rows, "bands": 0, "bands_modified": 0}
+    
+    def bands():
+        for band, modified in embedBands(image, payload, rows, bits_per_channel, header):
+            stats["bands"] += 1
+            stats["bands_modified"] += modified
+            yield band
+    
+    writePngBands(output_filename, width, height, bands(), compression)
+    return stats
@@ -0,0 +1,151 @@
+"""
+Đo thời gian và bộ nhớ của từng giai đoạn trong các bước giấu tin
+
+Chức năng:
+    - Ghi thời gian thực, thời gian CPU, bộ nhớ đỉnh (RSS) và số byte đọc/ghi của từng giai đoạn
+    - Lưu số liệu vào JSON của bước dưới khóa 'timings'
+    - Gộp số liệu của các bước thành bảng và ghi file profile dạng Chrome trace
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Thứ tự các bước khi gộp số liệu
+STEP_ORDER = ("prepare", "convert", "embed", "extract", "verify")
+
+# Bộ đếm byte đọc/ghi của tiến trình (Linux), tính cả dữ liệu đọc từ page cache
+PROC_IO_PATH = "/proc/self/io"
+
+def readIoCounters():
+    """
+    Đọc tổng số byte tiến trình đã đọc và ghi qua các lời gọi hệ thống
+    
+    Returns:
+        tuple: (byte đã đọc, byte đã ghi), (None, None) nếu hệ điều hành không hỗ trợ
+    """
+    try:
+        with open(PROC_IO_PATH, 'r') as f:
+            counters = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def peakRss():
+    """
+    Bộ nhớ đỉnh (RSS) của tiến trình từ lúc khởi động
+    
+    Returns:
+        int: Số byte, None nếu không có module resource
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss tính bằng KB trên Linux và bằng byte trên macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageTimer:
+    """
+    Ghi số liệu đo của các giai đoạn trong một bước
+    
+    Mỗi giai đoạn gồm thời gian thực, thời gian CPU của tiến trình, bộ nhớ
+    đỉnh tính đến cuối giai đoạn và số byte đọc/ghi trong giai đoạn.
+    """
+    
+    def __init__(self, step):
+        """
+        Args:
+            step (str): Tên bước (prepare, convert, embed, extract, verify)
+        """
+        self.step = step
+        self.stages = []
+    
+    @contextmanager
+    def stage(self, name):
+        """
+        Đo một giai đoạn trong khối with
+        
+        Args:
+            name (str): Tên giai đoạn (decode, bit_conversion, embed, encode, ...)
+        """
+        started = time.time()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        read, written = readIoCounters()
+        try:
+            yield
+        finally:
+            read_end, written_end = readIoCounters()
+            self.stages.append({
+                "stage": name,
+                "start": started,
+                "wall_seconds": time.perf_counter() - wall,
+                "cpu_seconds": time.process_time() - cpu,
+                "peak_rss_bytes": peakRss(),
+                "bytes_read": read_end - read if read is not None else None,
+                "bytes_written": written_end - written if written is not None else None,
+            })
+    
+    def attach(self, data):
+        """
+        Ghi số liệu vào dữ liệu JSON của bước (data['timings'][tên bước])
+        
+        Args:
+            data (dict): Dữ liệu JSON của bước
+            
+        Returns:
+            dict: Dữ liệu đã thêm số liệu
+        """
+        data.setdefault('timings', {})[self.step] = self.stages
+        return data
+
+def collectTimings(*sources):
+    """
+    Gộp số liệu của các bước từ nhiều file JSON thành một bảng
+    
+    Args:
+        *sources (dict): Dữ liệu JSON của các bước (nguồn sau ghi đè bước trùng tên)
+        
+    Returns:
+        list: Mỗi hàng gồm step và các trường của một giai đoạn, theo thứ tự các bước
+    """
+    steps = {}
+    for data in sources:
+        steps.update((data or {}).get('timings', {}))
+    order = sorted(steps, key=lambda step: STEP_ORDER.index(step) if step in STEP_ORDER else len(STEP_ORDER))
+    return [dict(step=step, **stage) for step in order for stage in steps[step]]
+
+def writeChromeTrace(rows, filename):
+    """
+    Ghi bảng số liệu thành file profile dạng Chrome trace (chrome://tracing, Perfetto)
+    
+    Args:
+        rows (list): Bảng từ collectTimings
+        filename (str): File JSON đầu ra
+        
+    Returns:
+        int: Số sự kiện đã ghi
+    """
+    steps = list(dict.fromkeys(row['step'] for row in rows))
+    events = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": step}}
+              for tid, step in enumerate(steps)]
+    for row in rows:
+        events.append({
+            "name": row['stage'],
+            "cat": row['step'],
+            "ph": "X",
+            "ts": row['start'] * 1e6,
+            "dur": row['wall_seconds'] * 1e6,
+            "pid": 1,
+            "tid": steps.index(row['step']),
+            "args": {key: value for key, value in row.items() if key not in ("step", "stage", "start")},
+        })
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, indent=1)
+    return len(events) - len(steps)
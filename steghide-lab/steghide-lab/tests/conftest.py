@@ -0,0 +1,28 @@
+"""
+Cấu hình chung cho các bài kiểm thử
+
+Các module stego_*.py nằm phẳng ở thư mục cha và import lẫn nhau theo tên,
+nên thư mục này được thêm vào sys.path trước khi các bài kiểm thử chạy.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Seed cố định để ảnh và thông điệp kiểm thử giống nhau giữa các lần chạy
+SEED = 20240517
+
+@pytest.fixture
+def rng():
+    """Bộ sinh số ngẫu nhiên tất định"""
+    return np.random.default_rng(SEED)
+
+@pytest.fixture(params=[1, 3, 4], ids=["gray", "bgr", "bgra"])
+def cover(request, rng):
+    """Ảnh gốc 96×80 với 1, 3 hoặc 4 kênh"""
+    shape = (80, 96) if request.param == 1 else (80, 96, request.param)
+    return rng.integers(0, 256, shape, dtype=np.uint8)
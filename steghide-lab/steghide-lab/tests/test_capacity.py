@@ -0,0 +1,20 @@
+"""Kiểm thử đọc kích thước và số kênh chỉ từ header của file ảnh"""
+
+import cv2
+import numpy as np
+import pytest
+
+from stego_capacity import readImageSize
+from stego_pixels import PixelBuffer
+
+@pytest.mark.parametrize("extension", [".png", ".bmp", ".tiff", ".ppm"])
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16], ids=["8bit", "16bit"])
+def test_header_matches_decoded_image(cover, tmp_path, extension, dtype):
+    filename = str(tmp_path / ("cover" + extension))
+    image = cover.astype(dtype)
+    if extension == ".ppm" and image.ndim == 3:
+        image = image[..., :3]
+    if not cv2.imwrite(filename, image):
+        pytest.skip(f"cv2 không ghi được {extension} {dtype.__name__}")
+    pixels = PixelBuffer.fromFile(filename)
+    assert readImageSize(filename) == (pixels.width, pixels.height, pixels.channels)
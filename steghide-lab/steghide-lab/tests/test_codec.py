@@ -0,0 +1,56 @@
+"""Kiểm thử nén thông điệp và giải nén theo luồng"""
+
+import zlib
+
+import pytest
+
+from stego_codec import (CODEC_LZMA, CODEC_ZLIB, CODECS, compressPayload, decompressPayload, decompressToFile,
+                         iterDecompress)
+from stego_engine import CODEC_NONE
+
+MESSAGE = "Nhật ký hệ thống: dịch vụ khởi động lại thành công.\n".encode('utf-8') * 400
+
+@pytest.mark.parametrize("name", list(CODECS))
+def test_compress_roundtrip(name):
+    codec, data = compressPayload(MESSAGE, name)
+    assert codec == CODECS[name]
+    assert decompressPayload(data, codec, len(MESSAGE)) == MESSAGE
+
+def test_auto_picks_smallest():
+    codec, data = compressPayload(MESSAGE)
+    assert codec in (CODEC_ZLIB, CODEC_LZMA)
+    assert len(data) == min(len(compressPayload(MESSAGE, "zlib")[1]), len(compressPayload(MESSAGE, "lzma")[1]))
+
+def test_auto_keeps_incompressible(rng):
+    noise = rng.integers(0, 256, 256, dtype='u1').tobytes()
+    assert compressPayload(noise) == (CODEC_NONE, noise)
+
+@pytest.mark.parametrize("name", ["zlib", "lzma"])
+def test_iter_decompress_bounded_chunks(name):
+    codec, data = compressPayload(MESSAGE, name)
+    chunks = list(iterDecompress(data, codec, len(MESSAGE), chunk_size=1000))
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) <= 1000
+    assert b''.join(chunks) == MESSAGE
+
+def test_iter_decompress_trims_padding():
+    assert b''.join(iterDecompress(MESSAGE + bytes(5), CODEC_NONE, len(MESSAGE), chunk_size=333)) == MESSAGE
+
+def test_decompress_length_mismatch():
+    data = zlib.compress(MESSAGE)
+    with pytest.raises(ValueError):
+        decompressPayload(data, CODEC_ZLIB, len(MESSAGE) - 1)
+    with pytest.raises(ValueError):
+        decompressPayload(data, CODEC_ZLIB, len(MESSAGE) + 1)
+
+@pytest.mark.parametrize("name", ["zlib", "lzma"])
+def test_decompress_corrupt_stream(name):
+    codec, data = compressPayload(MESSAGE, name)
+    with pytest.raises(ValueError):
+        decompressPayload(data[:len(data) // 2] + bytes(len(data) // 2), codec, len(MESSAGE))
+
+def test_decompress_to_file(tmp_path):
+    codec, data = compressPayload(MESSAGE, "lzma")
+    path = tmp_path / "message.txt"
+    assert decompressToFile(data, codec, str(path), len(MESSAGE)) == len(MESSAGE)
+    assert path.read_bytes() == MESSAGE
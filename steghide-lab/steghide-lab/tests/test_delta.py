@@ -0,0 +1,32 @@
+"""Kiểm thử chế độ cập nhật: thêm dòng vào cuối thông điệp chỉ sửa header và các pixel cuối"""
+
+import cv2
+import numpy as np
+
+from stego_engine import BITS_PER_CHANNEL, CHANNELS, carrierPixels
+from stego_pipeline import embed, extract
+
+MESSAGE = "Dòng nhật ký có thể nén được rất tốt. " * 25
+
+def test_append_to_default_codec_message_changes_only_tail(cover, tmp_path):
+    cover_path, output = str(tmp_path / "cover.png"), str(tmp_path / "stego.png")
+    cv2.imwrite(cover_path, cover)
+    
+    # Codec mặc định (auto) được đổi thành none nên chế độ cập nhật không bị tắt
+    first = embed(cover_path, MESSAGE, output=output, incremental=True)
+    assert first["mode"] == "delta" and not first["warnings"]
+    before = carrierPixels(cv2.imread(output, cv2.IMREAD_UNCHANGED)).copy()
+    
+    appended = MESSAGE + "Dòng mới thêm vào cuối.\n"
+    second = embed(cover_path, appended, output=output, incremental=True)
+    assert second["mode"] == "delta" and not second["warnings"]
+    after = carrierPixels(cv2.imread(output, cv2.IMREAD_UNCHANGED))
+    assert extract(output).decode('utf-8') == appended
+    
+    # Các nhóm kênh mang phần thông điệp cũ (trừ nhóm cuối có thể chứa byte bù) giữ nguyên
+    header_groups = second["header_pixels"]
+    unchanged = len(MESSAGE.encode('utf-8')) * 8 // (BITS_PER_CHANNEL * CHANNELS)
+    changed = np.flatnonzero((before != after).any(axis=1))
+    assert len(changed)
+    assert np.all((changed < header_groups) | (changed >= header_groups + unchanged - 1))
+    assert second["delta"]["pixels_changed"] < first["delta"]["pixels_changed"] // 10
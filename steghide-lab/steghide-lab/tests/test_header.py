@@ -0,0 +1,62 @@
+"""Kiểm thử header cũ (24 bit) và header mở rộng v2"""
+
+import numpy as np
+import pytest
+
+from stego_engine import (CODEC_NONE, EXTENDED_PIXELS, EXTENDED_VERSION, HEADER_BITS, HEADER_PIXELS,
+                          MAX_MESSAGE_LENGTH, embedBits, encodeMessageLength, headerBits, readHeader)
+
+@pytest.mark.parametrize("bits_per_channel", [1, 2, 3, 4])
+def test_legacy_header_roundtrip(cover, bits_per_channel):
+    header = headerBits(1234, bits_per_channel)
+    assert len(header) == HEADER_BITS
+    embedBits(cover, header)
+    info = readHeader(cover)
+    assert info["version"] == 1
+    assert info["message_length"] == 1234
+    assert info["original_length"] == 1234
+    assert info["bits_per_channel"] == bits_per_channel
+    assert info["codec"] == CODEC_NONE
+    assert info["checksum"] is None
+    assert info["matrix_order"] == 0
+    assert info["payload_pixel"] == HEADER_PIXELS
+
+def test_legacy_header_layout():
+    # Độ sâu mặc định có mã 0: 24 bit header chính là độ dài thông điệp
+    bits = encodeMessageLength(0x0A0B0C)
+    assert np.packbits(bits).tobytes() == b'\x0a\x0b\x0c'
+    with pytest.raises(ValueError):
+        encodeMessageLength(MAX_MESSAGE_LENGTH + 1)
+
+@pytest.mark.parametrize("length, fields", [
+    (700, dict(codec=1, original_length=5000, checksum=0xDEADBEEF)),
+    (700, dict(checksum=0)),
+    (700, dict(matrix_order=5)),
+    (700, dict(original_length=710)),
+])
+def test_extended_header_roundtrip(cover, length, fields):
+    header = headerBits(length, 3, **fields)
+    assert len(header) == (HEADER_PIXELS + EXTENDED_PIXELS) * 6
+    embedBits(cover, header)
+    info = readHeader(cover)
+    assert info["version"] == EXTENDED_VERSION
+    assert info["message_length"] == length
+    assert info["bits_per_channel"] == 3
+    assert info["codec"] == fields.get("codec", CODEC_NONE)
+    assert info["original_length"] == fields.get("original_length", length)
+    assert info["checksum"] == fields.get("checksum")
+    assert info["matrix_order"] == fields.get("matrix_order", 0)
+    assert info["payload_pixel"] == HEADER_PIXELS + EXTENDED_PIXELS
+
+def test_extended_header_beyond_legacy_limit(cover):
+    embedBits(cover, headerBits(MAX_MESSAGE_LENGTH + 1))
+    info = readHeader(cover)
+    assert info["version"] == EXTENDED_VERSION
+    assert info["message_length"] == MAX_MESSAGE_LENGTH + 1
+
+def test_header_without_magic_is_rejected(cover):
+    # Độ dài 0 ở header cũ nhưng phần sau không phải header mở rộng
+    embedBits(cover, encodeMessageLength(0))
+    embedBits(cover, np.zeros(EXTENDED_PIXELS * 6, dtype=np.uint8), HEADER_PIXELS)
+    with pytest.raises(ValueError, match="magic"):
+        readHeader(cover)
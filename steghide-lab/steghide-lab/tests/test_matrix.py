@@ -0,0 +1,48 @@
+"""Kiểm thử giấu tin bằng mã hóa ma trận Hamming"""
+
+import numpy as np
+import pytest
+
+from stego_engine import carrierPixels, imageChannels, readHeader
+from stego_matrix import (MATRIX_HEADER_PIXELS, matrixBlockSize, matrixEmbed, matrixExtract, matrixOrder,
+                          matrixSamples)
+
+@pytest.mark.parametrize("key", [None, "khóa"])
+def test_matrix_roundtrip(cover, rng, key):
+    samples = matrixSamples(cover.shape[0] * cover.shape[1], imageChannels(cover))
+    payload = rng.integers(0, 256, 300, dtype='u1').tobytes()
+    order = matrixOrder(len(payload), samples)
+    assert order is not None and order > 1
+    original = cover.copy()
+    stats = matrixEmbed(cover, payload, order, key=key)
+    header = readHeader(cover)
+    assert header["matrix_order"] == order
+    assert header["payload_pixel"] == MATRIX_HEADER_PIXELS
+    assert matrixExtract(cover, header["message_length"], order, header["payload_pixel"], key) == payload
+    
+    # Mỗi khối sửa tối đa một kênh; header dùng 2 bit mỗi kênh, thông điệp chỉ đổi bit thấp nhất
+    diff = cover.astype(np.int16) - original
+    assert stats["blocks"] == -(-len(payload) * 8 // order)
+    payload_diff = carrierPixels(diff.astype(np.uint8))[MATRIX_HEADER_PIXELS:]
+    assert np.count_nonzero(payload_diff) == stats["channels_changed"] <= stats["blocks"]
+    assert set(np.unique(np.abs(payload_diff.astype(np.int8)))) <= {0, 1}
+    assert set(np.unique(np.abs(diff))) <= {0, 1, 2, 3}
+
+@pytest.mark.parametrize("order", [1, 2, 5, 8])
+def test_matrix_fixed_orders(rng, order):
+    image = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    payload = rng.integers(0, 256, 40, dtype='u1').tobytes()
+    matrixEmbed(image, payload, order)
+    assert matrixExtract(image, len(payload), order, MATRIX_HEADER_PIXELS) == payload
+
+def test_matrix_order_fits():
+    for length, samples in [(100, 10000), (1000, 9000), (10, 1 << 20)]:
+        order = matrixOrder(length, samples)
+        assert -(-length * 8 // order) * matrixBlockSize(order) <= samples
+        assert -(-length * 8 // (order + 1)) * matrixBlockSize(order + 1) > samples or order == 16
+    assert matrixOrder(1000, 100) is None
+
+def test_matrix_too_large(rng):
+    image = rng.integers(0, 256, (16, 16, 3), dtype=np.uint8)
+    with pytest.raises(ValueError):
+        matrixEmbed(image, bytes(200), 1)
@@ -0,0 +1,44 @@
+"""Kiểm thử giấu và trích xuất song song trên ảnh trong bộ nhớ dùng chung"""
+
+import numpy as np
+import pytest
+
+import stego_parallel
+from stego_engine import embedBytes, extractPayload, headerBits, readHeader
+from stego_parallel import SharedImage, embedParallel, extractParallel, sharedOffset
+
+@pytest.fixture
+def small_bands(monkeypatch):
+    """Cho phép chia dải với ảnh kiểm thử nhỏ"""
+    monkeypatch.setattr(stego_parallel, "MIN_BAND_PIXELS", 64)
+    monkeypatch.setattr(stego_parallel, "MIN_BAND_BYTES", 64)
+
+@pytest.mark.parametrize("bits_per_channel", [1, 2, 3])
+def test_parallel_matches_serial(cover, rng, small_bands, bits_per_channel):
+    payload = rng.integers(0, 256, cover.size * bits_per_channel // 16, dtype="u1").tobytes()
+    header = headerBits(len(payload), bits_per_channel)
+    serial = cover.copy()
+    end = embedBytes(serial, payload, bits_per_channel, header)
+    
+    shared = SharedImage.fromArray(cover)
+    assert embedParallel(shared, payload, bits_per_channel, workers=3, header=header) == end
+    assert np.array_equal(np.asarray(shared), serial)
+    
+    start_pixel = readHeader(shared)['payload_pixel']
+    assert extractParallel(shared, len(payload), bits_per_channel, 3, start_pixel) == payload
+    assert extractPayload(serial, len(payload), bits_per_channel, start_pixel) == payload
+
+def test_plain_array_stays_serial(cover, rng, small_bands):
+    # Mảng thường không được chép vào bộ nhớ dùng chung, kết quả vẫn giống hệt
+    payload = rng.integers(0, 256, cover.size // 8, dtype="u1").tobytes()
+    serial, plain = cover.copy(), cover.copy()
+    embedBytes(serial, payload)
+    embedParallel(plain, payload, workers=3)
+    assert sharedOffset(plain) is None
+    assert np.array_equal(plain, serial)
+
+def test_shared_offset(cover):
+    shared = SharedImage.fromArray(cover)
+    flat = shared.reshape(-1)
+    assert sharedOffset(flat[10:100]) == 10
+    assert sharedOffset(flat + 1) is None
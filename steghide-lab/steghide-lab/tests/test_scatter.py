@@ -0,0 +1,45 @@
+"""Kiểm thử rải thông điệp theo khóa (hoán vị Feistel)"""
+
+import numpy as np
+import pytest
+
+from stego_engine import HEADER_PIXELS, carrierPixels, embedBytes, lsbBits, readHeader
+from stego_scatter import embedScattered, extractScattered, scatterKeys, scatterPositions
+
+@pytest.mark.parametrize("domain", [1, 7, 1000, 4097])
+def test_scatter_positions_are_permutation(domain):
+    positions = scatterPositions(scatterKeys("khóa"), domain, 0, domain)
+    assert sorted(positions.tolist()) == list(range(domain))
+
+def test_scatter_positions_chunked():
+    keys = scatterKeys(b"abc")
+    whole = scatterPositions(keys, 5000, 0, 3000)
+    parts = np.concatenate([scatterPositions(keys, 5000, start, start + 700) for start in range(0, 3000, 700)])
+    assert np.array_equal(whole, parts[:3000])
+
+@pytest.mark.parametrize("bits_per_channel", [1, 2, 4])
+def test_scatter_roundtrip(cover, rng, bits_per_channel):
+    payload = rng.integers(0, 256, 500, dtype='u1').tobytes()
+    embedScattered(cover, payload, "bí mật", bits_per_channel)
+    header = readHeader(cover)
+    assert header["message_length"] == len(payload)
+    assert extractScattered(cover, len(payload), "bí mật", bits_per_channel, header["payload_pixel"]) == payload
+    assert extractScattered(cover, len(payload), "khóa khác", bits_per_channel, header["payload_pixel"]) != payload
+
+def test_scatter_matches_sequential_bits(cover, rng):
+    # Cùng luồng bit với chế độ tuần tự, chỉ khác vị trí pixel
+    payload = rng.integers(0, 256, 300, dtype='u1').tobytes()
+    sequential, scattered = cover.copy(), cover.copy()
+    end = embedBytes(sequential, payload)
+    embedScattered(scattered, payload, "k")
+    seq, sca = carrierPixels(sequential), carrierPixels(scattered)
+    assert np.array_equal(seq[:HEADER_PIXELS], sca[:HEADER_PIXELS])
+    assert not np.array_equal(seq[HEADER_PIXELS:end], sca[HEADER_PIXELS:end])
+    
+    # Pixel thứ i của thông điệp tuần tự và pixel thứ i theo hoán vị mang cùng các bit LSB
+    positions = HEADER_PIXELS + scatterPositions(scatterKeys("k"), len(sca) - HEADER_PIXELS, 0, end - HEADER_PIXELS)
+    assert np.array_equal(seq[HEADER_PIXELS:end] & lsbBits(), sca[positions] & lsbBits())
+
+def test_scatter_too_large(cover):
+    with pytest.raises(ValueError):
+        embedScattered(cover, bytes(cover.size), "k")